@@ -0,0 +1,50 @@
+"""add normalized title
+
+Revision ID: a41c7e2d9b10
+Revises: 372f2f71ffc7
+Create Date: 2025-09-02 10:14:51.208113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.titles import NORMALIZED_TITLE_SQL
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a41c7e2d9b10"
+down_revision: Union[str, Sequence[str], None] = "372f2f71ffc7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A stored generated column: adding it backfills every existing row and
+    # Postgres keeps it in sync with `title` on every write path.
+    op.add_column(
+        "movies",
+        sa.Column(
+            "normalized_title",
+            sa.String(),
+            sa.Computed(NORMALIZED_TITLE_SQL, persisted=True),
+            nullable=True,
+        ),
+    )
+    with op.get_context().autocommit_block():
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY idx_movies_normalized_title_year
+            ON movies (normalized_title, release_year);
+        """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY idx_movies_normalized_title_year;")
+    op.drop_column("movies", "normalized_title")
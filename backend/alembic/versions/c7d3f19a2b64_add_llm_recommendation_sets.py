@@ -0,0 +1,72 @@
+"""add llm recommendation sets
+
+Revision ID: c7d3f19a2b64
+Revises: a41c7e2d9b10
+Create Date: 2025-09-04 18:32:07.541926
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "c7d3f19a2b64"
+down_revision: Union[str, Sequence[str], None] = "a41c7e2d9b10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "llm_recommendation_sets",
+        sa.Column("trigger_keywords_hash", sa.String(), nullable=False),
+        sa.Column("source_movie_id", sa.Integer(), nullable=False),
+        sa.Column("keywords", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("results", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(
+            ["source_movie_id"],
+            ["movies.id"],
+        ),
+        sa.PrimaryKeyConstraint("trigger_keywords_hash"),
+    )
+    # Existing generations, in the shape the worker caches (`LLMRecResult`,
+    # with the recommendation row's id) and in the order they were stored.
+    op.execute(
+        """
+        INSERT INTO llm_recommendation_sets
+            (trigger_keywords_hash, source_movie_id, results)
+        SELECT
+            r.trigger_keywords_hash,
+            min(r.source_movie_id),
+            jsonb_agg(
+                jsonb_build_object(
+                    'id', r.id,
+                    'title', m.title,
+                    'overview', m.overview,
+                    'release_year', m.release_year,
+                    'poster_path', m.poster_path,
+                    'justification', r.llm_justification,
+                    'ai_score', r.llm_score
+                )
+                ORDER BY r.id
+            )
+        FROM llm_recommendations AS r
+        JOIN movies AS m ON m.id = r.recommended_movie_id
+        GROUP BY r.trigger_keywords_hash;
+    """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("llm_recommendation_sets")
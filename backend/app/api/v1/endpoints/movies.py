@@ -1,4 +1,5 @@
 import json
+import time
 import httpx
 import asyncio
 from typing import List
@@ -6,57 +7,81 @@ import redis.asyncio as redis
 from app.core.database import get_async_db
 from app.core.redis import get_redis_client
 from app.crud.crud_movie import (
-    get_movie_by_id,
     search_movies_by_title,
     filter_existing_movie_ids,
 )
-from app.crud.crud_cache import get_cached_trending_movies, cache_trending_movies
+from app.crud.crud_cache import get_cached_trending_movies
 from app.schemas.movie import Movie, MovieSearchResult, SimilarMovie, TrendingMoviesPage
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.tmdb_client import tmdb_client
+from app.services import movie_documents, trending
+from app.utils import http_cache
 from app.utils.encryption import decrypt_id
 
 router = APIRouter()
 CACHE_TTL_SECONDS = 86400
+# Browsers and CDNs may reuse these responses, revalidating with the ETag.
+TRENDING_CACHE_CONTROL = "public, max-age=600, stale-while-revalidate=3600"
+MOVIE_CACHE_CONTROL = "public, max-age=3600, stale-while-revalidate=86400"
+
+
+def _trending_etag(page: int, soft_expires_at: float) -> str:
+    # Every write of a page sets a new soft expiry, so it versions the entry
+    # and a 304 needs no serialization at all.
+    return http_cache.make_etag(f"trending:{page}:{soft_expires_at}")
 
 
 @router.get("/trending", response_model=TrendingMoviesPage)
 async def get_trending_movies(
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
     page: int = Query(1, ge=1, description="Page number to fetch"),
     db: AsyncSession = Depends(get_async_db),
     redis_client: redis.Redis = Depends(get_redis_client),
 ):
     """
     Get the daily trending movies.
-    - Results are cached for 24 hours to reduce API calls.
+    - Results are cached for 24 hours to reduce API calls. Past that, the
+      stale page is served immediately while it is refreshed in the background.
     - New movies discovered in the trending list are automatically added
       to our database in the background.
     """
     # 1. Check cache first
-    cached_data = await get_cached_trending_movies(redis_client, page=page)
-    if cached_data:
+    cached = await get_cached_trending_movies(redis_client, page=page)
+    if cached:
+        cached_data, soft_expires_at = cached
+        if soft_expires_at <= time.time():
+            background_tasks.add_task(trending.refresh_trending_in_background, [page])
+        etag = _trending_etag(page, soft_expires_at)
+        if http_cache.is_not_modified(request, etag):
+            return http_cache.not_modified_response(etag, TRENDING_CACHE_CONTROL)
+        response.headers.update(http_cache.cache_headers(etag, TRENDING_CACHE_CONTROL))
         return cached_data
 
-    # 2. If cache miss, fetch from TMDb
-    genre_map = await tmdb_client.get_genre_map()
-
-    trending_data = await tmdb_client.fetch_trending_from_tmdb(page=page)
-    if not trending_data:
+    # 2. If cache miss, fetch from TMDb and cache the new data
+    filled = await trending.get_or_fill_trending_page(redis_client, page)
+    if not filled:
         raise HTTPException(
             status_code=503,
             detail="Could not fetch trending movies from external service.",
         )
-    for movie in trending_data.get("results", []):
-        movie["genres"] = [
-            {"id": gid, "name": genre_map.get(gid, "Unknown")}
-            for gid in movie.get("genre_ids", [])
-        ]
-
-    # 3. Cache the new data
-    await cache_trending_movies(redis_client, page=page, data=trending_data)
+    trending_data, soft_expires_at = filled
+    response.headers.update(
+        http_cache.cache_headers(
+            _trending_etag(page, soft_expires_at), TRENDING_CACHE_CONTROL
+        )
+    )
 
-    # 4. Asynchronously sync new movies to our database
+    # 3. Asynchronously sync new movies to our database
     trending_movies = trending_data.get("results", [])
     if trending_movies:
         movie_ids = [movie["id"] for movie in trending_movies]
@@ -95,15 +120,21 @@ async def search_movies(
 
 
 @router.get("/{movie_id}", response_model=Movie)
-async def read_movie(movie_id: str, db: AsyncSession = Depends(get_async_db)):
+async def read_movie(
+    request: Request,
+    movie_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    redis_client: redis.Redis = Depends(get_redis_client),
+):
     """
     Get a single movie by its TMDb ID.
+    - The serialized response is cached per movie, so repeated reads skip
+      Postgres and response validation.
+    - Clients revalidating with `If-None-Match` get a 304 without a body.
     """
-    db_movie = await get_movie_by_id(db, movie_id=decrypt_id(movie_id))
-    movie_data = db_movie.__dict__
-    movie_data["keywords"] = [
-        keyword.replace(".", "").capitalize() for keyword in db_movie.ai_keywords or []
-    ]
-    if movie_data is None:
+    document = await movie_documents.get_movie_document(
+        db, redis_client, decrypt_id(movie_id)
+    )
+    if document is None:
         raise HTTPException(status_code=404, detail="Movie not found")
-    return movie_data
+    return http_cache.conditional_response(request, document, MOVIE_CACHE_CONTROL)
@@ -1,20 +1,41 @@
-import hashlib
+import asyncio
+import time
+import orjson
 import redis.asyncio as redis
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from neo4j import Driver
 
 from app import schemas
 from workers.celery_config import celery_app
+from app.core.config import settings
 from app.core.database import get_async_db
 from app.core.redis import get_redis_client
 from app.core.graph import get_graph_driver
-from app.crud import crud_movie, crud_cache, crud_recommendation
+from app.crud import crud_movie, crud_cache
 from app.core.embedding_model import get_embedding_model
+from app.services import llm_scheduler, rec_stream, recommendation_store
+from app.utils import http_cache, trigger_keys
+from app.services.rec_notifications import completion_notifier
 
 router = APIRouter()
 model = get_embedding_model()
 
+# Long-poll requests are answered before common proxy idle timeouts.
+LONG_POLL_MAX_SECONDS = 55
+# A finished generation never changes, shared caches may keep it for a day.
+LLM_REC_CACHE_CONTROL = "public, max-age=86400"
+
 
 @router.post(
     "",
@@ -36,13 +57,13 @@ async def get_advanced_recommendations(
         )
 
     valid_keywords = {
-        kw.replace(".", "").lower() for kw in (source_movie.ai_keywords or [])
+        trigger_keys.normalize_keyword(kw) for kw in (source_movie.ai_keywords or [])
     }
     selected_keywords = set()
     if request.selected_keywords:
-        selected_keywords = {
-            kw.replace(".", "").lower() for kw in request.selected_keywords
-        }
+        selected_keywords = set(
+            trigger_keys.canonical_keywords(request.selected_keywords)
+        )
 
         if not selected_keywords.issubset(valid_keywords):
             raise HTTPException(
@@ -50,12 +71,13 @@ async def get_advanced_recommendations(
                 detail="One or more selected keywords are not valid for this movie.",
             )
 
-        keywords_str = "".join(sorted(request.selected_keywords))
-        trigger_hash = hashlib.sha256(
-            f"{request.source_movie_id}:{keywords_str}".encode()
-        ).hexdigest()
-        cache_key = f"llm_rec:{trigger_hash}"
-        print(f"{request.source_movie_id}:{keywords_str}")
+        trigger_hash = trigger_keys.build_trigger_hash(
+            request.source_movie_id, selected_keywords
+        )
+        cache_key = crud_cache.get_llm_rec_cache_key(trigger_hash)
+        await crud_cache.record_llm_rec_request(
+            redis_client, request.source_movie_id, selected_keywords
+        )
 
         # Check Redis cache first (hot cache)
         cached_result = await crud_cache.get_cached_llm_recommendation(
@@ -64,10 +86,8 @@ async def get_advanced_recommendations(
 
         # If Redis cache not found, check database (warm cache)
         if not cached_result:
-            cached_result = (
-                await crud_recommendation.get_recommendations_by_trigger_hash(
-                    db, trigger_hash
-                )
+            cached_result = await recommendation_store.read_warm_tier(
+                db, redis_client, trigger_hash
             )
 
         if cached_result:
@@ -76,6 +96,45 @@ async def get_advanced_recommendations(
                 "results": cached_result,
             }
 
+        # Approximate hit: reuse the result of a very similar keyword selection.
+        similar = await crud_cache.find_similar_llm_recommendation(
+            redis_client,
+            request.source_movie_id,
+            sorted(selected_keywords),
+            settings.LLM_REC_APPROXIMATE_MIN_JACCARD,
+        )
+        if similar:
+            similar_result, _, similarity = similar
+            return {
+                "status": "complete",
+                "results": similar_result,
+                "similarity": similarity,
+            }
+
+        # While Gemini is failing, answer with the vector results only
+        # instead of queueing work that is bound to fail.
+        llm_available = not await llm_scheduler.is_circuit_open(redis_client)
+
+        # Single-flight: only the request that takes the lock enqueues the
+        # generation, everyone else is told it is already pending.
+        lock_key = crud_cache.get_llm_rec_lock_key(trigger_hash)
+        lock_token = None
+        if llm_available:
+            lock_token = await crud_cache.acquire_lock(
+                redis_client, lock_key, crud_cache.LLM_REC_LOCK_TTL_SECONDS
+            )
+        if lock_token:
+            # The previous generation may have finished since the cache check.
+            cached_result = await crud_cache.get_cached_llm_recommendation(
+                redis_client, cache_key
+            )
+            if cached_result:
+                await crud_cache.release_lock(redis_client, lock_key, lock_token)
+                return {
+                    "status": "complete",
+                    "results": cached_result,
+                }
+
     query = crud_movie.create_query_description(
         source_movie.title,
         source_movie.overview,
@@ -92,14 +151,128 @@ async def get_advanced_recommendations(
     #     db, driver, request.source_movie_id
     # )
 
-    if request.selected_keywords:
-        celery_app.send_task(
-            "tasks.generate_and_cache_llm_rec",
-            args=[request.source_movie_id, request.selected_keywords, trigger_hash],
-            queue="llm_queue",
-        )
+    generation = None
+    if request.selected_keywords and not llm_available:
+        generation = "unavailable"
+    elif request.selected_keywords:
+        generation = "pending"
+        if lock_token:
+            try:
+                celery_app.send_task(
+                    "tasks.generate_and_cache_llm_rec",
+                    args=[
+                        request.source_movie_id,
+                        request.selected_keywords,
+                        trigger_hash,
+                    ],
+                    kwargs={
+                        "lock_token": lock_token,
+                        "lane": llm_scheduler.INTERACTIVE,
+                        "enqueued_at": time.time(),
+                    },
+                    queue="llm_queue",
+                    priority=llm_scheduler.LANE_PRIORITIES[llm_scheduler.INTERACTIVE],
+                )
+            except Exception:
+                await crud_cache.release_lock(redis_client, lock_key, lock_token)
+                raise
+            generation = "started"
 
     return {
         "status": "partial",
         "results": fallback_results,
+        "generation": generation,
+        "trigger_hash": trigger_hash if generation in ("started", "pending") else None,
+    }
+
+
+@router.get("/{trigger_hash}/stream")
+async def stream_llm_recommendations(
+    trigger_hash: str = Path(..., pattern="^[0-9a-f]{64}$"),
+):
+    """
+    Streams the LLM recommendations of a pending generation as server-sent
+    events, batch by batch, as soon as they are parsed and stored.
+    """
+    return StreamingResponse(
+        rec_stream.stream_llm_recommendations(trigger_hash),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/{trigger_hash}/wait",
+    response_model=schemas.recommendation.RecResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def wait_for_llm_recommendations(
+    request: Request,
+    response: Response,
+    trigger_hash: str = Path(..., pattern="^[0-9a-f]{64}$"),
+    timeout: float = Query(25, gt=0, le=LONG_POLL_MAX_SECONDS),
+    db: AsyncSession = Depends(get_async_db),
+    redis_client: redis.Redis = Depends(get_redis_client),
+):
+    """
+    Long-polls a pending LLM generation. Responds as soon as the worker has
+    cached the result, or with a `pending` partial response after `timeout`
+    seconds, so clients no longer re-POST (and re-run the vector search)
+    to find out whether it finished. Finished results carry an ETag, and a
+    matching `If-None-Match` gets a 304.
+    """
+    cache_key = crud_cache.get_llm_rec_cache_key(trigger_hash)
+    with completion_notifier.waiter(trigger_hash) as done:
+        cached_result = await crud_cache.get_cached_llm_recommendation(
+            redis_client, cache_key
+        )
+
+        if not cached_result and await redis_client.exists(
+            crud_cache.get_llm_rec_lock_key(trigger_hash)
+        ):
+            try:
+                await asyncio.wait_for(done, timeout)
+            except asyncio.TimeoutError:
+                return {
+                    "status": "partial",
+                    "results": [],
+                    "generation": "pending",
+                    "trigger_hash": trigger_hash,
+                }
+            cached_result = await crud_cache.get_cached_llm_recommendation(
+                redis_client, cache_key
+            )
+        elif not cached_result:
+            # Nothing in flight, the result may only be left in the database.
+            cached_result = await recommendation_store.read_warm_tier(
+                db, redis_client, trigger_hash
+            )
+            if not cached_result:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="No recommendations or pending generation for this request.",
+                )
+
+    if cached_result:
+        etag = http_cache.make_etag(orjson.dumps(cached_result))
+        if http_cache.is_not_modified(request, etag):
+            return http_cache.not_modified_response(etag, LLM_REC_CACHE_CONTROL)
+        response.headers.update(http_cache.cache_headers(etag, LLM_REC_CACHE_CONTROL))
+        return {
+            "status": "complete",
+            "results": cached_result,
+        }
+
+    # The generation failed, the client may POST again to retry it.
+    return {
+        "status": "partial",
+        "results": [],
     }
+
+
+@router.get("/llm-scheduler")
+async def get_llm_scheduler_stats(
+    redis_client: redis.Redis = Depends(get_redis_client),
+):
+    """Token budget use, circuit breaker state and queue waits of LLM work."""
+    return await llm_scheduler.get_scheduler_stats(redis_client)
@@ -1,5 +1,4 @@
 import redis.asyncio as redis
-from workers.celery_config import celery_app
 from app.core.redis import get_redis_client
 from app.crud import crud_vote
 import app.schemas as schemas
@@ -23,21 +22,16 @@ async def create_or_vote_on_link(
             status_code=400, detail="Movies cannot be linked to themselves."
         )
 
-    if not await crud_vote.can_user_vote(
+    admission = await crud_vote.admit_vote(
         redis_client, vote.fingerprint, vote.movie_id_1, vote.movie_id_2
-    ):
+    )
+    if admission is crud_vote.VoteAdmission.DUPLICATE:
         raise HTTPException(
             status_code=429, detail="You have already voted for this link recently."
         )
-
-    celery_app.send_task(
-        "tasks.process_similarity_vote",
-        args=[vote.movie_id_1, vote.movie_id_2],
-        queue="llm_queue",
-    )
-
-    await crud_vote.record_user_vote(
-        redis_client, vote.fingerprint, vote.movie_id_1, vote.movie_id_2
-    )
+    if admission is crud_vote.VoteAdmission.DAILY_LIMIT_REACHED:
+        raise HTTPException(
+            status_code=429, detail="You have reached the daily vote limit."
+        )
 
     return {"message": "Your vote has been accepted and is being processed."}
@@ -0,0 +1,75 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Awaitable, Callable, Coroutine, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+SHUTDOWN_TIMEOUT_SECONDS = 10
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+_shutdown_callbacks: List[Callable[[], Awaitable[Any]]] = []
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Returns the process-wide event loop, starting it in a daemon thread on
+    first use. Async clients that must outlive a single call (pooled
+    connections, semaphores) live on this loop.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="async-runtime", daemon=True
+            ).start()
+        return _loop
+
+
+def run_sync(coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+    """
+    Runs a coroutine on the shared loop from synchronous code (e.g. Celery
+    tasks) and blocks until it finishes. Must not be called from the shared
+    loop itself.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, get_loop())
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+
+
+def on_shutdown(callback: Callable[[], Awaitable[Any]]):
+    """
+    Registers an async cleanup (e.g. closing a pooled client) that runs on
+    the shared loop before it stops. Usable as a decorator.
+    """
+    _shutdown_callbacks.append(callback)
+    return callback
+
+
+async def _run_shutdown_callbacks():
+    for callback in _shutdown_callbacks:
+        try:
+            await callback()
+        except Exception as e:
+            print(f"Async runtime shutdown callback failed: {e}")
+
+
+def shutdown():
+    """Runs the shutdown callbacks and stops the shared loop (worker shutdown)."""
+    global _loop
+    with _loop_lock:
+        loop, _loop = _loop, None
+    if loop is None or loop.is_closed():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_run_shutdown_callbacks(), loop).result(
+            SHUTDOWN_TIMEOUT_SECONDS
+        )
+    except Exception as e:
+        print(f"Async runtime shutdown did not finish cleanly: {e}")
+    loop.call_soon_threadsafe(loop.stop)
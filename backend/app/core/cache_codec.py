@@ -0,0 +1,85 @@
+"""
+Binary encoding of the values `crud_cache` keeps in Redis.
+
+Every value starts with a format byte, followed by the payload:
+
+    0x01  orjson
+    0x02  orjson, zstd-compressed
+
+Values written before this codec existed are plain JSON text. They start
+with a JSON character instead of a format byte and are still decoded, so
+they simply age out of Redis. A new format only needs a new byte here.
+"""
+
+import threading
+from typing import Any, Optional
+
+import orjson
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_DECODE_ERRORS = (orjson.JSONDecodeError,)
+if zstandard is not None:
+    _DECODE_ERRORS += (zstandard.ZstdError,)
+
+FORMAT_JSON = 0x01
+FORMAT_JSON_ZSTD = 0x02
+# Smaller payloads (e.g. the genre map) gain little from compression.
+COMPRESSION_THRESHOLD_BYTES = 1024
+COMPRESSION_LEVEL = 3
+
+# zstd compressors must not be shared between threads.
+_local = threading.local()
+
+
+class CacheDecodeError(ValueError):
+    pass
+
+
+def _compressor() -> "zstandard.ZstdCompressor":
+    if not hasattr(_local, "compressor"):
+        _local.compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL)
+    return _local.compressor
+
+
+def _decompressor() -> "zstandard.ZstdDecompressor":
+    if not hasattr(_local, "decompressor"):
+        _local.decompressor = zstandard.ZstdDecompressor()
+    return _local.decompressor
+
+
+def encode(value: Any) -> bytes:
+    """
+    Serializes a cache value. Payloads above `COMPRESSION_THRESHOLD_BYTES`
+    are zstd-compressed when `zstandard` is installed.
+    """
+    payload = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    if zstandard is not None and len(payload) > COMPRESSION_THRESHOLD_BYTES:
+        return bytes((FORMAT_JSON_ZSTD,)) + _compressor().compress(payload)
+    return bytes((FORMAT_JSON,)) + payload
+
+
+def decode(data: Optional[bytes]) -> Any:
+    """Deserializes a value written by `encode`, or a legacy JSON value."""
+    if data is None:
+        return None
+    if isinstance(data, str):
+        data = data.encode()
+    if not data:
+        raise CacheDecodeError("Empty cache value.")
+
+    version, payload = data[0], data[1:]
+    try:
+        if version == FORMAT_JSON:
+            return orjson.loads(payload)
+        if version == FORMAT_JSON_ZSTD:
+            if zstandard is None:
+                raise CacheDecodeError("zstandard is not installed.")
+            return orjson.loads(_decompressor().decompress(payload))
+        # Legacy entries are JSON text and never start with a format byte.
+        return orjson.loads(data)
+    except _DECODE_ERRORS as e:
+        raise CacheDecodeError(f"Undecodable cache value: {e}") from e
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Optional
 
 from pydantic_settings import BaseSettings
 
@@ -15,8 +16,36 @@ class Settings(BaseSettings):
     MAX_VOTES_PER_DAY: int = 4
     TMDB_API_KEY: str
     TMDB_API_V4_ACCESS_TOKEN: str
+    TMDB_RATE_LIMIT_PER_SECOND: float = 40.0
+    TMDB_MAX_CONCURRENCY: int = 32
+    # Directory for the compressed on-disk TMDb response store (disabled if unset)
+    TMDB_CACHE_DIR: Optional[str] = None
     DATABASE_URL: str
     GEMINI_API_KEY: str
+    # Per-process cap on in-flight Gemini calls, sized to the API quota
+    GEMINI_MAX_CONCURRENCY: int = 8
+    GEMINI_REQUEST_TIMEOUT_SECONDS: float = 90.0
+    # Minimum keyword-set Jaccard similarity for serving another selection's
+    # cached LLM result on an exact miss (above 1.0 disables it)
+    LLM_REC_APPROXIMATE_MIN_JACCARD: float = 0.6
+    # Gemini token budget per minute, shared by all workers
+    LLM_TOKENS_PER_MINUTE: int = 1_000_000
+    # Reserved per recommendation call, corrected by the reported usage
+    LLM_REC_ESTIMATED_TOKENS: int = 8_000
+    # Share of the budget background work may use
+    LLM_BACKGROUND_BUDGET_FRACTION: float = 0.5
+    # Consecutive Gemini failures that open the circuit, and for how long
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    LLM_CIRCUIT_COOLDOWN_SECONDS: int = 60
+    # Generations still waiting for budget after this long are dropped
+    LLM_REC_MAX_QUEUE_WAIT_SECONDS: int = 120
+    # Startup cache warmup: documents of the most requested movies, their
+    # most requested keyword selections and default neighbor searches
+    CACHE_WARMUP_TOP_MOVIES: int = 200
+    CACHE_WARMUP_KEYWORD_SETS: int = 3
+    CACHE_WARMUP_NEIGHBOR_MOVIES: int = 20
+    CACHE_WARMUP_CONCURRENCY: int = 8
+    CACHE_WARMUP_TIMEOUT_SECONDS: float = 120.0
     IDCODEC_XOR_KEY_HEX: str
     IDCODEC_MAC_KEY_B64: str
 
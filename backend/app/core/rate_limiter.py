@@ -0,0 +1,228 @@
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, List, Optional
+
+import httpx
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 4
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+
+# AIMD tuning: grow the window by ~1 slot per window of successes, shrink
+# it multiplicatively on throttling/errors and gently on slow responses.
+DECREASE_FACTOR = 0.5
+LATENCY_DECREASE_FACTOR = 0.9
+RATE_RECOVERY_FRACTION = 0.02
+
+
+class AdaptiveRateLimiter:
+    """
+    A token bucket that caps the request rate, combined with an AIMD
+    (additive increase, multiplicative decrease) limit on in-flight requests.
+
+    The window and the rate shrink on 429s, 5xx and network errors and grow
+    back on fast successes, so callers converge on the fastest rate the API
+    tolerates. A `Retry-After` pauses every caller sharing the limiter.
+    The limiter is thread-safe, so it can be shared by event loops running
+    in different threads.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        burst: Optional[int] = None,
+        min_concurrency: int = 1,
+        max_concurrency: int = 64,
+        initial_concurrency: int = 8,
+        latency_target_seconds: float = 2.0,
+    ):
+        self.max_rate = rate_per_second
+        self.min_rate = max(rate_per_second / 20, 0.5)
+        self.rate = rate_per_second
+        self.burst = burst or max(int(rate_per_second), 1)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.concurrency_limit = float(initial_concurrency)
+        self.latency_target_seconds = latency_target_seconds
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        # Wake-up callbacks of callers waiting for an in-flight slot.
+        self._slot_waiters: List[Callable[[], None]] = []
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def _try_acquire(self, wake: Callable[[], None]) -> Optional[float]:
+        """
+        Takes a slot and a token. Returns 0 on success, the seconds to wait,
+        or None if all slots are taken and `wake` was registered to be called
+        on the next release.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            if self._in_flight >= int(self.concurrency_limit):
+                self._slot_waiters.append(wake)
+                return None
+            self._refill(now)
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rate
+            self._tokens -= 1
+            self._in_flight += 1
+            return 0.0
+
+    def _discard_waiter(self, wake: Callable[[], None]):
+        with self._lock:
+            if wake in self._slot_waiters:
+                self._slot_waiters.remove(wake)
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            slot_freed = asyncio.Event()
+
+            def wake():
+                loop.call_soon_threadsafe(slot_freed.set)
+
+            wait = self._try_acquire(wake)
+            if wait == 0:
+                return
+            try:
+                if wait is None:
+                    await slot_freed.wait()
+                else:
+                    await asyncio.sleep(wait)
+            finally:
+                self._discard_waiter(wake)
+
+    def release(
+        self,
+        status_code: Optional[int],
+        latency_seconds: float,
+        retry_after_seconds: Optional[float] = None,
+    ):
+        """
+        Frees the slot and adapts the limits. `status_code` is None when the
+        request failed at the network level.
+        """
+        with self._lock:
+            self._in_flight -= 1
+
+            if status_code is None or status_code in RETRYABLE_STATUS_CODES:
+                self.concurrency_limit = max(
+                    self.min_concurrency, self.concurrency_limit * DECREASE_FACTOR
+                )
+                if status_code == 429:
+                    self.rate = max(self.min_rate, self.rate * DECREASE_FACTOR)
+                    pause = retry_after_seconds or (1 / self.rate)
+                    self._paused_until = max(
+                        self._paused_until, time.monotonic() + pause
+                    )
+            elif latency_seconds > self.latency_target_seconds:
+                self.concurrency_limit = max(
+                    self.min_concurrency,
+                    self.concurrency_limit * LATENCY_DECREASE_FACTOR,
+                )
+            else:
+                self.concurrency_limit = min(
+                    self.max_concurrency,
+                    self.concurrency_limit + 1 / self.concurrency_limit,
+                )
+                self.rate = min(
+                    self.max_rate, self.rate + self.max_rate * RATE_RECOVERY_FRACTION
+                )
+
+            # Every waiter re-checks, the window may also have grown.
+            waiters, self._slot_waiters = self._slot_waiters, []
+        for wake in waiters:
+            try:
+                wake()
+            except RuntimeError:
+                # The waiter's event loop is already closed.
+                pass
+
+
+def _parse_retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_seconds(attempt: int, retry_after: Optional[float]) -> float:
+    if retry_after is not None:
+        return retry_after
+    # Full jitter keeps retrying callers from synchronising.
+    return random.uniform(
+        0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2**attempt)
+    )
+
+
+def _release_attempt(
+    limiter: AdaptiveRateLimiter,
+    response: Optional[httpx.Response],
+    started: float,
+) -> Optional[float]:
+    """
+    Frees the slot of an attempt, as a failure if it produced no response.
+    Returns the response's `Retry-After` in seconds, if any.
+    """
+    if response is None:
+        limiter.release(None, time.monotonic() - started)
+        return None
+    retry_after = _parse_retry_after(response)
+    limiter.release(response.status_code, time.monotonic() - started, retry_after)
+    return retry_after
+
+
+async def request_with_retries(
+    limiter: AdaptiveRateLimiter,
+    send: Callable[[], Awaitable[httpx.Response]],
+    max_retries: int = MAX_RETRIES,
+) -> httpx.Response:
+    """
+    Sends a request through the limiter, retrying 429/5xx responses and
+    network errors with backoff. After the last attempt the final response
+    is returned (or the network error raised) for the caller to handle.
+    """
+    for attempt in range(max_retries + 1):
+        await limiter.acquire()
+        started = time.monotonic()
+        response = None
+        try:
+            response = await send()
+        except httpx.RequestError:
+            if attempt == max_retries:
+                raise
+        finally:
+            # Also runs on cancellation and unexpected errors, so the slot
+            # is never leaked.
+            retry_after = _release_attempt(limiter, response, started)
+
+        if response is None:
+            await asyncio.sleep(_backoff_seconds(attempt, None))
+            continue
+        if response.status_code not in RETRYABLE_STATUS_CODES or attempt == max_retries:
+            return response
+        await asyncio.sleep(_backoff_seconds(attempt, retry_after))
+
@@ -0,0 +1,144 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+import redis.asyncio as redis
+
+from .redis import redis_pool
+
+DAY = 60 * 60 * 24
+
+# Per-endpoint TTLs. Endpoints that match none of these (e.g. trending, which
+# has its own stale-while-revalidate cache) are never cached here.
+ENDPOINT_TTLS = [
+    (re.compile(r"^/movie/\d+$"), 7 * DAY),
+    (re.compile(r"^/movie/\d+/images$"), 7 * DAY),
+    (re.compile(r"^/search/movie$"), 30 * DAY),
+    (re.compile(r"^/discover/movie$"), DAY // 2),
+]
+
+
+class TMDbResponseCache:
+    """
+    A content-addressed cache of raw TMDb JSON responses, keyed by endpoint
+    and request params. Entries live in Redis and, when `disk_dir` is set,
+    also in gzip-compressed files that outlive Redis evictions and can be
+    reprocessed offline with `iter_disk_entries`.
+    """
+
+    def __init__(self, disk_dir: Optional[str] = None):
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+
+    @staticmethod
+    def ttl_for(endpoint: str) -> Optional[int]:
+        for pattern, ttl in ENDPOINT_TTLS:
+            if pattern.match(endpoint):
+                return ttl
+        return None
+
+    @staticmethod
+    def _canonical_params(params: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        # Same params in any order, or as 2024 vs "2024", map to one key.
+        return {k: str(v) for k, v in sorted((params or {}).items()) if k != "api_key"}
+
+    def key_for(self, endpoint: str, params: Optional[Dict[str, Any]]) -> str:
+        request_id = json.dumps(
+            [endpoint, self._canonical_params(params)], separators=(",", ":")
+        )
+        return f"tmdb:resp:{hashlib.sha256(request_id.encode()).hexdigest()}"
+
+    def _disk_path(self, endpoint: str, key: str) -> Path:
+        digest = key.rsplit(":", 1)[-1]
+        namespace = endpoint.strip("/").split("/")[0]
+        return self.disk_dir / namespace / digest[:2] / f"{digest}.json.gz"
+
+    def _read_disk(self, endpoint: str, key: str, ttl: int) -> Optional[Dict]:
+        path = self._disk_path(endpoint, key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("fetched_at", 0) > ttl:
+            return None
+        return entry["payload"]
+
+    def _write_disk(
+        self, endpoint: str, params: Optional[Dict[str, Any]], key: str, payload: Dict
+    ):
+        path = self._disk_path(endpoint, key)
+        entry = {
+            "endpoint": endpoint,
+            "params": self._canonical_params(params),
+            "fetched_at": time.time(),
+            "payload": payload,
+        }
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(entry, f, separators=(",", ":"))
+            tmp_path.replace(path)
+        except OSError as e:
+            print(f"Could not write TMDb cache file {path}: {e}")
+
+    async def get(
+        self, endpoint: str, params: Optional[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """Returns the cached payload for this request, or None on a miss."""
+        ttl = self.ttl_for(endpoint)
+        if ttl is None:
+            return None
+        key = self.key_for(endpoint, params)
+
+        try:
+            async with redis.Redis(connection_pool=redis_pool) as redis_client:
+                cached_data = await redis_client.get(key)
+            if cached_data:
+                return json.loads(cached_data)
+        except redis.RedisError as e:
+            print(f"TMDb cache read failed: {e}")
+
+        if self.disk_dir:
+            return await asyncio.to_thread(self._read_disk, endpoint, key, ttl)
+        return None
+
+    async def set(
+        self, endpoint: str, params: Optional[Dict[str, Any]], payload: Dict[str, Any]
+    ):
+        """Stores a successful response payload, if the endpoint is cacheable."""
+        ttl = self.ttl_for(endpoint)
+        if ttl is None:
+            return
+        key = self.key_for(endpoint, params)
+
+        try:
+            async with redis.Redis(connection_pool=redis_pool) as redis_client:
+                await redis_client.set(key, json.dumps(payload), ex=ttl)
+        except redis.RedisError as e:
+            print(f"TMDb cache write failed: {e}")
+
+        if self.disk_dir:
+            await asyncio.to_thread(self._write_disk, endpoint, params, key, payload)
+
+    def iter_disk_entries(self, namespace: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Yields every `{"endpoint", "params", "fetched_at", "payload"}` entry
+        in the on-disk store, optionally limited to one namespace (the first
+        path segment of the endpoint, e.g. "movie" or "search"). Expired
+        entries are included, since this is meant for offline reprocessing.
+        """
+        if not self.disk_dir:
+            return
+        root = self.disk_dir / namespace if namespace else self.disk_dir
+        for path in sorted(root.rglob("*.json.gz")):
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    yield json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Skipping unreadable TMDb cache file {path}: {e}")
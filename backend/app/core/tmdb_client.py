@@ -1,21 +1,36 @@
+import asyncio
+import time
 import httpx
-from typing import Optional, Dict, Any
-from functools import lru_cache
+import redis.asyncio as redis
+from typing import Optional, Dict, Any, List
 from .config import settings
-import requests
+from .redis import redis_pool
+from .tmdb_cache import TMDbResponseCache
+from .rate_limiter import AdaptiveRateLimiter, request_with_retries
+from app.crud import crud_cache
+from app.utils.titles import normalize_title
 
 # Constants
 TMDB_API_URL = "https://api.themoviedb.org/3"
 REQUEST_TIMEOUT = 10  # seconds
-
-
-chars_to_remove = "·'.-" + '"' + "!@#$%^&*()_+=[]{}|;<>?,/\\`~"
-translation_table = str.maketrans("", "", chars_to_remove)
+# Connections are shared by every TMDb call in the process, so keep enough
+# idle sockets around to absorb bursts without re-handshaking.
+HTTP_LIMITS = httpx.Limits(
+    max_connections=100, max_keepalive_connections=20, keepalive_expiry=60
+)
+# How long a process trusts its in-memory genre map before re-reading Redis.
+GENRE_MAP_LOCAL_TTL_SECONDS = 60 * 60 * 24
 
 
 class TMDbClient:
     """
     A client for interacting with The Movie Database (TMDb) API.
+
+    The client owns one long-lived async `httpx` client (HTTP/2, keep-alive),
+    created lazily and reused by every call in the process.
+    All requests go through a shared adaptive rate limiter that retries
+    throttled and failed requests with backoff, and cacheable endpoints are
+    served from a shared response cache first.
     """
 
     def __init__(self):
@@ -24,23 +39,72 @@ class TMDbClient:
             "accept": "application/json",
         }
         self.params = {"api_key": settings.TMDB_API_KEY}
+        self.rate_limiter = AdaptiveRateLimiter(
+            rate_per_second=settings.TMDB_RATE_LIMIT_PER_SECOND,
+            max_concurrency=settings.TMDB_MAX_CONCURRENCY,
+        )
+        self.response_cache = TMDbResponseCache(disk_dir=settings.TMDB_CACHE_DIR)
+
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._genre_map: Dict[int, str] = {}
+        self._genre_map_loaded_at: float = 0.0
+
+    def _client_options(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "headers": self.headers,
+            "params": self.params,
+            "timeout": REQUEST_TIMEOUT,
+            "limits": HTTP_LIMITS,
+            "http2": True,
+        }
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """
+        The pooled async client. An `httpx.AsyncClient` is bound to the event
+        loop it was first used on, so a new one is created if the running loop
+        has changed (e.g. successive `asyncio.run` calls in scripts).
+        """
+        loop = asyncio.get_running_loop()
+        if (
+            self._async_client is None
+            or self._async_client.is_closed
+            or self._async_client_loop is not loop
+        ):
+            self._async_client = httpx.AsyncClient(**self._client_options())
+            self._async_client_loop = loop
+        return self._async_client
+
+    async def aclose(self):
+        """Closes the pooled async client. Called on application shutdown."""
+        if self._async_client is not None and not self._async_client.is_closed:
+            await self._async_client.aclose()
+        self._async_client = None
+        self._async_client_loop = None
 
     async def _make_request(
-        self, client: httpx.AsyncClient, endpoint: str
+        self, endpoint: str, params: Optional[Dict[str, Any]] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Internal method to perform an async GET request.
         Returns the JSON response dict or None on failure.
         """
+        cached_data = await self.response_cache.get(endpoint, params)
+        if cached_data is not None:
+            return cached_data
+
         try:
-            response = await client.get(
-                f"{self.base_url}{endpoint}",
-                headers=self.headers,
-                params=self.params,
-                timeout=REQUEST_TIMEOUT,
+            response = await request_with_retries(
+                self.rate_limiter,
+                lambda: self.async_client.get(endpoint, params=params),
             )
             response.raise_for_status()
-            return response.json()
+            data = response.json()
+            await self.response_cache.set(endpoint, params, data)
+            return data
         except httpx.HTTPStatusError as e:
             # The API returned a 4xx or 5xx error
             print(f"HTTP error occurred: {e}")
@@ -49,87 +113,117 @@ class TMDbClient:
             # A network-level error occurred (timeout, connection error, etc.)
             raise
 
-    async def get_movie_images(
-        self, movie_id: int, client: httpx.AsyncClient
-    ) -> Optional[Dict[str, Any]]:
+    async def get_movie_images(self, movie_id: int) -> Optional[Dict[str, Any]]:
         """
         Fetches image data for a specific movie.
         """
-        return await self._make_request(client, f"/movie/{movie_id}/images")
+        return await self._make_request(f"/movie/{movie_id}/images")
+
+    def _genre_map_is_fresh(self) -> bool:
+        return bool(self._genre_map) and (
+            time.monotonic() - self._genre_map_loaded_at < GENRE_MAP_LOCAL_TTL_SECONDS
+        )
+
+    def _set_genre_map(self, genre_map: Dict[int, str]) -> Dict[int, str]:
+        self._genre_map = genre_map
+        self._genre_map_loaded_at = time.monotonic()
+        return genre_map
+
+    def invalidate_genre_map(self, keys: Optional[List[str]] = None):
+        """Makes the next lookup re-read the genre map from Redis."""
+        self._genre_map_loaded_at = float("-inf")
+
+    @staticmethod
+    def _parse_genre_map(payload: Optional[Dict[str, Any]]) -> Dict[int, str]:
+        genres = (payload or {}).get("genres", [])
+        return {genre["id"]: genre["name"] for genre in genres}
 
     async def get_genre_map(self) -> Dict[int, str]:
         """
-        Fetches the genre ID to name mapping from TMDb.
-        The result is cached in memory for the lifetime of the process.
+        Returns the genre ID to name mapping from TMDb.
+        The result is cached in process memory and in Redis, so TMDb is only
+        asked once per Redis TTL across all workers.
         """
-        print("Fetching genre map from TMDb API...")
+        if self._genre_map_is_fresh():
+            return self._genre_map
+
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/genre/movie/list", params=self.params
+            async with redis.Redis(connection_pool=redis_pool) as redis_client:
+                genre_map = await crud_cache.get_cached_genre_map(redis_client)
+                if genre_map:
+                    return self._set_genre_map(genre_map)
+
+                print("Fetching genre map from TMDb API...")
+                genre_map = self._parse_genre_map(
+                    await self._make_request("/genre/movie/list")
                 )
-                response.raise_for_status()
-                genres = response.json().get("genres", [])
-                return {genre["id"]: genre["name"] for genre in genres}
+                if genre_map:
+                    await crud_cache.cache_genre_map(redis_client, genre_map)
+                    return self._set_genre_map(genre_map)
+        except (httpx.RequestError, redis.RedisError) as e:
+            print(f"An error occurred while loading the genre map: {e}")
+
+        # Serve a stale map rather than nothing if a refresh failed.
+        return self._genre_map
+
+    async def fetch_trending_from_tmdb(self, page: int = 1) -> Dict[str, Any]:
+        """
+        Fetches a page of trending movies from the TMDb API using the pooled async client.
+        """
+        try:
+            return await self._make_request(
+                "/trending/movie/day", params={"language": "en-US", "page": page}
+            )
         except httpx.RequestError as e:
             print(f"An error occurred while requesting TMDb: {e}")
-            return {}
-        except httpx.HTTPStatusError as e:
-            print(
-                f"TMDb API returned an error: {e.response.status_code} - {e.response.text}"
-            )
-            return {}
+            return None
 
-    async def fetch_trending_from_tmdb(self, page: int = 1) -> Dict[str, Any]:
+    async def discover_movies(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
-        Fetches a page of trending movies from the TMDb API using an async client.
+        Fetches a page of the /discover/movie endpoint with the given filters.
         """
-        async with httpx.AsyncClient() as client:
-            try:
-                params = {**self.params, "language": "en-US", "page": page}
-                response = await client.get(
-                    f"{self.base_url}/trending/movie/day", params=params
-                )
-                response.raise_for_status()  # Will raise an exception for 4xx/5xx responses
-                return response.json()
-            except httpx.RequestError as e:
-                print(f"An error occurred while requesting TMDb: {e}")
-                return None
-            except httpx.HTTPStatusError as e:
-                print(
-                    f"TMDb API returned an error: {e.response.status_code} - {e.response.text}"
-                )
-                return None
+        return await self._make_request("/discover/movie", params=params)
+
+    async def get_movie_details(
+        self, movie_id: int, append_to_response: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Fetches the full details of a movie, optionally with appended sub-resources
+        (e.g. "credits,keywords").
+        """
+        params = (
+            {"append_to_response": append_to_response} if append_to_response else None
+        )
+        return await self._make_request(f"/movie/{movie_id}", params=params)
+
+    @staticmethod
+    def _search_params(query: str, release_year: Optional[int]) -> Dict[str, Any]:
+        return {
+            "query": normalize_title(query),
+            "include_adult": False,
+            "year": release_year,
+        }
+
+    @staticmethod
+    def _match_search_result(
+        query: str, response_data: Optional[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """Picks the result whose normalized title equals the normalized query."""
+        for result in (response_data or {}).get("results", []):
+            if normalize_title(result["title"]) == query:
+                return result
+        return None
 
-    def search_movie(
+    async def search_movie(
         self, query: str, release_year: Optional[int] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Searches for movies by title and fetches results from TMDb.
         """
         try:
-            movie_data = None
-            response_data = {}
-            query = query.translate(translation_table).strip().lower()
-            with httpx.Client() as client:
-                params = {
-                    **self.params,
-                    "query": query,
-                    "include_adult": False,
-                    "year": release_year,
-                }
-                response = client.get(f"{self.base_url}/search/movie", params=params)
-                response.raise_for_status()
-                response_data = response.json()
-            if response_data.get("results"):
-                for result in response_data["results"]:
-                    result_title = (
-                        result["title"].translate(translation_table).strip().lower()
-                    )
-                    if result_title == query:
-                        movie_data = result
-                        break
-            return movie_data
+            params = self._search_params(query, release_year)
+            response_data = await self._make_request("/search/movie", params=params)
+            return self._match_search_result(params["query"], response_data)
         except httpx.RequestError as e:
             print(f"An error occurred while searching for movies: {e}")
             return None
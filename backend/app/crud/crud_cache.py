@@ -1,10 +1,78 @@
 import json
+import time
+import uuid
 import redis.asyncio as redis
 import redis as sync_redis
-from typing import Dict, Any, Optional, List
+from redis.client import NEVER_DECODE
+from typing import Dict, Any, Optional, List, Tuple
+from app.core import cache_codec
+from app.utils import trigger_keys
 
-TRENDING_CACHE_TTL_SECONDS = 86400  # Cache trending movies for 24 hours
+TRENDING_CACHE_TTL_SECONDS = 86400  # Trending movies are fresh for 24 hours
+# After the soft expiry, entries are still served (stale) while a background
+# refresher replaces them. Redis only evicts them after this hard TTL.
+TRENDING_CACHE_STALE_TTL_SECONDS = TRENDING_CACHE_TTL_SECONDS * 2
 LLM_REC_CACHE_TTL_SECONDS = 60 * 60 * 24 * 7
+# Marks an LLM generation as in flight. It must outlive the task's budget
+# wait and retries (backoff plus the Gemini calls) and expires if a worker dies.
+LLM_REC_LOCK_TTL_SECONDS = 60 * 10
+# Streamed batches are kept for replay to clients that subscribe late.
+LLM_REC_STREAM_TTL_SECONDS = 60 * 10
+# Completion notifications for pending generations.
+LLM_REC_DONE_CHANNEL_PREFIX = "llm_rec_done:"
+LLM_REC_DONE_COMPLETE = "complete"
+LLM_REC_DONE_FAILED = "failed"
+# Request log used to pick what to precompute off-peak.
+LLM_REC_DEMAND_MOVIES_KEY = "llm_rec_demand:movies"
+LLM_REC_DEMAND_TTL_SECONDS = 60 * 60 * 24 * 30
+GENRE_MAP_CACHE_TTL_SECONDS = 60 * 60 * 24 * 30  # Genres change very rarely
+GENRE_MAP_CACHE_KEY = "tmdb:genre_map:movie"
+# Serialized GET /movies/{id} responses. Writers delete them and bump the
+# movie's version, so a fill that read the row before a write is not stored.
+MOVIE_DOC_CACHE_TTL_SECONDS = 60 * 60 * 24
+# Only needs to outlive a fill, i.e. one DB read and a render.
+MOVIE_DOC_VERSION_TTL_SECONDS = 60 * 60
+# Writers publish the keys they changed here, and every API process drops
+# them from its in-process caches. Keys are namespaced per cache.
+CACHE_INVALIDATION_CHANNEL = "cache_invalidation"
+MOVIE_DOC_NAMESPACE = "movie_doc"
+GENRE_MAP_NAMESPACE = "genre_map"
+
+# Stores a movie document only if the movie's version is still the one the
+# fill read before loading the row.
+CACHE_MOVIE_DOCUMENT_SCRIPT = """
+if (redis.call("get", KEYS[2]) or "") ~= ARGV[1] then
+    return 0
+end
+redis.call("set", KEYS[1], ARGV[2], "EX", ARGV[3])
+return 1
+"""
+
+# Compare-and-delete, so a lock is only released by the holder that set it.
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def _decode_entry(key: str, data: Optional[bytes]) -> Any:
+    try:
+        return cache_codec.decode(data)
+    except cache_codec.CacheDecodeError as e:
+        print(f"Ignoring unreadable cache entry {key}: {e}")
+        return None
+
+
+async def _get_entry(redis_client: redis.Redis, key: str) -> Any:
+    """
+    Reads a value written with `cache_codec.encode`. The clients decode
+    responses to text, so the raw bytes are requested explicitly.
+    Unreadable entries count as a miss.
+    """
+    data = await redis_client.execute_command("GET", key, **{NEVER_DECODE: True})
+    return _decode_entry(key, data)
 
 
 def _get_trending_cache_key(page: int) -> str:
@@ -13,35 +81,421 @@ def _get_trending_cache_key(page: int) -> str:
 
 async def get_cached_trending_movies(
     redis_client: redis.Redis, page: int
-) -> Optional[Dict[str, Any]]:
-    """Retrieves cached trending movie data from Redis."""
-    cache_key = _get_trending_cache_key(page)
-    cached_data = await redis_client.get(cache_key)
-    if cached_data:
-        return json.loads(cached_data)
-    return None
+) -> Optional[Tuple[Dict[str, Any], float]]:
+    """
+    Retrieves cached trending movie data from Redis.
+    Returns a `(data, soft_expires_at)` tuple, where `soft_expires_at` is the
+    UNIX timestamp after which the data should be refreshed.
+    """
+    entry = await _get_entry(redis_client, _get_trending_cache_key(page))
+    if not entry:
+        return None
+
+    if "soft_expires_at" not in entry:
+        # Entry written before soft expiry existed, serve it but refresh it now.
+        return entry, 0.0
+    return entry["data"], entry["soft_expires_at"]
 
 
 async def cache_trending_movies(
     redis_client: redis.Redis, page: int, data: Dict[str, Any]
-):
-    """Stores trending movie data in Redis with a 24-hour TTL."""
+) -> float:
+    """
+    Stores trending movie data in Redis with a 24-hour soft expiry, kept
+    around for stale-while-revalidate reads until the hard TTL. Returns the
+    soft expiry that was written.
+    """
     cache_key = _get_trending_cache_key(page)
-    await redis_client.set(cache_key, json.dumps(data), ex=TRENDING_CACHE_TTL_SECONDS)
+    entry = {"data": data, "soft_expires_at": time.time() + TRENDING_CACHE_TTL_SECONDS}
+    await redis_client.set(
+        cache_key, cache_codec.encode(entry), ex=TRENDING_CACHE_STALE_TTL_SECONDS
+    )
+    return entry["soft_expires_at"]
+
+
+async def acquire_lock(
+    redis_client: redis.Redis, lock_key: str, ttl_seconds: int
+) -> Optional[str]:
+    """
+    Tries to take a Redis lock with SET NX. Returns the holder token on
+    success, or None if somebody else holds the lock.
+    """
+    token = uuid.uuid4().hex
+    if await redis_client.set(lock_key, token, nx=True, ex=ttl_seconds):
+        return token
+    return None
+
+
+async def release_lock(redis_client: redis.Redis, lock_key: str, token: str):
+    """Releases a lock taken with `acquire_lock`, if it is still ours."""
+    await redis_client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+
+
+def get_llm_rec_cache_key(trigger_hash: str) -> str:
+    return f"llm_rec:{trigger_hash}"
+
+
+def get_llm_rec_lock_key(trigger_hash: str) -> str:
+    return f"llm_rec_lock:{trigger_hash}"
+
+
+def get_llm_rec_stream_channel(trigger_hash: str) -> str:
+    return f"llm_rec_stream:{trigger_hash}"
+
+
+def _get_llm_rec_stream_log_key(trigger_hash: str) -> str:
+    return f"llm_rec_stream_log:{trigger_hash}"
+
+
+def _queue_llm_rec_event(pipe, trigger_hash: str, event: Dict[str, Any]):
+    log_key = _get_llm_rec_stream_log_key(trigger_hash)
+    message = json.dumps(event)
+    pipe.rpush(log_key, message)
+    pipe.expire(log_key, LLM_REC_STREAM_TTL_SECONDS)
+    pipe.publish(get_llm_rec_stream_channel(trigger_hash), message)
+
+
+async def publish_llm_rec_event(
+    redis_client: redis.Redis, trigger_hash: str, event: Dict[str, Any]
+):
+    """
+    Appends a stream event to the replay log of a generation and publishes
+    it to live subscribers.
+    """
+    pipe = redis_client.pipeline()
+    _queue_llm_rec_event(pipe, trigger_hash, event)
+    await pipe.execute()
+
+
+async def reset_llm_rec_stream(redis_client: redis.Redis, trigger_hash: str):
+    """Clears the replay log, e.g. before a retried generation starts over."""
+    await redis_client.delete(_get_llm_rec_stream_log_key(trigger_hash))
+
+
+async def get_llm_rec_stream_events(
+    redis_client: redis.Redis, trigger_hash: str
+) -> List[Dict[str, Any]]:
+    """Returns every event published so far for a generation, in order."""
+    messages = await redis_client.lrange(
+        _get_llm_rec_stream_log_key(trigger_hash), 0, -1
+    )
+    return [json.loads(message) for message in messages]
 
 
 async def get_cached_llm_recommendation(
     redis_client: redis.Redis, cache_key: str
 ) -> Optional[List[Dict[str, Any]]]:
     """Retrieves a cached, structured LLM recommendation from Redis."""
-    cached_data = await redis_client.get(cache_key)
-    if cached_data:
-        return json.loads(cached_data)
+    return await _get_entry(redis_client, cache_key)
+
+
+def _get_llm_rec_index_key(source_movie_id: int) -> str:
+    return f"llm_rec_index:{source_movie_id}"
+
+
+async def find_similar_llm_recommendation(
+    redis_client: redis.Redis,
+    source_movie_id: int,
+    keywords: List[str],
+    min_similarity: float,
+) -> Optional[Tuple[List[Dict[str, Any]], str, float]]:
+    """
+    Approximate lookup through the per-movie index of cached keyword sets.
+    Returns `(data, trigger_hash, similarity)` for the cached result whose
+    keyword set has the highest Jaccard similarity to `keywords`, if it
+    reaches `min_similarity`.
+    """
+    index_key = _get_llm_rec_index_key(source_movie_id)
+    index = await redis_client.hgetall(index_key)
+    if not index:
+        return None
+
+    wanted = set(keywords)
+    candidates = sorted(
+        (
+            (trigger_keys.jaccard_similarity(wanted, set(json.loads(cached))), h)
+            for h, cached in index.items()
+        ),
+        reverse=True,
+    )
+    for similarity, trigger_hash in candidates:
+        if similarity < min_similarity:
+            break
+        data = await get_cached_llm_recommendation(
+            redis_client, get_llm_rec_cache_key(trigger_hash)
+        )
+        if data:
+            return data, trigger_hash, similarity
+        # The cached result expired, drop it from the index.
+        await redis_client.hdel(index_key, trigger_hash)
+    return None
+
+
+def _get_llm_rec_demand_keywords_key(source_movie_id: int) -> str:
+    return f"llm_rec_demand:keywords:{source_movie_id}"
+
+
+async def record_llm_rec_request(
+    redis_client: redis.Redis, source_movie_id: int, keywords: List[str]
+):
+    """Counts a recommendation request per movie and per keyword selection."""
+    keywords_key = _get_llm_rec_demand_keywords_key(source_movie_id)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.zincrby(LLM_REC_DEMAND_MOVIES_KEY, 1, source_movie_id)
+    pipe.expire(LLM_REC_DEMAND_MOVIES_KEY, LLM_REC_DEMAND_TTL_SECONDS)
+    pipe.zincrby(keywords_key, 1, json.dumps(trigger_keys.canonical_keywords(keywords)))
+    pipe.expire(keywords_key, LLM_REC_DEMAND_TTL_SECONDS)
+    await pipe.execute()
+
+
+async def get_most_requested_movies(
+    redis_client: redis.Redis, limit: int
+) -> List[Tuple[int, float]]:
+    """The most requested source movies as `(movie_id, request_count)`."""
+    entries = await redis_client.zrevrange(
+        LLM_REC_DEMAND_MOVIES_KEY, 0, limit - 1, withscores=True
+    )
+    return [(int(movie_id), count) for movie_id, count in entries]
+
+
+def sync_get_most_requested_movies(
+    redis_client: sync_redis.Redis, limit: int
+) -> List[Tuple[int, float]]:
+    """Synchronous variant of `get_most_requested_movies`."""
+    entries = redis_client.zrevrange(
+        LLM_REC_DEMAND_MOVIES_KEY, 0, limit - 1, withscores=True
+    )
+    return [(int(movie_id), count) for movie_id, count in entries]
+
+
+async def get_most_requested_keywords(
+    redis_client: redis.Redis, source_movie_id: int, limit: int
+) -> List[Tuple[List[str], float]]:
+    """The most requested keyword selections for a movie, with their counts."""
+    entries = await redis_client.zrevrange(
+        _get_llm_rec_demand_keywords_key(source_movie_id),
+        0,
+        limit - 1,
+        withscores=True,
+    )
+    return [(json.loads(keywords), count) for keywords, count in entries]
+
+
+def sync_get_most_requested_keywords(
+    redis_client: sync_redis.Redis, source_movie_id: int, limit: int
+) -> List[Tuple[List[str], float]]:
+    """Synchronous variant of `get_most_requested_keywords`."""
+    entries = redis_client.zrevrange(
+        _get_llm_rec_demand_keywords_key(source_movie_id),
+        0,
+        limit - 1,
+        withscores=True,
+    )
+    return [(json.loads(keywords), count) for keywords, count in entries]
+
+
+def sync_has_cached_llm_recommendation(
+    redis_client: sync_redis.Redis, trigger_hash: str
+) -> bool:
+    return bool(redis_client.exists(get_llm_rec_cache_key(trigger_hash)))
+
+
+def get_llm_rec_done_channel(trigger_hash: str) -> str:
+    return f"{LLM_REC_DONE_CHANNEL_PREFIX}{trigger_hash}"
+
+
+def _queue_llm_rec_cache(
+    pipe,
+    trigger_hash: str,
+    data: List[Dict[str, Any]],
+    source_movie_id: int,
+    keywords: Optional[List[str]],
+):
+    index_key = _get_llm_rec_index_key(source_movie_id)
+    pipe.set(
+        get_llm_rec_cache_key(trigger_hash),
+        cache_codec.encode(data),
+        ex=LLM_REC_CACHE_TTL_SECONDS,
+    )
+    if data and keywords is not None:
+        pipe.hset(
+            index_key,
+            trigger_hash,
+            json.dumps(trigger_keys.canonical_keywords(keywords)),
+        )
+        pipe.expire(index_key, LLM_REC_CACHE_TTL_SECONDS)
+
+
+def _queue_llm_rec_result(
+    pipe,
+    trigger_hash: str,
+    data: List[Dict[str, Any]],
+    source_movie_id: int,
+    keywords: List[str],
+):
+    _queue_llm_rec_cache(pipe, trigger_hash, data, source_movie_id, keywords)
+    pipe.publish(get_llm_rec_done_channel(trigger_hash), LLM_REC_DONE_COMPLETE)
+
+
+async def promote_llm_recommendation(
+    redis_client: redis.Redis,
+    trigger_hash: str,
+    data: List[Dict[str, Any]],
+    source_movie_id: int,
+    keywords: Optional[List[str]],
+):
+    """
+    Re-caches a result read back from the database after Redis evicted it.
+    It is only indexed for approximate lookups if its keywords are known.
+    """
+    pipe = redis_client.pipeline(transaction=False)
+    _queue_llm_rec_cache(pipe, trigger_hash, data, source_movie_id, keywords)
+    await pipe.execute()
+
+
+async def cache_and_announce_llm_recommendation(
+    redis_client: redis.Redis,
+    trigger_hash: str,
+    data: List[Dict[str, Any]],
+    source_movie_id: int,
+    keywords: List[str],
+):
+    """
+    Stores a structured LLM recommendation, indexes its keyword set for
+    approximate lookups and, in the same transaction, notifies clients
+    waiting for it.
+    """
+    pipe = redis_client.pipeline()
+    _queue_llm_rec_result(pipe, trigger_hash, data, source_movie_id, keywords)
+    await pipe.execute()
+
+
+def sync_cache_and_announce_llm_recommendation(
+    redis_client: sync_redis.Redis,
+    trigger_hash: str,
+    data: List[Dict[str, Any]],
+    source_movie_id: int,
+    keywords: List[str],
+):
+    pipe = redis_client.pipeline()
+    _queue_llm_rec_result(pipe, trigger_hash, data, source_movie_id, keywords)
+    pipe.execute()
+
+
+async def announce_llm_rec_failure(redis_client: redis.Redis, trigger_hash: str):
+    """Tells waiting clients that a generation gave up without a result."""
+    await redis_client.publish(
+        get_llm_rec_done_channel(trigger_hash), LLM_REC_DONE_FAILED
+    )
+
+
+def _decode_genre_map(entry: Dict[str, str]) -> Dict[int, str]:
+    # JSON object keys are always strings, restore the integer genre IDs.
+    return {int(genre_id): name for genre_id, name in entry.items()}
+
+
+async def get_cached_genre_map(redis_client: redis.Redis) -> Optional[Dict[int, str]]:
+    """Retrieves the TMDb genre ID to name mapping from Redis."""
+    entry = await _get_entry(redis_client, GENRE_MAP_CACHE_KEY)
+    if entry:
+        return _decode_genre_map(entry)
     return None
 
 
-def cache_llm_recommendation(
-    redis_client: sync_redis.Redis, cache_key: str, data: List[Dict[str, Any]]
+def _queue_genre_map(pipe, genre_map: Dict[int, str]):
+    pipe.set(
+        GENRE_MAP_CACHE_KEY,
+        cache_codec.encode(genre_map),
+        ex=GENRE_MAP_CACHE_TTL_SECONDS,
+    )
+    _queue_invalidation(pipe, GENRE_MAP_NAMESPACE, [GENRE_MAP_CACHE_KEY])
+
+
+async def cache_genre_map(redis_client: redis.Redis, genre_map: Dict[int, str]):
+    """
+    Stores the TMDb genre map in Redis with a long TTL, and tells other
+    processes to reload their copy.
+    """
+    pipe = redis_client.pipeline()
+    _queue_genre_map(pipe, genre_map)
+    await pipe.execute()
+
+
+def _get_movie_doc_cache_key(movie_id: int) -> str:
+    return f"movie_doc:{movie_id}"
+
+
+def _get_movie_doc_version_key(movie_id: int) -> str:
+    return f"movie_doc_version:{movie_id}"
+
+
+async def get_cached_movie_document(
+    redis_client: redis.Redis, movie_id: int
+) -> Optional[bytes]:
+    """
+    Retrieves the serialized response body for a movie. It is stored as the
+    exact bytes sent to clients, not through `cache_codec`.
+    """
+    return await redis_client.execute_command(
+        "GET", _get_movie_doc_cache_key(movie_id), **{NEVER_DECODE: True}
+    )
+
+
+async def get_movie_document_version(redis_client: redis.Redis, movie_id: int) -> str:
+    """The movie's invalidation counter. Read it before loading the row."""
+    return await redis_client.get(_get_movie_doc_version_key(movie_id)) or ""
+
+
+async def cache_movie_document(
+    redis_client: redis.Redis, movie_id: int, document: bytes, version: str
+) -> bool:
+    """
+    Stores a movie document, unless the movie was invalidated since
+    `version` was read. Returns whether it was stored.
+    """
+    stored = await redis_client.eval(
+        CACHE_MOVIE_DOCUMENT_SCRIPT,
+        2,
+        _get_movie_doc_cache_key(movie_id),
+        _get_movie_doc_version_key(movie_id),
+        version,
+        document,
+        MOVIE_DOC_CACHE_TTL_SECONDS,
+    )
+    return bool(stored)
+
+
+def _queue_movie_document_invalidation(pipe, movie_ids: List[int]):
+    for movie_id in movie_ids:
+        version_key = _get_movie_doc_version_key(movie_id)
+        pipe.incr(version_key)
+        pipe.expire(version_key, MOVIE_DOC_VERSION_TTL_SECONDS)
+    pipe.delete(*map(_get_movie_doc_cache_key, movie_ids))
+    _queue_invalidation(pipe, MOVIE_DOC_NAMESPACE, movie_ids)
+
+
+async def invalidate_movie_documents(redis_client: redis.Redis, movie_ids: List[int]):
+    """
+    Drops the cached documents of movies whose rows were written, in Redis
+    and in every API process.
+    """
+    if movie_ids:
+        pipe = redis_client.pipeline()
+        _queue_movie_document_invalidation(pipe, movie_ids)
+        await pipe.execute()
+
+
+def sync_invalidate_movie_documents(
+    redis_client: sync_redis.Redis, movie_ids: List[int]
 ):
-    """Stores a structured LLM recommendation in Redis."""
-    redis_client.set(cache_key, json.dumps(data), ex=LLM_REC_CACHE_TTL_SECONDS)
+    """Synchronous variant of `invalidate_movie_documents`."""
+    if movie_ids:
+        pipe = redis_client.pipeline()
+        _queue_movie_document_invalidation(pipe, movie_ids)
+        pipe.execute()
+
+
+def _queue_invalidation(pipe, namespace: str, keys: List[Any]):
+    """Tells every API process to drop `keys` from its `namespace` cache."""
+    message = {"namespace": namespace, "keys": [str(key) for key in keys]}
+    pipe.publish(CACHE_INVALIDATION_CHANNEL, json.dumps(message))
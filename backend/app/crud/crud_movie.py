@@ -1,21 +1,31 @@
-from typing import Any, Dict, List, Set, Callable
-from sqlalchemy import select, or_, and_, text, case
+from typing import Any, Dict, List, Set, Callable, Tuple
+from collections import OrderedDict
+from functools import lru_cache
+import enum
+import io
+from sqlalchemy import select, and_, text, case, values, column, Integer, String
 import uuid
 import json
 from neo4j import Driver
 from sqlalchemy import insert, func
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.future import select
+import redis.asyncio as redis
+import redis as sync_redis
 
 from ..models.movie import Movie, MovieVisibility
 from app.models.processing_queue import ProcessingQueue, TriggerSource
 from app.schemas.movie import MovieSearchResult
 from app.schemas.recommendation import LLMRecResult
+from app.utils.titles import normalize_title, translation_table
 from sqlalchemy.orm import Session
 from datetime import datetime
 import time
-from app.crud import crud_processing_queue
+from app.crud import crud_cache, crud_processing_queue
+from app.core.redis import redis_pool, sync_get_redis_client
 import random
 from workers.celery_config import celery_app
 
@@ -24,12 +34,37 @@ def chunker(seq, size):
     return (seq[pos : pos + size] for pos in range(0, len(seq), size))
 
 
+MOVIE_DOC_INVALIDATION_BATCH_SIZE = 1000
+
+
+async def _invalidate_movie_documents(movies: List[Dict[str, Any]]):
+    """Drops the cached GET /movies/{id} responses of written movies."""
+    movie_ids = [movie["id"] for movie in movies]
+    try:
+        async with redis.Redis(connection_pool=redis_pool) as redis_client:
+            for batch in chunker(movie_ids, MOVIE_DOC_INVALIDATION_BATCH_SIZE):
+                await crud_cache.invalidate_movie_documents(redis_client, batch)
+    except redis.RedisError as e:
+        print(f"Could not invalidate cached movie documents: {e}")
+
+
+def _sync_invalidate_movie_documents(movies: List[Dict[str, Any]]):
+    """Synchronous variant of `_invalidate_movie_documents`."""
+    movie_ids = [movie["id"] for movie in movies]
+    try:
+        with sync_get_redis_client() as redis_client:
+            for batch in chunker(movie_ids, MOVIE_DOC_INVALIDATION_BATCH_SIZE):
+                crud_cache.sync_invalidate_movie_documents(redis_client, batch)
+    except sync_redis.RedisError as e:
+        print(f"Could not invalidate cached movie documents: {e}")
+
+
 async def get_existing_movie_ids(db: AsyncSession) -> Set[int]:
     result = await db.execute(select(Movie.id))
     return {id_tuple[0] for id_tuple in result.all()}
 
 
-def bulk_create_movies(db: Session, movies: List[Dict[str, Any]]):
+async def bulk_create_movies(db: AsyncSession, movies: List[Dict[str, Any]]):
     if not movies:
         return
 
@@ -40,12 +75,12 @@ def bulk_create_movies(db: Session, movies: List[Dict[str, Any]]):
         try:
             stmt = insert(Movie.__table__).values(movie_batch)
             stmt = stmt.on_conflict_do_nothing(index_elements=["id"])
-            db.execute(stmt)
-            db.commit()
+            await db.execute(stmt)
+            await db.commit()
         except Exception as e:
             with open("error_log.txt", "a") as error_file:
                 error_file.write(f"Error during bulk create: {e}\n")
-            db.rollback()
+            await db.rollback()
             print(f"Error during batch {i+1}: {e}")
             raise
 
@@ -66,7 +101,12 @@ async def bulk_upsert_movies(db: AsyncSession, movies: List[Dict[str, Any]]):
         try:
             stmt = insert(Movie.__table__).values(movie_batch)
 
-            update_dict = {c.name: c for c in stmt.excluded if c.name != "id"}
+            # Generated columns (normalized_title) cannot be assigned.
+            update_dict = {
+                c.name: stmt.excluded[c.name]
+                for c in Movie.__table__.columns
+                if c.name != "id" and c.computed is None
+            }
 
             upsert_stmt = stmt.on_conflict_do_update(
                 index_elements=["id"], set_=update_dict
@@ -74,111 +114,326 @@ async def bulk_upsert_movies(db: AsyncSession, movies: List[Dict[str, Any]]):
 
             await db.execute(upsert_stmt)
             await db.commit()
+            await _invalidate_movie_documents(movie_batch)
         except Exception as e:
             with open("error_log.txt", "a") as error_file:
                 error_file.write(f"Error during bulk upsert: {e}\n")
             await db.rollback()
 
 
-async def bulk_patch_movies(db: AsyncSession, movies_data: List[Dict[str, Any]]):
+PATCH_BATCH_SIZE = 1000
+
+
+@lru_cache(maxsize=256)
+def _column_signature(keys: frozenset) -> Tuple[str, ...]:
+    # Table order, so the same set of keys always maps to the same signature.
+    return tuple(c.name for c in Movie.__table__.columns if c.name in keys)
+
+
+def _group_by_columns(
+    movies: List[Dict[str, Any]],
+) -> Dict[Tuple[str, ...], List[Dict[str, Any]]]:
+    """
+    Groups records by the set of movie columns they provide, keeping only
+    those columns, so a record never patches a column it did not include.
+    """
+    groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for movie in movies:
+        if "id" not in movie:
+            raise ValueError("Every movie record must contain the 'id' key.")
+        signature = _column_signature(frozenset(movie))
+        groups.setdefault(signature, []).append({c: movie[c] for c in signature})
+    return groups
+
+
+@lru_cache(maxsize=256)
+def _patch_statement(columns: Tuple[str, ...]):
+    """
+    One statement per column signature. It carries no values, so executing
+    it with a list of records runs as an executemany (batched by
+    SQLAlchemy's insertmanyvalues) and its compiled form is reused.
+    """
+    stmt = insert(Movie.__table__)
+    update_dict = {c: stmt.excluded[c] for c in columns if c != "id"}
+    # On conflict (i.e., the movie 'id' exists), update only the specified fields.
+    return stmt.on_conflict_do_update(index_elements=["id"], set_=update_dict)
+
+
+def _log_patch_failure(e: Exception, movie: Dict[str, Any]):
+    print(f"Error during bulk patch of movie {movie['id']}: {e}")
+    with open("patch_error_log.txt", "a") as error_file:
+        error_file.write(f"Error: {e}\nMovie Data: {movie}\n\n")
+
+
+async def _patch_rows(
+    db: AsyncSession, stmt, rows: List[Dict[str, Any]], failed: List[Dict[str, Any]]
+):
+    """
+    Writes the rows in one executemany. If that fails, the rows are split in
+    half and retried until the offending rows are isolated and logged.
+    """
+    try:
+        await db.execute(stmt, rows)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        if len(rows) == 1:
+            _log_patch_failure(e, rows[0])
+            failed.append(rows[0])
+            return
+        middle = len(rows) // 2
+        await _patch_rows(db, stmt, rows[:middle], failed)
+        await _patch_rows(db, stmt, rows[middle:], failed)
+
+
+def _sync_patch_rows(
+    db: Session, stmt, rows: List[Dict[str, Any]], failed: List[Dict[str, Any]]
+):
+    """Synchronous variant of `_patch_rows`."""
+    try:
+        db.execute(stmt, rows)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        if len(rows) == 1:
+            _log_patch_failure(e, rows[0])
+            failed.append(rows[0])
+            return
+        middle = len(rows) // 2
+        _sync_patch_rows(db, stmt, rows[:middle], failed)
+        _sync_patch_rows(db, stmt, rows[middle:], failed)
+
+
+async def bulk_patch_movies(
+    db: AsyncSession, movies_data: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
     """
     Performs a general-purpose bulk "PATCH" on the movies table.
 
     For each dictionary in the list, it updates only the fields provided.
     Each dictionary MUST contain the 'id' key for matching. Other columns
     in the table that are not present in the dictionary will be ignored and
-    left untouched in the database.
+    left untouched in the database. Dictionaries may provide different
+    columns; they are grouped by column set and each group is patched with
+    its own cached statement.
 
     Args:
         db: The AsyncSession for database interaction.
         movies_data: A list of dictionaries, where each dictionary represents
                      a movie to patch. e.g., [{"id": 1, "ai_keywords": [...]}]
+
+    Returns:
+        The records that failed to write (empty on success).
     """
     if not movies_data:
-        return
+        return []
 
-    BATCH_SIZE = 1000
+    failed_records: List[Dict[str, Any]] = []
 
     print(f"Starting bulk patch for {len(movies_data)} records...")
-    for i, movie_batch in enumerate(chunker(movies_data, BATCH_SIZE)):
-        if not movie_batch:
+    for columns, rows in _group_by_columns(movies_data).items():
+        if columns == ("id",):
+            print(f"Skipping {len(rows)} records with no fields other than 'id'.")
             continue
 
-        print(f"Processing batch {i+1} with {len(movie_batch)} movies...")
-        try:
-            stmt = insert(Movie.__table__).values(movie_batch)
+        print(f"Patching {len(rows)} movies with columns {', '.join(columns)}...")
+        stmt = _patch_statement(columns)
+        for movie_batch in chunker(rows, PATCH_BATCH_SIZE):
+            await _patch_rows(db, stmt, movie_batch, failed_records)
+        await _invalidate_movie_documents(rows)
 
-            update_dict = {
-                c.name: c
-                for c in stmt.excluded
-                if c.name in movie_batch[0] and c.name != "id"
-            }
+    print(f"Bulk patch process completed with {len(failed_records)} failures.")
+    return failed_records
 
-            if not update_dict:
-                print(f"Batch {i+1} had no fields to update other than 'id'. Skipping.")
-                continue
 
-            # On conflict (i.e., the movie 'id' exists), update only the specified fields.
-            patch_stmt = stmt.on_conflict_do_update(
-                index_elements=["id"], set_=update_dict
-            )
+def sync_bulk_patch_movies(
+    db: Session, movies_data: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Synchronous variant of `bulk_patch_movies`."""
+    if not movies_data:
+        return []
 
-            await db.execute(patch_stmt)
-            await db.commit()
-            print(f"Successfully patched batch {i+1}.")
+    failed_records: List[Dict[str, Any]] = []
 
-        except Exception as e:
-            print(f"Error during bulk patch on batch {i+1}: {e}")
+    print(f"Starting bulk patch for {len(movies_data)} records...")
+    for columns, rows in _group_by_columns(movies_data).items():
+        if columns == ("id",):
+            print(f"Skipping {len(rows)} records with no fields other than 'id'.")
+            continue
 
-            await db.rollback()
-            with open("patch_error_log.txt", "a") as error_file:
-                error_file.write(f"Error: {e}\nBatch Data: {movie_batch}\n\n")
+        print(f"Patching {len(rows)} movies with columns {', '.join(columns)}...")
+        stmt = _patch_statement(columns)
+        for movie_batch in chunker(rows, PATCH_BATCH_SIZE):
+            _sync_patch_rows(db, stmt, movie_batch, failed_records)
+        _sync_invalidate_movie_documents(rows)
 
-    print("Bulk patch process completed.")
+    print(f"Bulk patch process completed with {len(failed_records)} failures.")
+    return failed_records
 
 
-def sync_bulk_patch_movies(db: Session, movies_data: List[Dict[str, Any]]):
-    if not movies_data:
-        return
+# COPY-based bulk loading. Rows are streamed into a temporary staging table
+# (temp tables are never WAL-logged) and merged into `movies` with a single
+# statement, which avoids compiling huge multi-row VALUES statements.
+COPY_MERGE_MODES = ("insert", "upsert", "update")
+JSON_COLUMNS = {
+    c.name for c in Movie.__table__.columns if isinstance(c.type, (JSON, JSONB))
+}
 
-    BATCH_SIZE = 1000
 
-    print(f"Starting bulk patch for {len(movies_data)} records...")
-    for i, movie_batch in enumerate(chunker(movies_data, BATCH_SIZE)):
-        if not movie_batch:
-            continue
+def _copy_value(column: str, value: Any) -> Any:
+    if value is None:
+        return None
+    if column in JSON_COLUMNS:
+        return json.dumps(value, default=str)
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
 
-        print(f"Processing batch {i+1} with {len(movie_batch)} movies...")
-        try:
-            stmt = insert(Movie.__table__).values(movie_batch)
 
-            update_dict = {
-                c.name: c
-                for c in stmt.excluded
-                if c.name in movie_batch[0] and c.name != "id"
-            }
+def _staging_table_sql(staging_table: str) -> str:
+    return (
+        f"CREATE TEMP TABLE {staging_table} "
+        "(LIKE movies INCLUDING DEFAULTS) ON COMMIT DROP"
+    )
 
-            if not update_dict:
-                print(f"Batch {i+1} had no fields to update other than 'id'. Skipping.")
-                continue
 
-            # On conflict (i.e., the movie 'id' exists), update only the specified fields.
-            patch_stmt = stmt.on_conflict_do_update(
-                index_elements=["id"], set_=update_dict
-            )
+def _merge_sql(staging_table: str, columns: Tuple[str, ...], mode: str) -> str:
+    if mode not in COPY_MERGE_MODES:
+        raise ValueError(f"Unknown merge mode '{mode}'.")
+    column_list = ", ".join(f'"{c}"' for c in columns)
+    updated = [c for c in columns if c != "id"]
 
-            db.execute(patch_stmt)
-            db.commit()
-            print(f"Successfully patched batch {i+1}.")
+    if mode == "update":
+        if not updated:
+            return "SELECT 1"
+        assignments = ", ".join(f'"{c}" = s."{c}"' for c in updated)
+        return (
+            f"UPDATE movies AS m SET {assignments} "
+            f"FROM {staging_table} AS s WHERE m.id = s.id"
+        )
 
-        except Exception as e:
-            print(f"Error during bulk patch on batch {i+1}: {e}")
+    # DISTINCT ON keeps ON CONFLICT from touching the same row twice.
+    merge = (
+        f"INSERT INTO movies ({column_list}) "
+        f"SELECT DISTINCT ON (id) {column_list} FROM {staging_table} "
+        "ORDER BY id ON CONFLICT (id) "
+    )
+    if mode == "insert" or not updated:
+        return merge + "DO NOTHING"
+    assignments = ", ".join(f'"{c}" = EXCLUDED."{c}"' for c in updated)
+    return merge + f"DO UPDATE SET {assignments}"
+
+
+def _log_copy_error(e: Exception, movies: List[Dict[str, Any]]):
+    print(f"Error during COPY bulk load of {len(movies)} movies: {e}")
+    with open("patch_error_log.txt", "a") as error_file:
+        error_file.write(f"Error: {e}\nBatch Data: {movies}\n\n")
+
+
+def _copy_text_field(value: Any) -> str:
+    # Postgres COPY text format: \N is NULL, and backslash, tab and newlines
+    # are backslash-escaped.
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        value = "t" if value else "f"
+    elif isinstance(value, (list, tuple)) or hasattr(value, "tolist"):
+        value = "[" + ",".join(str(float(v)) for v in value) + "]"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
 
-            db.rollback()
-            with open("patch_error_log.txt", "a") as error_file:
-                error_file.write(f"Error: {e}\nBatch Data: {movie_batch}\n\n")
 
-    print("Bulk patch process completed.")
+def _copy_text_buffer(
+    columns: Tuple[str, ...], movies: List[Dict[str, Any]]
+) -> io.StringIO:
+    buffer = io.StringIO()
+    for movie in movies:
+        fields = (_copy_text_field(_copy_value(c, movie[c])) for c in columns)
+        buffer.write("\t".join(fields) + "\n")
+    buffer.seek(0)
+    return buffer
+
+
+async def copy_merge_movies(
+    db: AsyncSession, movies: List[Dict[str, Any]], mode: str = "upsert"
+) -> List[Dict[str, Any]]:
+    """
+    COPY-based alternative to the bulk writers above, for asyncpg sessions.
+
+    The rows are streamed with asyncpg's text COPY (embeddings as pgvector
+    literals, so the pooled connection needs no vector codec) into a staging
+    table and merged into `movies` in one go:
+    "insert" skips existing ids, "upsert" inserts or patches the provided
+    columns, and "update" only patches rows that already exist.
+    The load is committed as a single transaction.
+
+    Returns:
+        The records that failed to load: all of them or none.
+    """
+    if not movies:
+        return []
+
+    try:
+        connection = await db.connection()
+        raw_connection = await connection.get_raw_connection()
+        asyncpg_connection = raw_connection.driver_connection
+
+        # Records with different column sets get their own staging table.
+        for columns, rows in _group_by_columns(movies).items():
+            staging_table = f"movies_staging_{uuid.uuid4().hex[:12]}"
+            buffer = _copy_text_buffer(columns, rows)
+            await db.execute(text(_staging_table_sql(staging_table)))
+            await asyncpg_connection.copy_to_table(
+                staging_table,
+                source=io.BytesIO(buffer.getvalue().encode()),
+                columns=list(columns),
+                format="text",
+            )
+            await db.execute(text(_merge_sql(staging_table, columns, mode)))
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        _log_copy_error(e, movies)
+        return movies
+    if mode != "insert":
+        await _invalidate_movie_documents(movies)
+    return []
+
+
+def sync_copy_merge_movies(
+    db: Session, movies: List[Dict[str, Any]], mode: str = "upsert"
+) -> List[Dict[str, Any]]:
+    """
+    Synchronous variant of `copy_merge_movies` for psycopg2 sessions.
+    """
+    if not movies:
+        return []
+
+    try:
+        psycopg_connection = db.connection().connection.driver_connection
+        for columns, rows in _group_by_columns(movies).items():
+            staging_table = f"movies_staging_{uuid.uuid4().hex[:12]}"
+            column_list = ", ".join(f'"{c}"' for c in columns)
+            db.execute(text(_staging_table_sql(staging_table)))
+            with psycopg_connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY {staging_table} ({column_list}) FROM STDIN",
+                    _copy_text_buffer(columns, rows),
+                )
+            db.execute(text(_merge_sql(staging_table, columns, mode)))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        _log_copy_error(e, movies)
+        return movies
+    if mode != "insert":
+        _sync_invalidate_movie_documents(movies)
+    return []
 
 
 async def get_movie_by_id(db: AsyncSession, movie_id: int) -> Movie | None:
@@ -274,19 +529,85 @@ async def get_all_movie_ids(db_session_factory: Callable[[], AsyncSession]) -> S
         return {row[0] for row in result.all()}
 
 
-chars_to_remove = "·'.-" + '"' + "!@#$%^&*()_+=[]{}|;<>?,/\\`~"
-translation_table = str.maketrans("", "", chars_to_remove)
+# (normalized title, year the LLM gave) -> movie id, for titles resolved
+# before. Misses are not remembered, the movie may be ingested later.
+TITLE_ID_CACHE_SIZE = 50_000
+_title_id_cache: "OrderedDict[Tuple[str, int], int]" = OrderedDict()
+
 
+def _remember_title(key: Tuple[str, int], movie_id: int):
+    _title_id_cache[key] = movie_id
+    _title_id_cache.move_to_end(key)
+    if len(_title_id_cache) > TITLE_ID_CACHE_SIZE:
+        _title_id_cache.popitem(last=False)
 
-def enrich_recommendations_with_db_data(
-    db: Session, parsed_recs: Dict[str, List[Dict[str, Any]]]
+
+async def resolve_titles(
+    db: AsyncSession, keys: List[Tuple[str, int]]
+) -> Dict[Tuple[str, int], Movie]:
+    """
+    Resolves (normalized title, release year) pairs to movies. Known titles
+    are fetched by primary key, the rest with a single `VALUES` join on the
+    `(normalized_title, release_year)` index, tolerating a release year off
+    by one (the closest year, then the most voted movie wins).
+    """
+    resolved = {}
+    cached_ids = {key: _title_id_cache[key] for key in keys if key in _title_id_cache}
+    if cached_ids:
+        query = select(Movie).where(Movie.id.in_(set(cached_ids.values())))
+        result = await db.execute(query)
+        movies_by_id = {movie.id: movie for movie in result.scalars()}
+        for key, movie_id in cached_ids.items():
+            if movie_id in movies_by_id:
+                resolved[key] = movies_by_id[movie_id]
+                _title_id_cache.move_to_end(key)
+            else:
+                del _title_id_cache[key]
+
+    misses = [key for key in dict.fromkeys(keys) if key not in resolved]
+    if not misses:
+        return resolved
+
+    lookup = values(
+        column("idx", Integer),
+        column("normalized_title", String),
+        column("release_year", Integer),
+        name="lookup",
+    ).data([(idx, title, year) for idx, (title, year) in enumerate(misses)])
+    query = (
+        select(lookup.c.idx, Movie)
+        .join(
+            Movie,
+            and_(
+                Movie.normalized_title == lookup.c.normalized_title,
+                Movie.release_year.between(
+                    lookup.c.release_year - 1, lookup.c.release_year + 1
+                ),
+            ),
+        )
+        .order_by(
+            lookup.c.idx,
+            func.abs(Movie.release_year - lookup.c.release_year),
+            Movie.vote_count.desc().nulls_last(),
+        )
+    )
+    for idx, movie in await db.execute(query):
+        # Rows come best match first for every title.
+        if misses[idx] not in resolved:
+            resolved[misses[idx]] = movie
+            _remember_title(misses[idx], movie.id)
+    return resolved
+
+
+async def enrich_recommendations_with_db_data(
+    db: AsyncSession, parsed_recs: Dict[str, List[Dict[str, Any]]]
 ) -> Dict[str, Any]:
     """
     Takes a list of recommendations parsed from an LLM and enriches them
     with structured data from our PostgreSQL database.
 
     Args:
-        db: The SQLAlchemy session.
+        db: The async SQLAlchemy session.
         parsed_recs: A Dict[List], e.g.,
                     {movies:[{'movie_title': 'The Prestige', 'release_year': 2006, ...}, ...]}
 
@@ -296,25 +617,18 @@ def enrich_recommendations_with_db_data(
     if not parsed_recs and not parsed_recs.get("movies"):
         return []
 
-    search_conditions = []
+    lookup_keys = []
     for rec in parsed_recs.get("movies", []):
         title = rec.get("movie_title")
         year = rec.get("release_year")
 
         if title and isinstance(title, str) and year and isinstance(year, int):
-            condition = and_(Movie.title.ilike(title), Movie.release_year == year)
-            search_conditions.append(condition)
+            lookup_keys.append((normalize_title(title), year))
 
-    if not search_conditions:
+    if not lookup_keys:
         return []
 
-    query = select(Movie).where(or_(*search_conditions))
-    result = db.execute(query)
-    db_movies = result.scalars().all()
-
-    db_movie_map = {
-        (movie.title.lower(), movie.release_year): movie for movie in db_movies
-    }
+    db_movie_map = await resolve_titles(db, lookup_keys)
 
     final_results = []
     movies_to_process = []
@@ -326,7 +640,11 @@ def enrich_recommendations_with_db_data(
         if not (title and year):
             continue
 
-        matched_movie = db_movie_map.get((title.lower(), year))
+        matched_movie = (
+            db_movie_map.get((normalize_title(title), year))
+            if isinstance(title, str)
+            else None
+        )
 
         if matched_movie:
             justification_keywords = rec.get("justification_keywords", [])
@@ -343,7 +661,9 @@ def enrich_recommendations_with_db_data(
                 justification=justification_keywords,
                 ai_score=rec.get("similarity_score", 0.0),
             )
-            final_results.append(final_object.model_dump())
+            # model_dump() encrypts the id; keep the raw one, it is stored
+            # as the recommended movie id and encrypted again when served.
+            final_results.append({**final_object.model_dump(), "id": matched_movie.id})
         else:
             properties = {
                 k: v for k, v in rec.items() if k not in ["movie_title", "release_year"]
@@ -359,7 +679,7 @@ def enrich_recommendations_with_db_data(
 
     print("done with enrichment")
     if movies_to_process:
-        crud_processing_queue.bulk_create_process(db, movies_to_process)
+        await crud_processing_queue.bulk_create_process(db, movies_to_process)
         celery_app.send_task(
             "tasks.ingest_recommended_movies",
             queue="ingestion_queue",
@@ -370,7 +690,7 @@ def enrich_recommendations_with_db_data(
                 {"id": movie_id, "additional_keywords": keywords}
                 for movie_id, keywords in additional_keywords.items()
             ]
-            update_additional_keywords(db, data)
+            await update_additional_keywords(db, data)
         except Exception as e:
             print(f"Error during bulk patch of additional keywords: {e}")
     return final_results
@@ -491,28 +811,80 @@ def create_query_description(title, overview, genres, ai_keywords, selected_keyw
     return " ".join(description_parts)
 
 
-def update_additional_keywords(db: Session, data: List[Dict[str, Any]]) -> None:
+# Upper bound on `additional_keywords` per movie; the earliest ones are kept,
+# so keywords already baked into an embedding stay.
+ADDITIONAL_KEYWORDS_LIMIT = 30
 
-    if data:
-        values = ", ".join(
-            f"({item['id']}, '{json.dumps(item['additional_keywords'])}'::jsonb)"
-            for item in data
-        )
+# Merges new keywords into the stored array: trimmed, de-duplicated
+# case-insensitively (first spelling wins) and capped. Rows whose array would
+# not change are left untouched.
+_MERGE_ADDITIONAL_KEYWORDS_SQL = text(
+    """
+    UPDATE movies AS t
+    SET additional_keywords = merged.keywords
+    FROM jsonb_to_recordset(CAST(:data AS jsonb)) AS v(id int, new_keywords jsonb)
+    JOIN movies AS cur ON cur.id = v.id
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(jsonb_agg(kept.kw ORDER BY kept.ord), '[]'::jsonb) AS keywords
+        FROM (
+            SELECT deduped.kw, deduped.ord
+            FROM (
+                SELECT DISTINCT ON (lower(btrim(e.kw))) btrim(e.kw) AS kw, e.ord
+                FROM jsonb_array_elements_text(
+                    COALESCE(cur.additional_keywords, '[]'::jsonb)
+                    || COALESCE(v.new_keywords, '[]'::jsonb)
+                ) WITH ORDINALITY AS e(kw, ord)
+                WHERE btrim(e.kw) <> ''
+                ORDER BY lower(btrim(e.kw)), e.ord
+            ) AS deduped
+            ORDER BY deduped.ord
+            LIMIT :limit
+        ) AS kept
+    ) AS merged
+    WHERE t.id = v.id
+      AND merged.keywords IS DISTINCT FROM t.additional_keywords
+    """
+)
 
-        # Construct the update query
-        update_query = text(
-            f"""
-            UPDATE movies AS t
-            SET additional_keywords = COALESCE(t.additional_keywords, '[]'::jsonb) || v.new_keywords
-            FROM (VALUES {values}) AS v(id, new_keywords)
-            WHERE t.id = v.id
-        """
-        )
 
-        db.execute(update_query)
-        db.commit()
+def _additional_keywords_params(data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    payload = [
+        {"id": item["id"], "new_keywords": item["additional_keywords"] or []}
+        for item in data
+    ]
+    return {"data": json.dumps(payload), "limit": ADDITIONAL_KEYWORDS_LIMIT}
+
+
+async def update_additional_keywords(
+    db: AsyncSession, data: List[Dict[str, Any]]
+) -> int:
+    """
+    Merges `additional_keywords` into the stored arrays with set semantics.
+    Passing an empty list for a movie compacts its existing array.
+    Returns the number of rows changed.
+    """
+    if not data:
+        return 0
+
+    result = await db.execute(
+        _MERGE_ADDITIONAL_KEYWORDS_SQL, _additional_keywords_params(data)
+    )
+    await db.commit()
+    await _invalidate_movie_documents(data)
+    return result.rowcount
 
-    db.close()
+
+def sync_update_additional_keywords(db: Session, data: List[Dict[str, Any]]) -> int:
+    """Synchronous version of `update_additional_keywords`, for scripts."""
+    if not data:
+        return 0
+
+    result = db.execute(
+        _MERGE_ADDITIONAL_KEYWORDS_SQL, _additional_keywords_params(data)
+    )
+    db.commit()
+    _sync_invalidate_movie_documents(data)
+    return result.rowcount
 
 
 import re
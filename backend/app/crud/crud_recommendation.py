@@ -1,14 +1,14 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
-from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from typing import List, Dict, Any, Optional, Set, Tuple
 
-from ..models.recommendation import LlmRecommendation
-from app.models.movie import Movie
+from ..models.recommendation import LlmRecommendation, LlmRecommendationSet
 from sqlalchemy.orm import Session
 
 
-def bulk_create_llm_recommendations(
-    db: Session, recommendations_data: List[Dict[str, Any]]
+async def bulk_create_llm_recommendations(
+    db: AsyncSession, recommendations_data: List[Dict[str, Any]]
 ) -> List[Dict[str, Any]]:
     """
     Inserts a list of new LLM recommendations into the database and returns
@@ -20,16 +20,45 @@ def bulk_create_llm_recommendations(
     new_recs = [LlmRecommendation(**data) for data in recommendations_data]
     db.add_all(new_recs)
 
-    db.flush(new_recs)
+    await db.flush(new_recs)
 
     for rec_obj, rec_data in zip(new_recs, recommendations_data):
         rec_data["id"] = rec_obj.id
 
-    db.commit()
+    await db.commit()
     return recommendations_data
 
 
-def is_recommendation(db: Session, movie_id_1: int, movie_id_2: int) -> bool:
+async def delete_recommendations_by_trigger_hash(
+    db: AsyncSession, trigger_hash: str
+):
+    """Removes the rows stored by a generation that is being started over."""
+    await db.execute(
+        delete(LlmRecommendation).where(
+            LlmRecommendation.trigger_keywords_hash == trigger_hash
+        )
+    )
+    await db.execute(
+        delete(LlmRecommendationSet).where(
+            LlmRecommendationSet.trigger_keywords_hash == trigger_hash
+        )
+    )
+    await db.commit()
+
+
+def get_stored_trigger_hashes(db: Session, trigger_hashes: List[str]) -> Set[str]:
+    """Returns which of the given trigger hashes already have stored results."""
+    if not trigger_hashes:
+        return set()
+    stmt = select(LlmRecommendationSet.trigger_keywords_hash).where(
+        LlmRecommendationSet.trigger_keywords_hash.in_(trigger_hashes)
+    )
+    return set(db.execute(stmt).scalars().all())
+
+
+async def is_recommendation(
+    db: AsyncSession, movie_id_1: int, movie_id_2: int
+) -> bool:
     if movie_id_1 == movie_id_2:
         return None
 
@@ -37,7 +66,7 @@ def is_recommendation(db: Session, movie_id_1: int, movie_id_2: int) -> bool:
         (LlmRecommendation.source_movie_id == movie_id_1)
         & (LlmRecommendation.recommended_movie_id == movie_id_2)
     )
-    result = db.execute(stmt)
+    result = await db.execute(stmt)
     return result.scalar_one_or_none()
 
 
@@ -51,8 +80,8 @@ async def get_recommendation_by_id(
     return result.scalar_one_or_none()
 
 
-def increment_recommendation_vote(
-    db: Session, rec_id: int
+async def increment_recommendation_vote(
+    db: AsyncSession, rec_id: int
 ) -> Optional[Tuple[int, int]]:
     """
     Atomically increments the vote count for a specific recommendation.
@@ -66,48 +95,50 @@ def increment_recommendation_vote(
             LlmRecommendation.source_movie_id, LlmRecommendation.recommended_movie_id
         )
     )
-    result = db.execute(stmt)
-    db.commit()
+    result = await db.execute(stmt)
+    await db.commit()
 
     updated_row = result.first()
     return updated_row if updated_row else None
 
 
-async def get_recommendations_by_trigger_hash(
+async def get_recommendation_set(
     db: AsyncSession, trigger_hash: str
-) -> List[Dict[str, Any]]:
+) -> Optional[LlmRecommendationSet]:
+    """Fetches the stored result list of a generation by its trigger hash."""
+    result = await db.execute(
+        select(LlmRecommendationSet).where(
+            LlmRecommendationSet.trigger_keywords_hash == trigger_hash
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+async def save_recommendation_set(
+    db: AsyncSession,
+    trigger_hash: str,
+    source_movie_id: int,
+    keywords: List[str],
+    results: List[Dict[str, Any]],
+):
     """
-    Fetches all recommendations for a given trigger hash and enriches them
-    with movie details for the frontend.
+    Stores the finished result list of a generation exactly as it is cached
+    in Redis, replacing the one of a previous attempt.
     """
-    stmt = (
-        select(
-            LlmRecommendation.id.label("recommendation_id"),
-            LlmRecommendation.llm_justification,
-            LlmRecommendation.llm_score,
-            Movie.id,
-            Movie.title,
-            Movie.release_year,
-            Movie.poster_path,
+    stmt = insert(LlmRecommendationSet).values(
+        trigger_keywords_hash=trigger_hash,
+        source_movie_id=source_movie_id,
+        keywords=keywords,
+        results=results,
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["trigger_keywords_hash"],
+            set_={
+                "keywords": stmt.excluded.keywords,
+                "results": stmt.excluded.results,
+                "created_at": func.now(),
+            },
         )
-        .join(Movie, LlmRecommendation.recommended_movie_id == Movie.id)
-        .where(LlmRecommendation.trigger_keywords_hash == trigger_hash)
-        .order_by(LlmRecommendation.llm_score.desc())
     )
-
-    result = await db.execute(stmt)
-    rows = result.all()
-
-    recommendations = [
-        {
-            "id": row.id,
-            "title": row.title,
-            "release_year": row.release_year,
-            "poster_path": row.poster_path,
-            "justification": row.llm_justification,
-            "score": row.llm_score,
-            "recommendation_id": row.recommendation_id,
-        }
-        for row in rows
-    ]
-    return recommendations
+    await db.commit()
@@ -1,12 +1,44 @@
-from typing import Tuple
+import enum
+from typing import Dict, List, Tuple
 
 import redis.asyncio as redis
-from neo4j import Driver
+from neo4j import AsyncDriver
 from app.models.vote_log import VoteLog, VoteType
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
 
 VOTE_COOLDOWN_SECONDS = 90 * 24 * 60 * 60
+DAILY_VOTE_WINDOW_SECONDS = 86400
+# Admitted votes wait here until the relay hands them to Celery.
+VOTE_STREAM_KEY = "votes:stream"
+VOTE_STREAM_GROUP = "vote_relay"
+VOTE_STREAM_MAXLEN = 100_000
+
+# Checks the pair cooldown and the daily cap, then records the vote and
+# queues it, all in one atomic step. Returns a `VoteAdmission` value.
+ADMIT_VOTE_SCRIPT = """
+if redis.call("exists", KEYS[1]) == 1 then
+    return 0
+end
+if tonumber(redis.call("get", KEYS[2]) or "0") >= tonumber(ARGV[2]) then
+    return -1
+end
+redis.call("set", KEYS[1], "voted", "EX", ARGV[1])
+if redis.call("incr", KEYS[2]) == 1 then
+    redis.call("expire", KEYS[2], ARGV[3])
+end
+redis.call(
+    "xadd", KEYS[3], "MAXLEN", "~", ARGV[4], "*",
+    "movie_id_1", ARGV[5], "movie_id_2", ARGV[6], "fingerprint", ARGV[7]
+)
+return 1
+"""
+
+
+class VoteAdmission(enum.Enum):
+    ACCEPTED = 1
+    DUPLICATE = 0
+    DAILY_LIMIT_REACHED = -1
 
 
 def _get_canonical_pair(movie_id_1: int, movie_id_2: int) -> Tuple[int, int]:
@@ -18,22 +50,97 @@ def _get_redis_key(fingerprint: str, movie_id_1: int, movie_id_2: int) -> str:
     return f"vote:{fingerprint}:{id1}:{id2}"
 
 
-async def can_user_vote(
-    redis_client: redis.Redis, fingerprint: str, movie_id_1: int, movie_id_2: int
-) -> bool:
-    key = _get_redis_key(fingerprint, movie_id_1, movie_id_2)
-    return await redis_client.get(key) is None
+def _get_daily_count_key(fingerprint_id: str) -> str:
+    """Creates a Redis key for the daily vote counter."""
+    return f"vote_count:daily:{fingerprint_id}"
 
 
-async def record_user_vote(
+async def admit_vote(
     redis_client: redis.Redis, fingerprint: str, movie_id_1: int, movie_id_2: int
-):
-    key = _get_redis_key(fingerprint, movie_id_1, movie_id_2)
-    await redis_client.set(key, "voted", ex=VOTE_COOLDOWN_SECONDS)
+) -> VoteAdmission:
+    """
+    Admits a vote in a single round trip. An accepted vote starts the
+    pair's cooldown, counts towards `MAX_VOTES_PER_DAY` and is appended to
+    the vote stream, so concurrent duplicates cannot slip through.
+    """
+    result = await redis_client.eval(
+        ADMIT_VOTE_SCRIPT,
+        3,
+        _get_redis_key(fingerprint, movie_id_1, movie_id_2),
+        _get_daily_count_key(fingerprint),
+        VOTE_STREAM_KEY,
+        VOTE_COOLDOWN_SECONDS,
+        settings.MAX_VOTES_PER_DAY,
+        DAILY_VOTE_WINDOW_SECONDS,
+        VOTE_STREAM_MAXLEN,
+        movie_id_1,
+        movie_id_2,
+        fingerprint,
+    )
+    return VoteAdmission(result)
+
+
+async def ensure_vote_stream_group(redis_client: redis.Redis):
+    """Creates the relay's consumer group (and the stream) if missing."""
+    try:
+        await redis_client.xgroup_create(
+            VOTE_STREAM_KEY, VOTE_STREAM_GROUP, id="0", mkstream=True
+        )
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+async def read_queued_votes(
+    redis_client: redis.Redis,
+    consumer: str,
+    count: int,
+    block_ms: int,
+    claim_idle_ms: int,
+) -> List[Tuple[str, Dict[str, str]]]:
+    """
+    Takes over votes another relay read but never acknowledged for
+    `claim_idle_ms`, then reads new ones, waiting up to `block_ms`.
+    """
+    # On Redis 6.2, pending entries that were trimmed or deleted are claimed
+    # as nil, id included. Claiming ids only and reading the entries after
+    # tells them apart: they can never be relayed, so they are acked.
+    claimed_ids = await redis_client.xautoclaim(
+        VOTE_STREAM_KEY,
+        VOTE_STREAM_GROUP,
+        consumer,
+        claim_idle_ms,
+        count=count,
+        justid=True,
+    )
+    if claimed_ids:
+        pipe = redis_client.pipeline()
+        for entry_id in claimed_ids:
+            pipe.xrange(VOTE_STREAM_KEY, entry_id, entry_id)
+        votes = [entry for entries in await pipe.execute() for entry in entries]
+        found = {entry_id for entry_id, _ in votes}
+        await ack_queued_votes(
+            redis_client,
+            [entry_id for entry_id in claimed_ids if entry_id not in found],
+        )
+        return votes
+    response = await redis_client.xreadgroup(
+        VOTE_STREAM_GROUP, consumer, {VOTE_STREAM_KEY: ">"}, count=count, block=block_ms
+    )
+    return [entry for _, entries in response or [] for entry in entries]
+
 
+async def ack_queued_votes(redis_client: redis.Redis, entry_ids: List[str]):
+    """Marks votes as handed off and drops them from the stream."""
+    if entry_ids:
+        pipe = redis_client.pipeline()
+        pipe.xack(VOTE_STREAM_KEY, VOTE_STREAM_GROUP, *entry_ids)
+        pipe.xdel(VOTE_STREAM_KEY, *entry_ids)
+        await pipe.execute()
 
-def process_similarity_vote_in_graph(
-    driver: Driver, movie_id_1: int, movie_id_2: int
+
+async def process_similarity_vote_in_graph(
+    driver: AsyncDriver, movie_id_1: int, movie_id_2: int
 ) -> bool:
     """
     Handles a vote for a similarity link. It creates the link if it doesn't
@@ -57,9 +164,9 @@ def process_similarity_vote_in_graph(
         r.ai_score AS ai_score,
         r.similarity_score AS similarity_score
     """
-    with driver.session() as session:
-        result = session.run(query, id1=movie_id_1, id2=movie_id_2)
-        current_scores = result.single()
+    async with driver.session() as session:
+        result = await session.run(query, id1=movie_id_1, id2=movie_id_2)
+        current_scores = await result.single()
 
         if not current_scores:
             return False
@@ -74,7 +181,7 @@ def process_similarity_vote_in_graph(
         MATCH (:Movie {tmdb_id: $id1})-[r:IS_SIMILAR_TO]-(:Movie {tmdb_id: $id2})
         SET r.effective_score = $score
         """
-        session.run(
+        await session.run(
             update_query, id1=movie_id_1, id2=movie_id_2, score=new_effective_score
         )
         return True
@@ -98,28 +205,3 @@ async def log_vote(
     )
     db.add(log_entry)
     await db.commit()
-
-
-def _get_daily_count_key(fingerprint_id: str) -> str:
-    """Creates a Redis key for the daily vote counter."""
-    return f"vote_count:daily:{fingerprint_id}"
-
-
-async def check_and_increment_daily_vote_count(
-    redis_client: redis.Redis, fingerprint_id: str
-) -> bool:
-    """
-    Atomically increments the daily vote counter for a fingerprint and checks if
-    it has exceeded the limit. Returns True if the vote is allowed, False otherwise.
-    """
-    key = _get_daily_count_key(fingerprint_id)
-
-    # Use a pipeline for an atomic transaction
-    pipe = redis_client.pipeline()
-    pipe.incr(key)
-    pipe.expire(key, 86400, nx=True)  # Set a 24h expiry only if the key is new
-    results = await pipe.execute()
-
-    current_count = results[0]
-
-    return current_count <= settings.MAX_VOTES_PER_DAY
@@ -1,10 +1,18 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from app.api.v1.routes import api_router
 from app.core.config import settings
 from app.core.graph import close_graph_connection, connect_to_graph
 from app.core.embedding_model import get_embedding_model
-from fastapi import FastAPI
+from app.core.tmdb_client import tmdb_client
+from app.services.trending import prefetch_trending_pages
+from app.services.rec_notifications import completion_notifier
+from app.services.cache_invalidation import invalidation_subscriber
+from app.services import cache_warmer
+from app.services.vote_relay import relay_votes
+from fastapi import FastAPI, status
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 
@@ -16,7 +24,19 @@ async def lifespan(app: FastAPI):
     """
     connect_to_graph()
     get_embedding_model()
+    trending_prefetcher = asyncio.create_task(prefetch_trending_pages())
+    completion_notifier.start()
+    invalidation_subscriber.start()
+    # Runs behind the readiness probe, the app already answers meanwhile.
+    cache_warmup = asyncio.create_task(cache_warmer.warm_caches())
+    vote_relay = asyncio.create_task(relay_votes())
     yield
+    cache_warmup.cancel()
+    vote_relay.cancel()
+    trending_prefetcher.cancel()
+    await completion_notifier.stop()
+    await invalidation_subscriber.stop()
+    await tmdb_client.aclose()
     close_graph_connection()
 
 
@@ -38,3 +58,14 @@ app.include_router(api_router, prefix="/api/v1")
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Movie Recommender API"}
+
+
+@app.get("/ready")
+def read_readiness():
+    """Readiness probe: healthy once the startup cache warmup is done."""
+    if not cache_warmer.is_ready():
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "warming"},
+        )
+    return {"status": "ready"}
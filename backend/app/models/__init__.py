@@ -1,6 +1,12 @@
 from .movie import Movie
 from .vote_log import VoteLog
-from .recommendation import LlmRecommendation
+from .recommendation import LlmRecommendation, LlmRecommendationSet
 from .processing_queue import ProcessingQueue
 
-__all__ = ["Movie", "VoteLog", "LlmRecommendation", "ProcessingQueue"]
+__all__ = [
+    "Movie",
+    "VoteLog",
+    "LlmRecommendation",
+    "LlmRecommendationSet",
+    "ProcessingQueue",
+]
@@ -1,9 +1,11 @@
 from app.core.database import Base
 from sqlalchemy import JSON, Column, Integer, String, Text, Date, Float, Boolean
+from sqlalchemy import Computed, Index
 from sqlalchemy.dialects.postgresql import JSONB, ENUM
 from pgvector.sqlalchemy import Vector
 from sqlalchemy import Enum
 import enum
+from app.utils.titles import NORMALIZED_TITLE_SQL
 
 
 class MovieVisibility(str, enum.Enum):
@@ -47,3 +49,9 @@ class Movie(Base):
     original_title = Column(String, nullable=True)
     runtime = Column(Integer, nullable=True)
     tagline = Column(String, nullable=True)
+    # Derived from `title` by Postgres, used to resolve LLM recommendations.
+    normalized_title = Column(String, Computed(NORMALIZED_TITLE_SQL, persisted=True))
+
+    __table_args__ = (
+        Index("idx_movies_normalized_title_year", "normalized_title", "release_year"),
+    )
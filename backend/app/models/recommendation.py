@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, JSON, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
 from app.core.database import Base
 
 
@@ -12,3 +14,19 @@ class LlmRecommendation(Base):
     llm_justification = Column(JSON, nullable=False)
     llm_score = Column(Float)
     user_votes = Column(Integer, default=0, nullable=False)
+
+
+class LlmRecommendationSet(Base):
+    """
+    The finished result list of one generation, in served order, so a warm
+    cache hit is a single primary key lookup instead of a join and sort.
+    """
+
+    __tablename__ = "llm_recommendation_sets"
+
+    trigger_keywords_hash = Column(String, primary_key=True)
+    source_movie_id = Column(Integer, ForeignKey("movies.id"), nullable=False)
+    # Canonical keyword selection, NULL for sets backfilled from old rows.
+    keywords = Column(JSONB, nullable=True)
+    results = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
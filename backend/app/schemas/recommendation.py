@@ -47,3 +47,19 @@ class RecResponse(BaseModel):
         ..., description="`complete` if from cache, `partial` if a fallback."
     )
     results: List[BaseRecResult]
+    generation: Optional[Literal["started", "pending", "unavailable"]] = Field(
+        None,
+        description="For `partial` responses, whether this request `started` "
+        "the LLM generation, one was already `pending` for the same request, "
+        "or the LLM is `unavailable` and the results are vector-only.",
+    )
+    similarity: Optional[float] = Field(
+        None,
+        description="Set when the results were generated for a similar keyword "
+        "selection: the Jaccard similarity of the two selections.",
+    )
+    trigger_hash: Optional[str] = Field(
+        None,
+        description="Set while a generation runs, its results can be streamed "
+        "from `/recommendations/{trigger_hash}/stream`.",
+    )
@@ -0,0 +1,86 @@
+import asyncio
+import json
+from typing import Callable, Dict, List, Optional
+
+import redis.asyncio as redis
+
+from app.core.redis import redis_pool
+from app.core.tmdb_client import tmdb_client
+from app.crud import crud_cache
+from app.services import movie_documents
+
+RECONNECT_DELAY_SECONDS = 1.0
+
+# Called with the keys to drop, or None to drop everything.
+Evictor = Callable[[Optional[List[str]]], None]
+
+
+class InvalidationSubscriber:
+    """
+    Applies invalidations published by writers to this process's caches.
+
+    Caches register an evictor per namespace. Pub/sub delivers at most
+    once, so after every (re)connect all registered caches are cleared in
+    full: messages sent while disconnected are lost.
+    """
+
+    def __init__(self):
+        self._evictors: Dict[str, Evictor] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    def register(self, namespace: str, evict: Evictor):
+        self._evictors[namespace] = evict
+
+    def start(self):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    def _evict(self, namespace: str, keys: Optional[List[str]]):
+        evict = self._evictors.get(namespace)
+        if evict is None:
+            return
+        try:
+            evict(keys)
+        except Exception as e:
+            print(f"Cache invalidation for {namespace} failed: {e}")
+
+    def _evict_all(self):
+        for namespace in self._evictors:
+            self._evict(namespace, None)
+
+    async def _listen(self):
+        while True:
+            try:
+                async with redis.Redis(connection_pool=redis_pool) as redis_client:
+                    pubsub = redis_client.pubsub()
+                    await pubsub.subscribe(crud_cache.CACHE_INVALIDATION_CHANNEL)
+                    try:
+                        self._evict_all()
+                        async for message in pubsub.listen():
+                            if message["type"] != "message":
+                                continue
+                            invalidation = json.loads(message["data"])
+                            self._evict(invalidation["namespace"], invalidation["keys"])
+                    finally:
+                        await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Cache invalidation listener failed: {e}")
+                await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+
+invalidation_subscriber = InvalidationSubscriber()
+invalidation_subscriber.register(crud_cache.MOVIE_DOC_NAMESPACE, movie_documents.evict)
+invalidation_subscriber.register(
+    crud_cache.GENRE_MAP_NAMESPACE, tmdb_client.invalidate_genre_map
+)
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.embedding_model import get_embedding_model
+from app.core.redis import redis_pool
+from app.crud import crud_cache, crud_movie
+from app.services import movie_documents, recommendation_store, trending
+from app.utils import trigger_keys
+
+_ready = False
+
+
+def is_ready() -> bool:
+    """Whether the warmup finished (or gave up) and traffic can be taken."""
+    return _ready
+
+
+async def _warm_trending_page(redis_client: redis.Redis, page: int):
+    if not await crud_cache.get_cached_trending_movies(redis_client, page):
+        await trending.get_or_fill_trending_page(redis_client, page)
+
+
+async def _warm_movie(redis_client: redis.Redis, movie_id: int):
+    """
+    Loads a movie's document into this process and Redis, and promotes its
+    most requested LLM results from the warm tier.
+    """
+    async with AsyncSessionLocal() as db:
+        await movie_documents.get_movie_document(db, redis_client, movie_id)
+        keyword_sets = await crud_cache.get_most_requested_keywords(
+            redis_client, movie_id, settings.CACHE_WARMUP_KEYWORD_SETS
+        )
+        for keywords, _ in keyword_sets:
+            trigger_hash = trigger_keys.build_trigger_hash(movie_id, keywords)
+            cached = await crud_cache.get_cached_llm_recommendation(
+                redis_client, crud_cache.get_llm_rec_cache_key(trigger_hash)
+            )
+            if not cached:
+                await recommendation_store.read_warm_tier(
+                    db, redis_client, trigger_hash
+                )
+
+
+async def _warm_default_neighbors(movie_id: int):
+    """
+    Runs the keyword-less vector search of a movie. Its results are not
+    cached, but the embedding model and the pgvector index pages are.
+    """
+    async with AsyncSessionLocal() as db:
+        movie = await crud_movie.get_movie_by_id(db, movie_id)
+        if movie is None:
+            return
+        query = crud_movie.create_query_description(
+            movie.title,
+            movie.overview,
+            [genre["name"] for genre in (movie.genres or [])],
+            list(
+                {trigger_keys.normalize_keyword(kw) for kw in movie.ai_keywords or []}
+            ),
+            [],
+        )
+        embedding = await asyncio.to_thread(
+            get_embedding_model().encode, query, convert_to_tensor=True
+        )
+        await crud_movie.vector_search(db, movie.id, embedding.tolist())
+
+
+async def _warm_embedding_model():
+    # The first inference is much slower than the following ones.
+    await asyncio.to_thread(get_embedding_model().encode, "warmup")
+
+
+async def warm_caches():
+    """
+    Prefills the caches the first requests after a deploy or a Redis
+    failover would all miss: trending pages, documents and LLM results of
+    the most requested movies, and the embedding model. At most
+    `CACHE_WARMUP_CONCURRENCY` steps run at once. Readiness is reported
+    once the warmup finished, failed or timed out.
+    """
+    global _ready
+    started = time.monotonic()
+    semaphore = asyncio.Semaphore(settings.CACHE_WARMUP_CONCURRENCY)
+
+    async def bounded(step: Callable[..., Awaitable[None]], *args: Any):
+        async with semaphore:
+            try:
+                await step(*args)
+            except Exception as e:
+                print(f"Cache warmup step failed: {e}")
+
+    try:
+        async with asyncio.timeout(settings.CACHE_WARMUP_TIMEOUT_SECONDS):
+            async with redis.Redis(connection_pool=redis_pool) as redis_client:
+                top_movies = await crud_cache.get_most_requested_movies(
+                    redis_client, settings.CACHE_WARMUP_TOP_MOVIES
+                )
+                movie_ids = [movie_id for movie_id, _ in top_movies]
+                steps = [bounded(_warm_embedding_model)]
+                steps += [
+                    bounded(_warm_trending_page, redis_client, page)
+                    for page in range(1, trending.TRENDING_PREFETCH_PAGES + 1)
+                ]
+                steps += [
+                    bounded(_warm_movie, redis_client, movie_id)
+                    for movie_id in movie_ids
+                ]
+                steps += [
+                    bounded(_warm_default_neighbors, movie_id)
+                    for movie_id in movie_ids[: settings.CACHE_WARMUP_NEIGHBOR_MOVIES]
+                ]
+                await asyncio.gather(*steps)
+        print(
+            f"Cache warmup finished in {time.monotonic() - started:.1f}s "
+            f"({len(movie_ids)} movies)."
+        )
+    except asyncio.TimeoutError:
+        print("Cache warmup timed out, serving traffic with a partial warm set.")
+    except Exception as e:
+        print(f"Cache warmup failed: {e}")
+    finally:
+        _ready = True
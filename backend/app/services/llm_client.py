@@ -1,4 +1,6 @@
-from typing import List, Dict, Any
+import asyncio
+import weakref
+from typing import AsyncIterator, Dict, List, Any, Optional
 from app.core.config import settings
 from pathlib import Path
 from google import genai
@@ -9,15 +11,58 @@ PROMPT_FILE = Path(__file__).parent / "rec_prompt.txt"
 with open(PROMPT_FILE, "r", encoding="utf-8") as f:
     PROMPT_TXT = f.read().strip()
 
+MODEL = "gemini-2.5-flash"
+TEMPERATURE = 0.25
+THINKING_BUDGET = 0
 
-def generate_recommendations(
-    movie: Dict[str, Any], selected_keywords: List[str]
-) -> None:
-    client = genai.Client(
-        api_key=settings.GEMINI_API_KEY,
-    )
+# Identical for every request, so it is built once.
+GENERATE_CONTENT_CONFIG = types.GenerateContentConfig(
+    temperature=TEMPERATURE,
+    thinking_config=types.ThinkingConfig(
+        thinking_budget=THINKING_BUDGET,
+    ),
+    system_instruction=[
+        types.Part.from_text(text=PROMPT_TXT),
+    ],
+    tools=[
+        types.Tool(googleSearch=types.GoogleSearch()),
+    ],
+)
+
+_client: Optional[genai.Client] = None
+# Event loop -> semaphore, since asyncio semaphores are bound to one loop.
+_semaphores = weakref.WeakKeyDictionary()
+# Marks the end of a response stream read by `_pump_stream`.
+_STREAM_END = object()
+
+
+def get_client() -> genai.Client:
+    """
+    The long-lived Gemini client. Its HTTP connections are pooled and reused
+    by every call in the process.
+    """
+    global _client
+    if _client is None:
+        _client = genai.Client(
+            api_key=settings.GEMINI_API_KEY,
+            http_options=types.HttpOptions(
+                timeout=int(settings.GEMINI_REQUEST_TIMEOUT_SECONDS * 1000)
+            ),
+        )
+    return _client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+        _semaphores[loop] = semaphore
+    return semaphore
 
-    USER_INPUT = f"""
+
+def build_user_prompt(movie: Any, selected_keywords: List[str]) -> str:
+    return f"""
     **Liked Movie:**
     `{movie.title} ({movie.release_date.year})`
 
@@ -28,33 +73,67 @@ def generate_recommendations(
     `{selected_keywords}`
     """
 
-    model = "gemini-2.5-flash"
-    contents = [
+
+def build_contents(movie: Any, selected_keywords: List[str]) -> List[types.Content]:
+    return [
         types.Content(
             role="user",
             parts=[
-                types.Part.from_text(text=USER_INPUT),
+                types.Part.from_text(text=build_user_prompt(movie, selected_keywords)),
             ],
         ),
     ]
-    tools = [
-        types.Tool(googleSearch=types.GoogleSearch()),
-    ]
-    generate_content_config = types.GenerateContentConfig(
-        temperature=0.25,
-        thinking_config=types.ThinkingConfig(
-            thinking_budget=0,
-        ),
-        system_instruction=[
-            types.Part.from_text(text=PROMPT_TXT),
-        ],
-        tools=tools,
-    )
 
-    response = client.models.generate_content(
-        model=model,
-        contents=contents,
-        config=generate_content_config,
+
+async def _pump_stream(
+    contents: List[types.Content],
+    chunks: asyncio.Queue,
+    usage: Optional[Dict[str, int]],
+):
+    """
+    Reads the Gemini response stream into `chunks` under the concurrency cap
+    and the deadline, then puts `_STREAM_END`, or the error that ended it.
+    """
+    try:
+        async with _get_semaphore():
+            async with asyncio.timeout(settings.GEMINI_REQUEST_TIMEOUT_SECONDS):
+                stream = await get_client().aio.models.generate_content_stream(
+                    model=MODEL,
+                    contents=contents,
+                    config=GENERATE_CONTENT_CONFIG,
+                )
+                async for chunk in stream:
+                    if usage is not None and chunk.usage_metadata:
+                        usage["total_tokens"] = chunk.usage_metadata.total_token_count
+                    if chunk.text:
+                        chunks.put_nowait(chunk.text)
+    except Exception as e:
+        chunks.put_nowait(e)
+    else:
+        chunks.put_nowait(_STREAM_END)
+
+
+async def astream_recommendations(
+    movie: Any, selected_keywords: List[str], usage: Optional[Dict[str, int]] = None
+) -> AsyncIterator[str]:
+    """
+    Asks Gemini for recommendations and yields the response text chunk by
+    chunk. At most `GEMINI_MAX_CONCURRENCY` calls are in flight per event
+    loop and each call has a hard deadline. The stream is read by a separate
+    task, so the deadline and the concurrency slot only cover the Gemini
+    call, not the caller's work between chunks. An expired deadline is
+    raised as `TimeoutError`. If `usage` is given, the reported token count
+    is stored in it under `total_tokens`.
+    """
+    chunks: asyncio.Queue = asyncio.Queue()
+    reader = asyncio.create_task(
+        _pump_stream(build_contents(movie, selected_keywords), chunks, usage)
     )
-    response_str = response.text
-    return response_str
+    try:
+        while (chunk := await chunks.get()) is not _STREAM_END:
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        reader.cancel()
+
@@ -0,0 +1,168 @@
+import logging
+import time
+from typing import Any, Dict
+
+import redis.asyncio as redis
+import redis as sync_redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes for Gemini work. With the Redis broker, Celery consumes
+# lower priorities first, so interactive work overtakes retries and retries
+# overtake background work waiting in `llm_queue`.
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+LANE_PRIORITIES = {INTERACTIVE: 0, BACKGROUND: 6}
+RETRY_PRIORITY = 3
+
+LLM_BUDGET_KEY_PREFIX = "llm_budget:"
+LLM_BUDGET_WINDOW_SECONDS = 60
+LLM_CIRCUIT_OPEN_KEY = "llm_circuit:open"
+LLM_CIRCUIT_FAILURES_KEY = "llm_circuit:failures"
+# Failures only count towards opening the circuit within this window.
+LLM_CIRCUIT_FAILURE_WINDOW_SECONDS = 120
+LLM_QUEUE_WAIT_KEY_PREFIX = "llm_queue_wait:"
+LLM_QUEUE_WAIT_TTL_SECONDS = 60 * 60 * 48
+
+
+def _get_budget_key(window: int) -> str:
+    return f"{LLM_BUDGET_KEY_PREFIX}{window}"
+
+
+def _current_window(now: float) -> int:
+    return int(now // LLM_BUDGET_WINDOW_SECONDS)
+
+
+def _lane_limit(lane: str) -> int:
+    """Background work may only use part of the budget, the rest is kept free."""
+    if lane == BACKGROUND:
+        return int(
+            settings.LLM_TOKENS_PER_MINUTE * settings.LLM_BACKGROUND_BUDGET_FRACTION
+        )
+    return settings.LLM_TOKENS_PER_MINUTE
+
+
+def sync_reserve_tokens(
+    redis_client: sync_redis.Redis, lane: str, tokens: int
+) -> float:
+    """
+    Reserves tokens in the current minute's budget, shared by every worker.
+    Returns 0 if they were reserved, otherwise the seconds until the next
+    window starts.
+    """
+    now = time.time()
+    budget_key = _get_budget_key(_current_window(now))
+    pipe = redis_client.pipeline()
+    pipe.incrby(budget_key, tokens)
+    pipe.expire(budget_key, LLM_BUDGET_WINDOW_SECONDS * 2)
+    used, _ = pipe.execute()
+    if used <= _lane_limit(lane):
+        return 0.0
+    redis_client.decrby(budget_key, tokens)
+    return LLM_BUDGET_WINDOW_SECONDS - now % LLM_BUDGET_WINDOW_SECONDS
+
+
+def sync_settle_tokens(redis_client: sync_redis.Redis, reserved: int, used: int):
+    """Corrects a reservation once the call reported its actual token usage."""
+    if used == reserved:
+        return
+    budget_key = _get_budget_key(_current_window(time.time()))
+    pipe = redis_client.pipeline()
+    pipe.incrby(budget_key, used - reserved)
+    pipe.expire(budget_key, LLM_BUDGET_WINDOW_SECONDS * 2)
+    pipe.execute()
+
+
+def sync_is_circuit_open(redis_client: sync_redis.Redis) -> bool:
+    return bool(redis_client.exists(LLM_CIRCUIT_OPEN_KEY))
+
+
+async def is_circuit_open(redis_client: redis.Redis) -> bool:
+    return bool(await redis_client.exists(LLM_CIRCUIT_OPEN_KEY))
+
+
+def sync_record_success(redis_client: sync_redis.Redis):
+    redis_client.delete(LLM_CIRCUIT_FAILURES_KEY)
+
+
+def sync_record_failure(redis_client: sync_redis.Redis) -> bool:
+    """
+    Counts a failed Gemini call and opens the circuit once
+    `LLM_CIRCUIT_FAILURE_THRESHOLD` calls failed in a row. Returns whether
+    the circuit is open now.
+    """
+    pipe = redis_client.pipeline()
+    pipe.incr(LLM_CIRCUIT_FAILURES_KEY)
+    pipe.expire(LLM_CIRCUIT_FAILURES_KEY, LLM_CIRCUIT_FAILURE_WINDOW_SECONDS)
+    failures, _ = pipe.execute()
+    if failures < settings.LLM_CIRCUIT_FAILURE_THRESHOLD:
+        return False
+
+    cooldown = settings.LLM_CIRCUIT_COOLDOWN_SECONDS
+    pipe = redis_client.pipeline()
+    pipe.set(LLM_CIRCUIT_OPEN_KEY, failures, ex=cooldown)
+    # Half-open after the cooldown: the first call goes through, and a
+    # single further failure opens the circuit again.
+    pipe.set(
+        LLM_CIRCUIT_FAILURES_KEY,
+        settings.LLM_CIRCUIT_FAILURE_THRESHOLD - 1,
+        ex=cooldown + LLM_CIRCUIT_FAILURE_WINDOW_SECONDS,
+    )
+    pipe.execute()
+    logger.warning(f"LLM circuit opened for {cooldown}s after {failures} failures.")
+    return True
+
+
+def _get_queue_wait_key(lane: str, hour: int) -> str:
+    return f"{LLM_QUEUE_WAIT_KEY_PREFIX}{lane}:{hour}"
+
+
+def sync_record_queue_wait(
+    redis_client: sync_redis.Redis, lane: str, wait_seconds: float
+):
+    """Adds a task's time from enqueue to start to the lane's hourly stats."""
+    queue_wait_key = _get_queue_wait_key(lane, int(time.time() // 3600))
+    pipe = redis_client.pipeline()
+    pipe.hincrby(queue_wait_key, "count", 1)
+    pipe.hincrbyfloat(queue_wait_key, "total_seconds", wait_seconds)
+    pipe.expire(queue_wait_key, LLM_QUEUE_WAIT_TTL_SECONDS)
+    pipe.execute()
+    logger.info(f"LLM task waited {wait_seconds:.1f}s in the {lane} lane.")
+
+
+async def get_scheduler_stats(redis_client: redis.Redis) -> Dict[str, Any]:
+    """Current budget use, circuit state and this hour's queue waits."""
+    now = time.time()
+    hour = int(now // 3600)
+    pipe = redis_client.pipeline()
+    pipe.get(_get_budget_key(_current_window(now)))
+    pipe.ttl(LLM_CIRCUIT_OPEN_KEY)
+    pipe.get(LLM_CIRCUIT_FAILURES_KEY)
+    for lane in LANE_PRIORITIES:
+        pipe.hgetall(_get_queue_wait_key(lane, hour))
+    budget_used, circuit_ttl, failures, *waits = await pipe.execute()
+
+    queue_wait = {}
+    for lane, wait in zip(LANE_PRIORITIES, waits):
+        count = int(wait.get("count", 0))
+        total_seconds = float(wait.get("total_seconds", 0.0))
+        queue_wait[lane] = {
+            "count": count,
+            "mean_seconds": total_seconds / count if count else 0.0,
+        }
+
+    return {
+        "budget": {
+            "used_tokens": int(budget_used or 0),
+            "limit_tokens": settings.LLM_TOKENS_PER_MINUTE,
+            "background_limit_tokens": _lane_limit(BACKGROUND),
+        },
+        "circuit": {
+            "open": circuit_ttl > 0,
+            "reopens_in_seconds": max(circuit_ttl, 0),
+            "recent_failures": int(failures or 0),
+        },
+        "queue_wait": queue_wait,
+    }
@@ -0,0 +1,87 @@
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import redis.asyncio as redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import schemas
+from app.crud import crud_cache, crud_movie
+from app.models.movie import Movie
+
+# Serialized GET /movies/{id} responses kept in this process, in front of
+# the Redis copy. Writers evict them through the invalidation channel, the
+# TTL only bounds staleness if an invalidation is lost.
+MOVIE_DOC_LOCAL_CACHE_SIZE = 10_000
+MOVIE_DOC_LOCAL_TTL_SECONDS = 60 * 10
+_local_documents: "OrderedDict[int, Tuple[float, bytes]]" = OrderedDict()
+
+
+def _get_local(movie_id: int) -> Optional[bytes]:
+    entry = _local_documents.get(movie_id)
+    if entry is None:
+        return None
+    expires_at, document = entry
+    if expires_at <= time.monotonic():
+        del _local_documents[movie_id]
+        return None
+    _local_documents.move_to_end(movie_id)
+    return document
+
+
+def _remember(movie_id: int, document: bytes):
+    _local_documents[movie_id] = (
+        time.monotonic() + MOVIE_DOC_LOCAL_TTL_SECONDS,
+        document,
+    )
+    _local_documents.move_to_end(movie_id)
+    if len(_local_documents) > MOVIE_DOC_LOCAL_CACHE_SIZE:
+        _local_documents.popitem(last=False)
+
+
+def evict(movie_ids: Optional[List[str]]):
+    """Drops the given movies from this process's cache, or all of them."""
+    if movie_ids is None:
+        _local_documents.clear()
+        return
+    for movie_id in movie_ids:
+        _local_documents.pop(int(movie_id), None)
+
+
+def render_movie_document(db_movie: Movie) -> bytes:
+    """Serializes a movie exactly as the `Movie` response model would."""
+    movie_data = dict(db_movie.__dict__)
+    movie_data["keywords"] = [
+        keyword.replace(".", "").capitalize() for keyword in db_movie.ai_keywords or []
+    ]
+    movie = schemas.movie.Movie.model_validate(movie_data)
+    return movie.model_dump_json(by_alias=True).encode()
+
+
+async def get_movie_document(
+    db: AsyncSession, redis_client: redis.Redis, movie_id: int
+) -> Optional[bytes]:
+    """
+    The response body for a movie, from this process, then Redis, then
+    Postgres. Returns None if the movie does not exist.
+    """
+    document = _get_local(movie_id)
+    if document is not None:
+        return document
+
+    document = await crud_cache.get_cached_movie_document(redis_client, movie_id)
+    if document is None:
+        version = await crud_cache.get_movie_document_version(redis_client, movie_id)
+        db_movie = await crud_movie.get_movie_by_id(db, movie_id)
+        if db_movie is None:
+            return None
+        document = render_movie_document(db_movie)
+        # A write landed since the row was read: serve this document once,
+        # but keep it out of both caches.
+        if not await crud_cache.cache_movie_document(
+            redis_client, movie_id, document, version
+        ):
+            return document
+
+    _remember(movie_id, document)
+    return document
@@ -0,0 +1,84 @@
+import asyncio
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Set
+
+import redis.asyncio as redis
+
+from app.core.redis import redis_pool
+from app.crud import crud_cache
+
+RECONNECT_DELAY_SECONDS = 1.0
+
+
+class CompletionNotifier:
+    """
+    Delivers "generation finished" notifications to waiting requests.
+
+    A single pattern subscription per process listens on every
+    `llm_rec_done:*` channel and resolves the futures of the requests
+    waiting for that trigger hash, so an idle waiter holds no Redis
+    connection of its own.
+    """
+
+    def __init__(self):
+        self._waiters: Dict[str, Set[asyncio.Future]] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    @contextmanager
+    def waiter(self, trigger_hash: str) -> Iterator[asyncio.Future]:
+        """
+        Registers interest in a trigger hash. Register before checking the
+        cache, so a result written in between is not missed.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(trigger_hash, set()).add(future)
+        try:
+            yield future
+        finally:
+            waiters = self._waiters.get(trigger_hash)
+            if waiters is not None:
+                waiters.discard(future)
+                if not waiters:
+                    del self._waiters[trigger_hash]
+
+    def _notify(self, trigger_hash: str, outcome: str):
+        for future in self._waiters.get(trigger_hash, ()):
+            if not future.done():
+                future.set_result(outcome)
+
+    async def _listen(self):
+        prefix = crud_cache.LLM_REC_DONE_CHANNEL_PREFIX
+        while True:
+            try:
+                async with redis.Redis(connection_pool=redis_pool) as redis_client:
+                    pubsub = redis_client.pubsub()
+                    await pubsub.psubscribe(f"{prefix}*")
+                    try:
+                        async for message in pubsub.listen():
+                            if message["type"] != "pmessage":
+                                continue
+                            trigger_hash = message["channel"][len(prefix) :]
+                            self._notify(trigger_hash, message["data"])
+                    finally:
+                        await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Recommendation notification listener failed: {e}")
+                await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+
+completion_notifier = CompletionNotifier()
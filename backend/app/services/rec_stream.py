@@ -0,0 +1,99 @@
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import redis.asyncio as redis
+
+from app import schemas
+from app.core.redis import redis_pool
+from app.crud import crud_cache
+
+# Clients are disconnected after this long, the cached result can be
+# fetched from the recommendations endpoint afterwards.
+LLM_REC_STREAM_TIMEOUT_SECONDS = 60 * 5
+# Comment lines keep proxies from closing an idle connection.
+LLM_REC_STREAM_HEARTBEAT_SECONDS = 15
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _relay(event: Dict[str, Any], last_seq: int) -> Tuple[Optional[str], int, bool]:
+    """
+    Turns a published generation event into an SSE message. Returns the
+    message (None for duplicates), the new last seen sequence number and
+    whether the stream is finished.
+    """
+    event_type = event.get("type")
+    if event_type == "reset":
+        # A retried generation starts numbering from scratch.
+        return _sse("reset", {}), 0, False
+    if event_type in ("complete", "error"):
+        return _sse(event_type, {"seq": event["seq"]}), event["seq"], True
+    if event["seq"] <= last_seq:
+        return None, last_seq, False
+    return _sse("batch", event), event["seq"], False
+
+
+async def stream_llm_recommendations(trigger_hash: str) -> AsyncIterator[str]:
+    """
+    Server-sent events for an LLM generation: a `batch` event for every
+    group of recommendations as soon as the worker has stored it, then
+    `complete` (or `error`). Batches published before the client connected
+    are replayed first.
+    """
+    async with redis.Redis(connection_pool=redis_pool) as redis_client:
+        cached_result = await crud_cache.get_cached_llm_recommendation(
+            redis_client, crud_cache.get_llm_rec_cache_key(trigger_hash)
+        )
+        if cached_result is not None:
+            results = [
+                schemas.recommendation.BaseRecResult(**rec).model_dump()
+                for rec in cached_result
+            ]
+            yield _sse("batch", {"seq": 1, "type": "batch", "results": results})
+            yield _sse("complete", {"seq": 2})
+            return
+
+        pubsub = redis_client.pubsub()
+        await pubsub.subscribe(crud_cache.get_llm_rec_stream_channel(trigger_hash))
+        try:
+            # Subscribed before reading the replay log, so no event is lost
+            # in between; duplicates are skipped by sequence number.
+            last_seq = 0
+            events = await crud_cache.get_llm_rec_stream_events(
+                redis_client, trigger_hash
+            )
+            if not events and not await redis_client.exists(
+                crud_cache.get_llm_rec_lock_key(trigger_hash)
+            ):
+                yield _sse("error", {"detail": "No generation in progress."})
+                return
+
+            for event in events:
+                message, last_seq, finished = _relay(event, last_seq)
+                if message:
+                    yield message
+                if finished:
+                    return
+
+            deadline = time.monotonic() + LLM_REC_STREAM_TIMEOUT_SECONDS
+            while time.monotonic() < deadline:
+                pubsub_message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=LLM_REC_STREAM_HEARTBEAT_SECONDS,
+                )
+                if pubsub_message is None:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                message, last_seq, finished = _relay(
+                    json.loads(pubsub_message["data"]), last_seq
+                )
+                if message:
+                    yield message
+                if finished:
+                    return
+        finally:
+            await pubsub.aclose()
@@ -0,0 +1,88 @@
+from typing import Any, Dict, List
+
+import redis.asyncio as redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.crud import crud_cache, crud_movie, crud_recommendation
+from app.utils import trigger_keys
+
+
+async def store_recommendation_batch(
+    source_movie_id: int, trigger_hash: str, parsed_movies: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Enriches a batch of parsed LLM recommendations with database data,
+    stores them and returns them in their cached form.
+    """
+    async with AsyncSessionLocal() as db:
+        enriched_recs = await crud_movie.enrich_recommendations_with_db_data(
+            db, {"movies": parsed_movies}
+        )
+        print(
+            f"Enriched recommendations with database data: {len(enriched_recs)} found."
+        )
+        recs_to_save = [
+            {
+                "source_movie_id": source_movie_id,
+                "trigger_keywords_hash": trigger_hash,
+                "recommended_movie_id": rec["id"],
+                "llm_justification": rec["justification"],
+                "llm_score": rec["ai_score"],
+            }
+            for rec in enriched_recs
+        ]
+
+        final_recs_with_ids = await crud_recommendation.bulk_create_llm_recommendations(
+            db, recs_to_save
+        )
+
+        cached_data = []
+        rec_map = {rec["recommended_movie_id"]: rec for rec in final_recs_with_ids}
+        for enriched_rec in enriched_recs:
+            db_rec = rec_map.get(enriched_rec["id"])
+            if db_rec:
+                cached_data.append({**enriched_rec, "id": db_rec["id"]})
+    return cached_data
+
+
+async def store_recommendation_set(
+    source_movie_id: int,
+    trigger_hash: str,
+    keywords: List[str],
+    cached_data: List[Dict[str, Any]],
+):
+    """
+    Stores the final result list of a generation as one row, read back
+    when Redis no longer has it.
+    """
+    if not cached_data:
+        return
+    async with AsyncSessionLocal() as db:
+        await crud_recommendation.save_recommendation_set(
+            db,
+            trigger_hash,
+            source_movie_id,
+            trigger_keys.canonical_keywords(keywords),
+            cached_data,
+        )
+
+
+async def read_warm_tier(
+    db: AsyncSession, redis_client: redis.Redis, trigger_hash: str
+) -> List[Dict[str, Any]]:
+    """
+    Reads a finished result from the database after Redis evicted it, and
+    promotes it back into Redis so later requests hit the hot cache.
+    """
+    rec_set = await crud_recommendation.get_recommendation_set(db, trigger_hash)
+    if rec_set is None or not rec_set.results:
+        return []
+    await crud_cache.promote_llm_recommendation(
+        redis_client,
+        trigger_hash,
+        rec_set.results,
+        rec_set.source_movie_id,
+        rec_set.keywords,
+    )
+    return rec_set.results
@@ -0,0 +1,144 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis.asyncio as redis
+
+from app.core.redis import redis_pool
+from app.core.tmdb_client import tmdb_client
+from app.crud import crud_cache
+
+# The first pages are refreshed proactively, before their soft expiry.
+TRENDING_PREFETCH_PAGES = 5
+TRENDING_PREFETCH_INTERVAL_SECONDS = 60 * 10
+
+TRENDING_REFRESH_LOCK_KEY = "trending:day:refresh_lock"
+TRENDING_REFRESH_LOCK_TTL_SECONDS = 120
+
+# On a cold miss, requests that lose the fill lock poll the cache for this
+# long before giving up and calling TMDb themselves.
+TRENDING_FILL_LOCK_TTL_SECONDS = 15
+TRENDING_FILL_WAIT_SECONDS = 3.0
+TRENDING_FILL_POLL_SECONDS = 0.1
+
+
+def _get_fill_lock_key(page: int) -> str:
+    return f"trending:day:page:{page}:fill_lock"
+
+
+async def fetch_trending_page(page: int) -> Optional[Dict[str, Any]]:
+    """
+    Fetches a page of trending movies from TMDb and annotates every movie
+    with its genre names.
+    """
+    genre_map = await tmdb_client.get_genre_map()
+
+    trending_data = await tmdb_client.fetch_trending_from_tmdb(page=page)
+    if not trending_data:
+        return None
+
+    for movie in trending_data.get("results", []):
+        movie["genres"] = [
+            {"id": gid, "name": genre_map.get(gid, "Unknown")}
+            for gid in movie.get("genre_ids", [])
+        ]
+    return trending_data
+
+
+async def refresh_trending_pages(redis_client: redis.Redis, pages: List[int]) -> bool:
+    """
+    Fetches fresh copies of the given trending pages and re-caches them.
+    A Redis lock makes sure a single refresher runs across all processes.
+    Returns False if another refresher already holds the lock.
+    """
+    token = await crud_cache.acquire_lock(
+        redis_client, TRENDING_REFRESH_LOCK_KEY, TRENDING_REFRESH_LOCK_TTL_SECONDS
+    )
+    if not token:
+        return False
+
+    try:
+        for page in pages:
+            trending_data = await fetch_trending_page(page)
+            if trending_data:
+                await crud_cache.cache_trending_movies(
+                    redis_client, page=page, data=trending_data
+                )
+    finally:
+        await crud_cache.release_lock(redis_client, TRENDING_REFRESH_LOCK_KEY, token)
+    return True
+
+
+async def refresh_trending_in_background(pages: List[int]):
+    """
+    Background-task entry point. It opens its own Redis client because the
+    request-scoped one is closed by the time background tasks run.
+    """
+    try:
+        async with redis.Redis(connection_pool=redis_pool) as redis_client:
+            await refresh_trending_pages(redis_client, pages)
+    except Exception as e:
+        print(f"Background trending refresh failed: {e}")
+
+
+async def get_or_fill_trending_page(
+    redis_client: redis.Redis, page: int
+) -> Optional[Tuple[Dict[str, Any], float]]:
+    """
+    Handles a cold cache miss. One request fetches the page under a per-page
+    lock; concurrent requests wait briefly for it to land in the cache
+    instead of all calling TMDb at once. Returns the same
+    `(data, soft_expires_at)` tuple as `get_cached_trending_movies`.
+    """
+    lock_key = _get_fill_lock_key(page)
+    token = await crud_cache.acquire_lock(
+        redis_client, lock_key, TRENDING_FILL_LOCK_TTL_SECONDS
+    )
+
+    if not token:
+        deadline = time.monotonic() + TRENDING_FILL_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            await asyncio.sleep(TRENDING_FILL_POLL_SECONDS)
+            cached = await crud_cache.get_cached_trending_movies(redis_client, page)
+            if cached:
+                return cached
+
+    try:
+        trending_data = await fetch_trending_page(page)
+        if not trending_data:
+            return None
+        soft_expires_at = await crud_cache.cache_trending_movies(
+            redis_client, page=page, data=trending_data
+        )
+        return trending_data, soft_expires_at
+    finally:
+        if token:
+            await crud_cache.release_lock(redis_client, lock_key, token)
+
+
+async def prefetch_trending_pages():
+    """
+    Long-running task started from the application lifespan. It refreshes
+    the first `TRENDING_PREFETCH_PAGES` pages shortly before their soft
+    expiry, so regular traffic never has to wait on TMDb for them.
+    """
+    while True:
+        try:
+            async with redis.Redis(connection_pool=redis_pool) as redis_client:
+                refresh_before = time.time() + TRENDING_PREFETCH_INTERVAL_SECONDS
+                due_pages = []
+                for page in range(1, TRENDING_PREFETCH_PAGES + 1):
+                    cached = await crud_cache.get_cached_trending_movies(
+                        redis_client, page
+                    )
+                    if not cached or cached[1] <= refresh_before:
+                        due_pages.append(page)
+
+                if due_pages:
+                    await refresh_trending_pages(redis_client, due_pages)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Trending prefetch failed: {e}")
+
+        await asyncio.sleep(TRENDING_PREFETCH_INTERVAL_SECONDS)
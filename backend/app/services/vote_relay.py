@@ -0,0 +1,63 @@
+import asyncio
+import os
+import socket
+from typing import Dict, List, Tuple
+
+import redis.asyncio as redis
+
+from app.core.redis import redis_pool
+from app.crud import crud_vote
+from workers.celery_config import celery_app
+
+VOTE_RELAY_BATCH_SIZE = 100
+VOTE_RELAY_BLOCK_MS = 5_000
+# Votes read by a relay that died are taken over after this long.
+VOTE_RELAY_CLAIM_IDLE_MS = 60_000
+RECONNECT_DELAY_SECONDS = 1.0
+
+
+def _dispatch(entries: List[Tuple[str, Dict[str, str]]], dispatched: List[str]):
+    """
+    Publishes votes to the broker, adding the ids of the ones sent to
+    `dispatched`. Publishing blocks, so this runs in a worker thread.
+    """
+    for entry_id, fields in entries:
+        celery_app.send_task(
+            "tasks.process_similarity_vote",
+            args=[int(fields["movie_id_1"]), int(fields["movie_id_2"])],
+            queue="llm_queue",
+        )
+        dispatched.append(entry_id)
+
+
+async def relay_votes():
+    """
+    Long-running task started from the application lifespan. It moves
+    admitted votes from the vote stream to the Celery vote task. Every API
+    process is a consumer in one group, so each vote is dispatched by one
+    of them, and only acknowledged once it was handed to the broker.
+    """
+    consumer = f"{socket.gethostname()}:{os.getpid()}"
+    while True:
+        try:
+            async with redis.Redis(connection_pool=redis_pool) as redis_client:
+                await crud_vote.ensure_vote_stream_group(redis_client)
+                while True:
+                    entries = await crud_vote.read_queued_votes(
+                        redis_client,
+                        consumer,
+                        VOTE_RELAY_BATCH_SIZE,
+                        VOTE_RELAY_BLOCK_MS,
+                        VOTE_RELAY_CLAIM_IDLE_MS,
+                    )
+                    dispatched = []
+                    try:
+                        if entries:
+                            await asyncio.to_thread(_dispatch, entries, dispatched)
+                    finally:
+                        await crud_vote.ack_queued_votes(redis_client, dispatched)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Vote relay failed: {e}")
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
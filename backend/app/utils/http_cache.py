@@ -0,0 +1,53 @@
+import hashlib
+from typing import Dict, Union
+
+from fastapi import Request, Response
+
+
+def make_etag(content: Union[bytes, str]) -> str:
+    """
+    A strong ETag from a hash of the response body, or of any value that
+    changes whenever the body does (e.g. a cache entry's write time).
+    """
+    if isinstance(content, str):
+        content = content.encode()
+    return f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Whether the client's `If-None-Match` already matches `etag`."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored.
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
+
+def cache_headers(etag: str, cache_control: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+def not_modified_response(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, cache_control))
+
+
+def conditional_response(
+    request: Request,
+    body: bytes,
+    cache_control: str,
+    media_type: str = "application/json",
+) -> Response:
+    """
+    Sends a pre-serialized body with its ETag and caching policy, or a 304
+    without a body if the client already has it.
+    """
+    etag = make_etag(body)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag, cache_control)
+    return Response(
+        content=body, media_type=media_type, headers=cache_headers(etag, cache_control)
+    )
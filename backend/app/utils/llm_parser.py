@@ -87,3 +87,83 @@ def parse_llm_keywords(content, object_key=None):
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
         return None
+
+
+class IncrementalMovieParser:
+    """
+    Extracts complete objects from the `"movies"` array of a streamed LLM
+    response while the rest of it is still being generated.
+
+    Feed it text chunks as they arrive; every call returns the movie objects
+    that were completed by that chunk.
+    """
+
+    def __init__(self, array_key: str = "movies"):
+        self.array_marker = f'"{array_key}"'
+        self.buffer = ""
+        self.position = 0
+        self.in_array = False
+        self.done = False
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.object_start = None
+
+    def _find_array_start(self) -> bool:
+        marker_index = self.buffer.find(self.array_marker, self.position)
+        if marker_index == -1:
+            return False
+        bracket_index = self.buffer.find("[", marker_index + len(self.array_marker))
+        if bracket_index == -1:
+            return False
+        self.position = bracket_index + 1
+        self.in_array = True
+        return True
+
+    def feed(self, chunk: str):
+        self.buffer += chunk
+        if self.done or (not self.in_array and not self._find_array_start()):
+            return []
+
+        completed = []
+        while self.position < len(self.buffer):
+            char = self.buffer[self.position]
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == "{":
+                if self.depth == 0:
+                    self.object_start = self.position
+                self.depth += 1
+            elif char == "}":
+                self.depth -= 1
+                if self.depth == 0 and self.object_start is not None:
+                    object_str = self.buffer[self.object_start : self.position + 1]
+                    try:
+                        completed.append(json.loads(object_str))
+                    except json.JSONDecodeError as e:
+                        print(f"Skipping malformed streamed object: {e}")
+                    self.object_start = None
+            elif char == "]" and self.depth == 0:
+                self.done = True
+                self.position += 1
+                break
+
+            self.position += 1
+
+        # Drop text that can no longer be part of an unfinished object.
+        keep_from = (
+            self.object_start if self.object_start is not None else self.position
+        )
+        self.buffer = self.buffer[keep_from:]
+        self.position -= keep_from
+        if self.object_start is not None:
+            self.object_start = 0
+        return completed
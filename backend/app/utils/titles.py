@@ -0,0 +1,13 @@
+chars_to_remove = "·'.-" + '"' + "!@#$%^&*()_+=[]{}|;<>?,/\\`~"
+translation_table = str.maketrans("", "", chars_to_remove)
+
+# The same normalization in SQL, for the generated `movies.normalized_title`
+# column. Quotes are doubled for the string literal.
+NORMALIZED_TITLE_SQL = "lower(btrim(translate(title, '{}', ''), E' \\t\\n\\r'))".format(
+    chars_to_remove.replace("'", "''")
+)
+
+
+def normalize_title(title: str) -> str:
+    """The form titles are matched in: no punctuation, trimmed, lowercase."""
+    return title.translate(translation_table).strip().lower()
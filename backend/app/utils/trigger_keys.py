@@ -0,0 +1,30 @@
+import hashlib
+import json
+from typing import Iterable, List, Set
+
+
+def normalize_keyword(keyword: str) -> str:
+    """The form keywords are compared in: no dots, trimmed, lowercase."""
+    return keyword.replace(".", "").strip().lower()
+
+
+def canonical_keywords(keywords: Iterable[str]) -> List[str]:
+    """Normalized, de-duplicated and sorted, so equal selections match."""
+    return sorted({normalize_keyword(kw) for kw in keywords if kw})
+
+
+def build_trigger_hash(source_movie_id: int, keywords: Iterable[str]) -> str:
+    """
+    The cache key of an LLM recommendation request. The keywords are
+    serialized as a JSON list, so ["ab", "c"] and ["a", "bc"] differ.
+    """
+    trigger = json.dumps(
+        [source_movie_id, canonical_keywords(keywords)], separators=(",", ":")
+    )
+    return hashlib.sha256(trigger.encode()).hexdigest()
+
+
+def jaccard_similarity(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
@@ -0,0 +1,153 @@
+import os
+import sys
+import time
+import random
+import argparse
+import asyncio
+from datetime import date
+from typing import List, Dict, Any, Callable
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from sqlalchemy import delete
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.crud import crud_movie
+from app.models.movie import Movie
+
+# Synthetic rows use ids far above any TMDb id and are deleted after each run.
+SYNTHETIC_ID_START = 2_000_000_000
+EMBEDDING_DIMENSIONS = 768
+
+
+def make_movies(count: int, with_embeddings: bool) -> List[Dict[str, Any]]:
+    """Builds rows shaped like the ingestion output."""
+    movies = []
+    for i in range(count):
+        movie = {
+            "id": SYNTHETIC_ID_START + i,
+            "title": f"Benchmark Movie {i}",
+            "original_title": f"Benchmark Movie {i}",
+            "overview": "A synthetic movie used to benchmark bulk loading. " * 4,
+            "tagline": "Tab\tand newline\nescaping",
+            "release_date": date(2000 + i % 25, 1 + i % 12, 1 + i % 28),
+            "release_year": 2000 + i % 25,
+            "runtime": 90 + i % 60,
+            "poster_path": f"/poster_{i}.jpg",
+            "backdrop_path": f"/backdrop_{i}.jpg",
+            "original_language": "en",
+            "origin_country": ["US"],
+            "genres": [{"id": 18, "name": "Drama"}, {"id": 35, "name": "Comedy"}],
+            "keywords": [{"id": k, "name": f"keyword {k}"} for k in range(10)],
+            "director": {"id": i, "name": f"Director {i}"},
+            "cast": [{"id": c, "name": f"Actor {c}"} for c in range(5)],
+            "collection": None,
+            "vote_count": i % 5000,
+            "vote_average": round(random.uniform(1, 10), 1),
+        }
+        if with_embeddings:
+            movie["embedding"] = [random.random() for _ in range(EMBEDDING_DIMENSIONS)]
+        movies.append(movie)
+    return movies
+
+
+def _synthetic_rows_filter(count: int):
+    return Movie.id.between(SYNTHETIC_ID_START, SYNTHETIC_ID_START + count)
+
+
+async def cleanup(count: int):
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Movie).where(_synthetic_rows_filter(count)))
+        await db.commit()
+
+
+async def time_async_writer(
+    name: str, writer: Callable, movies: List[Dict[str, Any]], repeat: int
+) -> Dict[str, Any]:
+    timings = []
+    for _ in range(repeat):
+        # First pass inserts, the second exercises the conflict path.
+        await cleanup(len(movies))
+        for _ in range(2):
+            async with AsyncSessionLocal() as db:
+                started = time.perf_counter()
+                await writer(db, movies)
+                timings.append(time.perf_counter() - started)
+    return {"name": name, "timings": timings}
+
+
+async def time_sync_writer(
+    name: str, writer: Callable, movies: List[Dict[str, Any]], repeat: int
+) -> Dict[str, Any]:
+    def run() -> List[float]:
+        timings = []
+        for _ in range(2):
+            with SessionLocal() as db:
+                started = time.perf_counter()
+                writer(db, movies)
+                timings.append(time.perf_counter() - started)
+        return timings
+
+    timings = []
+    for _ in range(repeat):
+        await cleanup(len(movies))
+        timings.extend(await asyncio.to_thread(run))
+    return {"name": name, "timings": timings}
+
+
+def report(results: List[Dict[str, Any]], count: int):
+    print(f"\n{'writer':<40}{'best s':>10}{'mean s':>10}{'rows/s':>12}")
+    for result in results:
+        best = min(result["timings"])
+        mean = sum(result["timings"]) / len(result["timings"])
+        print(f"{result['name']:<40}{best:>10.2f}{mean:>10.2f}{count / best:>12.0f}")
+
+
+async def main(count: int, repeat: int, with_embeddings: bool):
+    movies = make_movies(count, with_embeddings)
+    print(
+        f"Benchmarking bulk writers with {count} rows, {repeat} runs each"
+        f"{' (with embeddings)' if with_embeddings else ''}..."
+    )
+
+    try:
+        results = [
+            await time_async_writer(
+                "bulk_patch_movies (VALUES)",
+                crud_movie.bulk_patch_movies,
+                movies,
+                repeat,
+            ),
+            await time_async_writer(
+                "copy_merge_movies (binary COPY)",
+                crud_movie.copy_merge_movies,
+                movies,
+                repeat,
+            ),
+            await time_sync_writer(
+                "sync_bulk_patch_movies (VALUES)",
+                crud_movie.sync_bulk_patch_movies,
+                movies,
+                repeat,
+            ),
+            await time_sync_writer(
+                "sync_copy_merge_movies (text COPY)",
+                crud_movie.sync_copy_merge_movies,
+                movies,
+                repeat,
+            ),
+        ]
+    finally:
+        await cleanup(count)
+
+    report(results, count)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the VALUES and COPY bulk loading paths."
+    )
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--with-embeddings", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.repeat, args.with_embeddings))
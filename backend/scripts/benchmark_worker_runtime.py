@@ -0,0 +1,119 @@
+"""
+Compares task throughput of the eventlet pool with the asyncio-native task
+runtime, on a workload shaped like the worker tasks: a Postgres round trip
+and a Redis round trip per task.
+
+    python -m scripts.benchmark_worker_runtime --tasks 2000 --concurrency 100
+
+Each mode runs in its own process, since eventlet has to monkey-patch the
+standard library before anything else is imported.
+"""
+
+import sys
+
+if __name__ == "__main__" and "--run-mode=eventlet" in sys.argv:
+    import eventlet
+
+    eventlet.monkey_patch()
+
+import os
+import time
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+import redis.asyncio as redis
+from sqlalchemy import text
+from app.core import async_runtime
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.core.redis import redis_pool, sync_get_redis_client
+
+MODES = ("eventlet", "asyncio")
+BENCHMARK_KEY = "benchmark:worker_runtime"
+
+
+def sync_task(query_seconds: float):
+    """A task body as the eventlet pool runs it: psycopg2 and sync Redis."""
+    with SessionLocal() as db:
+        db.execute(text("SELECT pg_sleep(:s)"), {"s": query_seconds})
+    with sync_get_redis_client() as redis_client:
+        redis_client.incr(BENCHMARK_KEY)
+
+
+async def async_task(query_seconds: float):
+    """The same body as a coroutine on the shared event loop."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SELECT pg_sleep(:s)"), {"s": query_seconds})
+    async with redis.Redis(connection_pool=redis_pool) as redis_client:
+        await redis_client.incr(BENCHMARK_KEY)
+
+
+def run_eventlet(tasks: int, concurrency: int, query_seconds: float) -> float:
+    pool = eventlet.GreenPool(concurrency)
+    started = time.perf_counter()
+    for _ in range(tasks):
+        pool.spawn_n(sync_task, query_seconds)
+    pool.waitall()
+    return time.perf_counter() - started
+
+
+def run_asyncio(tasks: int, concurrency: int, query_seconds: float) -> float:
+    # Like `celery worker -P threads`: each pool thread hands its task body
+    # to the shared loop and waits for it.
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(
+            executor.map(
+                lambda _: async_runtime.run_sync(async_task(query_seconds)),
+                range(tasks),
+            )
+        )
+    elapsed = time.perf_counter() - started
+    async_runtime.shutdown()
+    return elapsed
+
+
+def run_mode(mode: str, tasks: int, concurrency: int, query_seconds: float):
+    runner = run_eventlet if mode == "eventlet" else run_asyncio
+    elapsed = runner(tasks, concurrency, query_seconds)
+    print(f"{mode:<12}{elapsed:>10.2f}{tasks / elapsed:>12.1f}")
+
+
+def main(tasks: int, concurrency: int, query_seconds: float):
+    print(
+        f"Running {tasks} tasks at concurrency {concurrency}, "
+        f"{query_seconds * 1000:.0f}ms per query...\n"
+    )
+    print(f"{'runtime':<12}{'seconds':>10}{'tasks/s':>12}")
+    for mode in MODES:
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "scripts.benchmark_worker_runtime",
+                f"--run-mode={mode}",
+                f"--tasks={tasks}",
+                f"--concurrency={concurrency}",
+                f"--query-seconds={query_seconds}",
+            ],
+            check=True,
+        )
+    with sync_get_redis_client() as redis_client:
+        redis_client.delete(BENCHMARK_KEY)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the eventlet pool with the asyncio task runtime."
+    )
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--query-seconds", type=float, default=0.02)
+    parser.add_argument("--run-mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        run_mode(args.run_mode, args.tasks, args.concurrency, args.query_seconds)
+    else:
+        main(args.tasks, args.concurrency, args.query_seconds)
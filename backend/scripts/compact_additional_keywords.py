@@ -0,0 +1,57 @@
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from sqlalchemy import select
+from app.core.database import SessionLocal
+from app.crud import crud_movie
+from app.models.movie import Movie
+
+BATCH_SIZE = 1000
+
+
+def compact_additional_keywords(batch_size: int = BATCH_SIZE):
+    """
+    One-off cleanup of the arrays appended to before merges had set
+    semantics: de-duplicates and caps every movie's `additional_keywords`.
+    Walks the table in id order, one short transaction per batch.
+    """
+    last_id = 0
+    scanned = changed = 0
+    with SessionLocal() as db:
+        while True:
+            ids = (
+                db.execute(
+                    select(Movie.id)
+                    .where(Movie.id > last_id, Movie.additional_keywords.is_not(None))
+                    .order_by(Movie.id)
+                    .limit(batch_size)
+                )
+                .scalars()
+                .all()
+            )
+            if not ids:
+                break
+
+            changed += crud_movie.sync_update_additional_keywords(
+                db, [{"id": movie_id, "additional_keywords": []} for movie_id in ids]
+            )
+            scanned += len(ids)
+            last_id = ids[-1]
+            print(f"Compacted {changed} of {scanned} movies so far...")
+
+    print(
+        f"Done: {changed} of {scanned} movies compacted. "
+        "Run VACUUM ANALYZE movies to reclaim the space."
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="De-duplicate and cap movies.additional_keywords."
+    )
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    compact_additional_keywords(args.batch_size)
@@ -56,8 +56,9 @@ def save_embeddings(movie_data: List[Dict]):
 
             with open("backup_embeddings.json", "w") as f:
                 json.dump(movie_data, f, indent=4)
-            crud_movie.sync_bulk_patch_movies(db, movie_data)
-            db.commit()
+            failed = crud_movie.sync_copy_merge_movies(db, movie_data, mode="update")
+            if failed:
+                raise RuntimeError(f"{len(failed)} embeddings failed to load.")
         except Exception as e:
             db.rollback()
             with open("error_log.txt", "a") as f:
@@ -18,7 +18,7 @@ COMPLETED_STATES = {"JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCEL
 POLLING_INTERVAL_SECONDS = 60
 
 
-def process_succeeded_job(client, batch_job):
+def process_succeeded_job(client, batch_job, results_dir: Path = BATCH_RESULTS_DIR):
     """
     Handles a successfully completed job by downloading and printing its results.
     This logic is adapted from the "Retrieving results" section on page 8.
@@ -35,7 +35,8 @@ def process_succeeded_job(client, batch_job):
             print("Downloading result file content...")
             file_content = client.files.download(file=result_file_name)
 
-            output_filename = f"{BATCH_RESULTS_DIR}/batch_result_{result_file_name.split("/")[1][-5:]}.jsonl"
+            result_suffix = result_file_name.split("/")[1][-5:]
+            output_filename = f"{results_dir}/batch_result_{result_suffix}.jsonl"
             with open(output_filename, "w") as f:
                 f.write(file_content.decode("utf-8"))
 
@@ -51,7 +52,9 @@ def process_succeeded_job(client, batch_job):
         )
 
 
-def monitor_all_batch_jobs():
+def monitor_all_batch_jobs(
+    manifest_file: Path = BATCH_MANIFEST_FILE, results_dir: Path = BATCH_RESULTS_DIR
+):
     """
     Reads job names from the manifest file and polls their status until all are complete.
     Updates the manifest file with the latest job status.
@@ -65,11 +68,9 @@ def monitor_all_batch_jobs():
         logging.error(f"Failed to initialize Google GenAI Client. Error: {e}")
         return
 
-    manifest_path = Path(BATCH_MANIFEST_FILE)
+    manifest_path = Path(manifest_file)
     if not manifest_path.exists():
-        logging.error(
-            f"Manifest file not found: {BATCH_MANIFEST_FILE}. Cannot monitor jobs."
-        )
+        logging.error(f"Manifest file not found: {manifest_file}. Cannot monitor jobs.")
         return
 
     all_jobs_data = []
@@ -80,7 +81,7 @@ def monitor_all_batch_jobs():
             fieldnames = reader.fieldnames or []
             all_jobs_data = list(reader)
     except (IOError, KeyError) as e:
-        logging.error(f"Failed to read or parse {BATCH_MANIFEST_FILE}. Error: {e}")
+        logging.error(f"Failed to read or parse {manifest_file}. Error: {e}")
         return
 
     active_jobs = [
@@ -121,7 +122,7 @@ def monitor_all_batch_jobs():
 
                     if current_state in COMPLETED_STATES:
                         if current_state == "JOB_STATE_SUCCEEDED":
-                            process_succeeded_job(client, batch_job)
+                            process_succeeded_job(client, batch_job, results_dir)
                         elif current_state == "JOB_STATE_FAILED":
                             print(f"\n--- Job Failed: {job_name} ---")
                             print(f"Error: {batch_job.error}")
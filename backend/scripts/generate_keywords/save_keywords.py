@@ -46,7 +46,7 @@ def process_results_and_update_db():
 
                     if not (key and response):
                         logging.warning(
-                            f"Skipping data in {key if key else ""} due to missing key or response: {data}"
+                            f"Skipping data in {key if key else ''} due to missing key or response: {data}"
                         )
                         continue
 
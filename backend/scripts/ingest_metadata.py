@@ -1,30 +1,34 @@
 import os
 import sys
 import json
+import argparse
 import asyncio
-import httpx
 from tqdm import tqdm
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any, Set, Optional
 
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 from datetime import datetime
-from app.core.config import settings
 from app.core.database import AsyncSessionLocal
+from app.core.tmdb_client import tmdb_client
 from app.crud import crud_movie
 
 # --- CONFIGURATION ---
-TMDB_API_URL = "https://api.themoviedb.org/3"
 # Fetch more pages to get a wider variety of movies
 API_MAX_PAGE_LIMIT = 500
-# Limit concurrent requests to TMDb to avoid getting rate-limited
-MAX_CONCURRENT_REQUESTS = 10
 # Filter out movies with very few votes to improve data quality
 MINIMUM_VOTE_COUNT = 0
-# Path for local data backup
-BACKUP_FILE_PATH = "scripts/movies_backup.json"
+# Append-only record of every movie written to the database. It doubles as
+# the data backup and lets a rerun skip movies that were already stored.
+CHECKPOINT_FILE_PATH = "scripts/ingest_checkpoint.jsonl"
+DETAILS_APPEND_TO_RESPONSE = "credits,keywords"
+# Pipeline sizing: concurrent detail fetchers, bounded hand-off queues (which
+# cap memory regardless of catalog size) and rows per database flush.
+FETCH_WORKERS = 32
+QUEUE_MAX_SIZE = 500
+WRITE_BATCH_SIZE = 500
 
 
-async def discover_movie_ids(client: httpx.AsyncClient) -> Set[int]:
+async def discover_movie_ids() -> Set[int]:
     """
     Stage 1: Quickly discover a large set of movie IDs from the /discover endpoint.
     """
@@ -34,26 +38,25 @@ async def discover_movie_ids(client: httpx.AsyncClient) -> Set[int]:
     tasks = []
     for page in range(1, API_MAX_PAGE_LIMIT + 1):
         params = {
-            "api_key": settings.TMDB_API_KEY,
             "sort_by": "popularity.desc",
             "page": page,
             "include_adult": False,
             "release_date.lte": datetime.now().date(),
             "vote_count.gte": MINIMUM_VOTE_COUNT,
         }
-        tasks.append(client.get(f"{TMDB_API_URL}/discover/movie", params=params))
+        tasks.append(tmdb_client.discover_movies(params))
 
     for response in tqdm(
         asyncio.as_completed(tasks), total=len(tasks), desc="Discovering IDs"
     ):
         try:
             res = await response
-            res.raise_for_status()
-            for movie in res.json().get("results", []):
+            if not res:
+                print("Discovery API Error on page. Skipping.")
+                continue
+            for movie in res.get("results", []):
                 if movie.get("id"):
                     discovered_ids.add(movie["id"])
-        except httpx.HTTPStatusError as e:
-            print(f"Discovery API Error: {e.response.status_code} on page. Skipping.")
         except Exception as e:
             ...
             # print(f"An error occurred during discovery: {e}. Skipping.")
@@ -61,159 +64,243 @@ async def discover_movie_ids(client: httpx.AsyncClient) -> Set[int]:
     return discovered_ids
 
 
-async def fetch_full_movie_details(
-    client: httpx.AsyncClient, movie_ids: Set[int]
-) -> List[Dict[str, Any]]:
+async def fetch_movie_details(movie_ids: Set[int], raw_queue: asyncio.Queue):
     """
-    Stage 2: Fetch full, enriched details for each movie ID using `append_to_response`.
+    Stage 2 (producer): Fetch workers pull IDs and push the full, enriched
+    details (via `append_to_response`) onto the bounded raw queue.
     """
     print(f"Fetching full details for {len(movie_ids)} movies...")
-    # A semaphore limits the number of concurrent requests.
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
-    tasks = []
-
+    id_queue: asyncio.Queue = asyncio.Queue()
     for movie_id in movie_ids:
+        id_queue.put_nowait(movie_id)
 
-        async def fetch_one(mid):
-            async with semaphore:
-                try:
-                    params = {
-                        "api_key": settings.TMDB_API_KEY,
-                        "append_to_response": "credits,keywords",
-                    }
-                    response = await client.get(
-                        f"{TMDB_API_URL}/movie/{mid}", params=params
-                    )
-                    response.raise_for_status()
-                    return response.json()
-                except httpx.HTTPStatusError:
-                    # It's okay if a single movie fails, just skip it.
-                    return None
-
-        tasks.append(fetch_one(movie_id))
-
-    movie_details_list = []
-    for response_task in tqdm(
-        asyncio.as_completed(tasks), total=len(tasks), desc="Fetching Details"
-    ):
-        try:
-            details = await response_task
-            if details:
-                movie_details_list.append(details)
-        except Exception as e:
-            continue
-            # print(f"An error occurred while fetching movie details: {e}")
+    progress = tqdm(total=len(movie_ids), desc="Fetching Details")
+
+    async def fetch_worker():
+        while True:
+            try:
+                movie_id = id_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                # The client returns None if a single movie fails, just skip it.
+                details = await tmdb_client.get_movie_details(
+                    movie_id, append_to_response=DETAILS_APPEND_TO_RESPONSE
+                )
+                if details:
+                    await raw_queue.put(details)
+            except Exception as e:
+                print(f"An error occurred while fetching movie {movie_id}: {e}")
+            progress.update(1)
+
+    await asyncio.gather(*(fetch_worker() for _ in range(FETCH_WORKERS)))
+    progress.close()
 
-    return movie_details_list
+
+def format_movie(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Transforms one raw, rich TMDb payload into the flat structure needed for our database.
+    """
+    # Extract director and cast from the 'credits' part of the response
+    director = next(
+        (
+            {"id": p["id"], "name": p["name"]}
+            for p in data.get("credits", {}).get("crew", [])
+            if p["job"] == "Director"
+        ),
+        None,
+    )
+    top_cast = [
+        {"id": p["id"], "name": p["name"]}
+        for p in data.get("credits", {}).get("cast", [])[:5]
+    ]
+    release_data = data.get("release_date", "")
+    release_year = int(release_data.split("-")[0]) if release_data else None
+    return {
+        "id": data["id"],
+        "original_language": data.get("original_language"),
+        "origin_country": data.get("origin_country", []),
+        "original_title": data.get("original_title"),
+        "runtime": data.get("runtime"),
+        "tagline": data.get("tagline"),
+        "title": data.get("title"),
+        "overview": data.get("overview"),
+        "release_date": release_data,
+        "release_year": release_year,
+        "poster_path": data.get("poster_path"),
+        "backdrop_path": data.get("backdrop_path"),
+        "genres": data.get("genres", []),
+        "keywords": data.get("keywords", {}).get("keywords", []),
+        "director": director,
+        "cast": top_cast,
+        "collection": data.get("belongs_to_collection"),
+        "vote_count": data.get("vote_count"),
+        "vote_average": data.get("vote_average"),
+    }
 
 
 def process_and_format_movies(
     movies_details: List[Dict[str, Any]],
 ) -> List[Dict[str, Any]]:
     """
-    Transforms the raw, rich data from TMDb into the flat structure needed for our database.
-    """
-    print("Processing and formatting movie data for database ingestion...")
-    processed_movies = []
-    for data in movies_details:
-        # Extract director and cast from the 'credits' part of the response
-        director = next(
-            (
-                {"id": p["id"], "name": p["name"]}
-                for p in data.get("credits", {}).get("crew", [])
-                if p["job"] == "Director"
-            ),
-            None,
-        )
-        top_cast = [
-            {"id": p["id"], "name": p["name"]}
-            for p in data.get("credits", {}).get("cast", [])[:5]
-        ]
-        release_data = data.get("release_date", "")
-        release_year = int(release_data.split("-")[0]) if release_data else None
-        processed_movies.append(
-            {
-                "id": data["id"],
-                "original_language": data.get("original_language"),
-                "origin_country": data.get("origin_country", []),
-                "original_title": data.get("original_title"),
-                "runtime": data.get("runtime"),
-                "tagline": data.get("tagline"),
-                "title": data.get("title"),
-                "overview": data.get("overview"),
-                "release_date": release_data,
-                "release_year": release_year,
-                "poster_path": data.get("poster_path"),
-                "backdrop_path": data.get("backdrop_path"),
-                "genres": data.get("genres", []),
-                "keywords": data.get("keywords", {}).get("keywords", []),
-                "director": director,
-                "cast": top_cast,
-                "collection": data.get("belongs_to_collection"),
-                "vote_count": data.get("vote_count"),
-                "vote_average": data.get("vote_average"),
-            }
-        )
-    return processed_movies
+    Transforms a list of raw TMDb payloads, see `format_movie`.
+    """
+    return [format_movie(data) for data in movies_details]
+
+
+def _parse_release_date(release_date_str: Optional[str]):
+    if release_date_str and isinstance(release_date_str, str):
+        try:
+            return datetime.fromisoformat(release_date_str).date()
+        except ValueError:
+            return None
+    return None
+
+
+async def transform_movies(raw_queue: asyncio.Queue, row_queue: asyncio.Queue):
+    """
+    Stage 3 (transformer): Formats raw payloads one at a time as they arrive.
+    """
+    while (data := await raw_queue.get()) is not None:
+        try:
+            movie = process_and_format_movies([data])[0]
+        except (KeyError, ValueError, TypeError) as e:
+            print(f"Skipping malformed payload for movie {data.get('id')}: {e}")
+            continue
+        movie["release_date"] = _parse_release_date(movie["release_date"])
+        await row_queue.put(movie)
+    await row_queue.put(None)
+
+
+def load_checkpoint_ids(checkpoint_path: str) -> Set[int]:
+    """Reads the IDs of movies already stored by previous runs."""
+    stored_ids = set()
+    try:
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    stored_ids.add(json.loads(line)["id"])
+                except (ValueError, KeyError):
+                    # A crash can leave a truncated last line behind.
+                    continue
+    except FileNotFoundError:
+        pass
+    return stored_ids
+
+
+def append_checkpoint(checkpoint_path: str, movies: List[Dict[str, Any]]):
+    with open(checkpoint_path, "a", encoding="utf-8") as f:
+        for movie in movies:
+            f.write(json.dumps(movie, ensure_ascii=False, default=str) + "\n")
+
+
+async def write_movies(row_queue: asyncio.Queue, checkpoint_path: str) -> int:
+    """
+    Stage 4 (writer): Flushes full batches to the database as they fill and
+    checkpoints every movie that was stored successfully.
+    """
+    stored_count = 0
+    batch: List[Dict[str, Any]] = []
+
+    async def flush():
+        nonlocal stored_count
+        async with AsyncSessionLocal() as db:
+            failed = await crud_movie.copy_merge_movies(db, batch)
+        failed_ids = {movie["id"] for movie in failed}
+        stored = [movie for movie in batch if movie["id"] not in failed_ids]
+        append_checkpoint(checkpoint_path, stored)
+        stored_count += len(stored)
+        batch.clear()
+
+    while (movie := await row_queue.get()) is not None:
+        batch.append(movie)
+        if len(batch) >= WRITE_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+    return stored_count
+
+
+async def run_pipeline(produce, checkpoint_path: str = CHECKPOINT_FILE_PATH) -> int:
+    """
+    Wires a producer coroutine function, which fills the raw queue, to the
+    transformer and writer stages. Returns the number of movies stored.
+    """
+    raw_queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_MAX_SIZE)
+    row_queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_MAX_SIZE)
+
+    async def producer():
+        try:
+            await produce(raw_queue)
+        finally:
+            await raw_queue.put(None)
+
+    _, _, stored_count = await asyncio.gather(
+        producer(),
+        transform_movies(raw_queue, row_queue),
+        write_movies(row_queue, checkpoint_path),
+    )
+    return stored_count
 
 
 async def main():
     """Main orchestration function for the entire ingestion process."""
 
     # --- Stage 1: Discover Movie IDs ---
-    async with httpx.AsyncClient(timeout=20.0) as client:
-        existing_db_ids = await crud_movie.get_all_movie_ids(AsyncSessionLocal)
-        print(f"Found {len(existing_db_ids)} movies already in the database.")
+    existing_db_ids = await crud_movie.get_all_movie_ids(AsyncSessionLocal)
+    print(f"Found {len(existing_db_ids)} movies already in the database.")
+    checkpointed_ids = load_checkpoint_ids(CHECKPOINT_FILE_PATH)
+    print(f"Found {len(checkpointed_ids)} movies stored by previous runs.")
 
-        discovered_ids = await discover_movie_ids(client)
-        new_ids_to_fetch = discovered_ids - existing_db_ids
-        print(f"Discovered {len(new_ids_to_fetch)} new movie IDs to fetch.")
+    discovered_ids = await discover_movie_ids()
+    new_ids_to_fetch = discovered_ids - existing_db_ids - checkpointed_ids
+    print(f"Discovered {len(new_ids_to_fetch)} new movie IDs to fetch.")
 
-        if not new_ids_to_fetch:
-            print("No new movies to ingest. Exiting.")
-            return
-
-    # --- Stage 2: Fetch Full Details for New Movies ---
-    async with httpx.AsyncClient(timeout=20.0) as client:
-        full_details = await fetch_full_movie_details(client, new_ids_to_fetch)
-
-    if not full_details:
-        print("Failed to fetch details for any new movies. Exiting.")
+    if not new_ids_to_fetch:
+        print("No new movies to ingest. Exiting.")
+        await tmdb_client.aclose()
         return
 
-    # --- Stage 3: Process and Backup ---
-    movies_to_store = process_and_format_movies(full_details)
-    print(f"Processed {len(movies_to_store)} movies ready for storage.")
-
-    print(f"Backing up data to {BACKUP_FILE_PATH}...")
+    # --- Stages 2-4: Stream details through formatting into the database ---
+    # Discovery and fetching share the pooled TMDb connections.
     try:
-        with open(BACKUP_FILE_PATH, "w", encoding="utf-8") as f:
-            json.dump(movies_to_store, f, ensure_ascii=False, indent=2)
-        print("Backup successful.")
-    except IOError as e:
-        print(f"Warning: Could not write backup file: {e}")
+        stored_count = await run_pipeline(
+            lambda raw_queue: fetch_movie_details(new_ids_to_fetch, raw_queue)
+        )
+    finally:
+        await tmdb_client.aclose()
 
-    from datetime import datetime
+    print(f"Successfully ingested {stored_count} new movies into the database.")
 
-    for movie in movies_to_store:
-        release_date_str = movie.get("release_date")
-        if release_date_str and isinstance(release_date_str, str):
-            try:
-                movie["release_date"] = datetime.fromisoformat(release_date_str).date()
-            except ValueError:
-                movie["release_date"] = None
-        else:
-            movie["release_date"] = None
 
-    # --- Stage 4: Store in Database ---
-    print("Storing new movies in the database...")
-    async with AsyncSessionLocal() as db:
-        await crud_movie.bulk_patch_movies(db, movies_to_store)
+async def reprocess_cached_details():
+    """
+    Re-runs processing and storage from the raw /movie/{id} payloads kept in
+    the on-disk TMDb response cache (TMDB_CACHE_DIR), without calling TMDb.
+    """
 
-    print(f"Successfully ingested {len(movies_to_store)} new movies into the database.")
+    async def produce_cached(raw_queue: asyncio.Queue):
+        for entry in tmdb_client.response_cache.iter_disk_entries("movie"):
+            params = entry["params"]
+            if params.get("append_to_response") == DETAILS_APPEND_TO_RESPONSE:
+                await raw_queue.put(entry["payload"])
+
+    stored_count = await run_pipeline(produce_cached)
+    if not stored_count:
+        print("No cached movie details were stored. Is TMDB_CACHE_DIR set?")
+        return
+    print(f"Successfully reprocessed {stored_count} cached movies.")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TMDb metadata ingestion.")
+    parser.add_argument(
+        "--from-cache",
+        action="store_true",
+        help="Reprocess cached raw TMDb payloads instead of fetching.",
+    )
+    args = parser.parse_args()
+
     print("--- Starting Full Metadata Ingestion Process ---")
-    asyncio.run(main())
+    asyncio.run(reprocess_cached_details() if args.from_cache else main())
     print("--- Metadata Ingestion Process Finished ---")
@@ -0,0 +1,213 @@
+import json
+import logging
+import math
+from pathlib import Path
+from typing import List, NamedTuple
+
+from google import genai
+from google.genai import types
+
+from sqlalchemy import select
+from app.core.database import SessionLocal
+from app.core.redis import sync_get_redis_client
+from app.crud import crud_cache, crud_recommendation
+from app.models.movie import Movie
+from app.services import llm_client
+from app.utils import trigger_keys
+from scripts.generate_keywords.batch_processing import (
+    initialize_genai_client,
+    log_job_to_manifest,
+    prepare_manifest_file,
+)
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+REQUESTS_PER_BATCH = 1500
+# How much of the request log to precompute: the most requested movies and,
+# for each, its most requested keyword selections.
+TOP_MOVIES = 200
+KEYWORD_SETS_PER_MOVIE = 5
+MIN_REQUEST_COUNT = 2
+
+ARTIFACTS_DIR = Path(__file__).parent / "artifacts"
+BATCH_REQUESTS_DIR = ARTIFACTS_DIR / "batch_requests"
+BATCH_MANIFEST_PATH = ARTIFACTS_DIR / "batch_job_manifest.csv"
+
+
+class Candidate(NamedTuple):
+    id: int  # source movie id, named like the rows the manifest helpers expect
+    trigger_hash: str
+    keywords: List[str]
+
+
+def select_candidates(top_movies: int, sets_per_movie: int) -> List[Candidate]:
+    """
+    Picks the most requested (movie, keyword selection) pairs from the
+    request log that have no cached or stored result yet.
+    """
+    candidates = []
+    with sync_get_redis_client() as redis_client:
+        for movie_id, _ in crud_cache.sync_get_most_requested_movies(
+            redis_client, top_movies
+        ):
+            for keywords, count in crud_cache.sync_get_most_requested_keywords(
+                redis_client, movie_id, sets_per_movie
+            ):
+                if count < MIN_REQUEST_COUNT:
+                    break
+                trigger_hash = trigger_keys.build_trigger_hash(movie_id, keywords)
+                if not crud_cache.sync_has_cached_llm_recommendation(
+                    redis_client, trigger_hash
+                ):
+                    candidates.append(Candidate(movie_id, trigger_hash, keywords))
+
+    with SessionLocal() as session:
+        stored = crud_recommendation.get_stored_trigger_hashes(
+            session, [candidate.trigger_hash for candidate in candidates]
+        )
+    candidates = [c for c in candidates if c.trigger_hash not in stored]
+    logging.info(f"Selected {len(candidates)} keyword selections to precompute.")
+    return candidates
+
+
+def prepare_batch_requests(candidates: List[Candidate]) -> list:
+    """
+    Prepares Gemini API requests with the same prompt and generation settings
+    as the live `llm_client` calls.
+    """
+    with SessionLocal() as session:
+        movies = session.execute(
+            select(Movie).where(Movie.id.in_({c.id for c in candidates}))
+        ).scalars()
+        movies_by_id = {movie.id: movie for movie in movies}
+
+        requests_to_process = []
+        for candidate in candidates:
+            movie = movies_by_id.get(candidate.id)
+            if not movie or not movie.release_date:
+                continue
+            user_prompt_text = llm_client.build_user_prompt(movie, candidate.keywords)
+            request_data = {
+                # The key is echoed back in the results, so it carries
+                # everything needed to store and cache the response.
+                "key": json.dumps(
+                    {
+                        "movie_id": candidate.id,
+                        "trigger_hash": candidate.trigger_hash,
+                        "keywords": candidate.keywords,
+                    }
+                ),
+                "request": {
+                    "system_instruction": {"parts": [{"text": llm_client.PROMPT_TXT}]},
+                    "contents": [
+                        {"role": "user", "parts": [{"text": user_prompt_text}]}
+                    ],
+                    "tools": [{"google_search": {}}],
+                    "generation_config": {
+                        "temperature": llm_client.TEMPERATURE,
+                        "thinking_config": {
+                            "thinking_budget": llm_client.THINKING_BUDGET
+                        },
+                    },
+                },
+            }
+            requests_to_process.append(request_data)
+    return requests_to_process
+
+
+def create_batch_request_file(requests: list, batch_index: int) -> str:
+    """Writes a list of requests to a uniquely named JSONL file."""
+    input_file_name = f"{BATCH_REQUESTS_DIR}/rec_batch_request_{batch_index}.jsonl"
+    try:
+        with open(input_file_name, "w") as f:
+            for req in requests:
+                f.write(json.dumps(req) + "\n")
+        logging.info(f"Created JSONL file for batch {batch_index}: {input_file_name}")
+        return input_file_name
+    except IOError as e:
+        logging.error(
+            f"Failed to write to {input_file_name} for batch {batch_index}: {e}"
+        )
+        raise
+
+
+def submit_batch_job(
+    client: genai.Client, input_file_name: str, batch_index: int
+) -> tuple[types.BatchJob, str] | None:
+    """Uploads a request file and creates a Gemini batch job."""
+    try:
+        logging.info(f"Uploading {input_file_name}...")
+        uploaded_file = client.files.upload(
+            file=input_file_name,
+            config=types.UploadFileConfig(
+                display_name="recommendation-requests", mime_type="jsonl"
+            ),
+        )
+        logging.info(f"File for batch {batch_index} uploaded: {uploaded_file.name}")
+
+        logging.info(f"Creating batch job for batch {batch_index}...")
+        file_batch_job = client.batches.create(
+            model=llm_client.MODEL,
+            src=uploaded_file.name,
+            config={"display_name": f"recommendations-job-part-{batch_index}"},
+        )
+        logging.info(
+            f"Successfully created batch job {batch_index}: {file_batch_job.name}"
+        )
+        return file_batch_job, uploaded_file.name
+    except Exception as e:
+        logging.error(f"Failed to process batch {batch_index}. Error: {e}")
+        return None
+
+
+def create_recommendation_batch_jobs(
+    top_movies: int = TOP_MOVIES, sets_per_movie: int = KEYWORD_SETS_PER_MOVIE
+):
+    """
+    Selects the most requested keyword selections without a cached result
+    and creates Gemini Batch API jobs for them, tracked in a manifest file.
+    """
+    logging.info("Starting recommendation batch job creation process.")
+
+    candidates = select_candidates(top_movies, sets_per_movie)
+    if not candidates:
+        logging.warning("Nothing to precompute. Exiting.")
+        return
+
+    client = initialize_genai_client()
+    if not client:
+        return
+
+    try:
+        prepare_manifest_file(BATCH_MANIFEST_PATH)
+    except IOError:
+        return
+
+    total_batches = math.ceil(len(candidates) / REQUESTS_PER_BATCH)
+    for i in range(0, len(candidates), REQUESTS_PER_BATCH):
+        chunk = candidates[i : i + REQUESTS_PER_BATCH]
+        batch_index = (i // REQUESTS_PER_BATCH) + 1
+        logging.info(f"--- Processing Batch {batch_index}/{total_batches} ---")
+
+        try:
+            requests = prepare_batch_requests(chunk)
+            if not requests:
+                continue
+            input_file_name = create_batch_request_file(requests, batch_index)
+
+            job_result = submit_batch_job(client, input_file_name, batch_index)
+            if job_result:
+                job, uploaded_file_name = job_result
+                log_job_to_manifest(
+                    BATCH_MANIFEST_PATH, job.name, uploaded_file_name, chunk
+                )
+
+        except Exception as e:
+            logging.error(
+                f"An error occurred while processing batch {batch_index}: {e}"
+            )
+            continue
+
+    logging.info("All batches have been processed and submitted.")
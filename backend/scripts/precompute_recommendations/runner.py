@@ -0,0 +1,73 @@
+"""
+Off-peak precomputation of LLM recommendations through the Gemini Batch API.
+
+Meant to run overnight, e.g. from cron:
+    0 2 * * * cd backend && python -m scripts.precompute_recommendations.runner
+"""
+
+from .batch_processing import (
+    BATCH_MANIFEST_PATH,
+    KEYWORD_SETS_PER_MOVIE,
+    TOP_MOVIES,
+    create_recommendation_batch_jobs,
+)
+from .save_recommendations import RESULTS_DIR, process_results_and_cache
+from scripts.generate_keywords.monitor_jobs import monitor_all_batch_jobs
+import logging
+import argparse
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main():
+    """
+    Main function to run the recommendation precomputation steps.
+    """
+    parser = argparse.ArgumentParser(
+        description="Recommendation Precomputation Runner.",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    parser.add_argument(
+        "--run-batch", action="store_true", help="Run only the batch job creation step."
+    )
+    parser.add_argument(
+        "--monitor", action="store_true", help="Run only the job monitoring step."
+    )
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="Run only the results processing and caching step.",
+    )
+    parser.add_argument("--top-movies", type=int, default=TOP_MOVIES)
+    parser.add_argument("--sets-per-movie", type=int, default=KEYWORD_SETS_PER_MOVIE)
+
+    args = parser.parse_args()
+
+    run_specific_step = args.run_batch or args.monitor or args.save
+
+    try:
+        if not run_specific_step or args.run_batch:
+            logging.info("Executing: Create recommendation batch jobs...")
+            create_recommendation_batch_jobs(args.top_movies, args.sets_per_movie)
+            logging.info("Completed: Create recommendation batch jobs.")
+
+        if not run_specific_step or args.monitor:
+            logging.info("Executing: Monitor all batch jobs...")
+            RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+            monitor_all_batch_jobs(BATCH_MANIFEST_PATH, RESULTS_DIR)
+            logging.info("Completed: Monitor all batch jobs.")
+
+        if not run_specific_step or args.save:
+            logging.info("Executing: Process results and cache them...")
+            process_results_and_cache()
+            logging.info("Completed: Process results and cache them.")
+
+    except Exception as e:
+        logging.error(
+            f"An unexpected error occurred during script execution: {e}", exc_info=True
+        )
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import json
+import logging
+from pathlib import Path
+
+from app.core import async_runtime
+from app.core.database import SessionLocal
+from app.core.redis import sync_get_redis_client
+from app.crud import crud_cache, crud_recommendation
+from app.services import recommendation_store
+from app.utils import llm_parser
+from scripts.generate_keywords.save_keywords import read_jsonl
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+RESULTS_DIR = Path(__file__).parent / "batch_results"
+
+
+def _response_text(response: dict) -> str:
+    candidates = response.get("candidates", [])
+    if not candidates:
+        return ""
+    parts = candidates[0].get("content", {}).get("parts", [])
+    return "".join(part.get("text", "") for part in parts)
+
+
+def _already_available(trigger_hash: str) -> bool:
+    """A live request may have produced (or be producing) the result since."""
+    with sync_get_redis_client() as redis_client:
+        if crud_cache.sync_has_cached_llm_recommendation(
+            redis_client, trigger_hash
+        ) or redis_client.exists(crud_cache.get_llm_rec_lock_key(trigger_hash)):
+            return True
+    with SessionLocal() as db:
+        return bool(crud_recommendation.get_stored_trigger_hashes(db, [trigger_hash]))
+
+
+def process_results_and_cache():
+    """
+    Parses the batch results, then enriches, stores and caches them exactly
+    like a live generation, so daytime requests hit the warm cache.
+    """
+    jsonl_files = list(RESULTS_DIR.glob("*.jsonl"))
+
+    if not jsonl_files:
+        logging.warning(f"No .jsonl files found in {RESULTS_DIR}. Exiting.")
+        return
+
+    logging.info(f"Found {len(jsonl_files)} result files to process.")
+
+    for result_file_path in jsonl_files:
+        logging.info(f"--- Processing file: {result_file_path.name} ---")
+        cached_count = 0
+
+        for data in read_jsonl(result_file_path):
+            try:
+                key = json.loads(data["key"])
+                movie_id = key["movie_id"]
+                trigger_hash = key["trigger_hash"]
+                keywords = key["keywords"]
+
+                parsed_recs = llm_parser.parse_llm_recommendations(
+                    _response_text(data.get("response") or {})
+                )
+                if not parsed_recs or not parsed_recs.get("movies"):
+                    logging.warning(f"No recommendations parsed for {trigger_hash}.")
+                    continue
+
+                if _already_available(trigger_hash):
+                    continue
+
+                cached_data = async_runtime.run_sync(
+                    recommendation_store.store_recommendation_batch(
+                        movie_id, trigger_hash, parsed_recs["movies"]
+                    )
+                )
+                async_runtime.run_sync(
+                    recommendation_store.store_recommendation_set(
+                        movie_id, trigger_hash, keywords, cached_data
+                    )
+                )
+                with sync_get_redis_client() as redis_client:
+                    crud_cache.sync_cache_and_announce_llm_recommendation(
+                        redis_client, trigger_hash, cached_data, movie_id, keywords
+                    )
+                cached_count += 1
+            except (json.JSONDecodeError, KeyError, TypeError) as e:
+                logging.error(
+                    f"Error parsing data in {result_file_path.name}: {data}. Error: {e}"
+                )
+            except Exception as e:
+                logging.error(
+                    f"Failed to store results in {result_file_path.name}: {e}"
+                )
+
+        logging.info(
+            f"Cached {cached_count} precomputed recommendations from {result_file_path.name}."
+        )
+
+    logging.info("All result files have been processed.")
+
+
+if __name__ == "__main__":
+    process_results_and_cache()
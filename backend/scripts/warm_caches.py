@@ -0,0 +1,26 @@
+"""
+Prefills Redis with the hot set (trending pages, the most requested movie
+documents and their LLM results), e.g. right after a Redis failover and
+before traffic is shifted back:
+
+    python -m scripts.warm_caches
+"""
+
+import os
+import sys
+import asyncio
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from app.core.tmdb_client import tmdb_client
+from app.services import cache_warmer
+
+
+async def main():
+    try:
+        await cache_warmer.warm_caches()
+    finally:
+        await tmdb_client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
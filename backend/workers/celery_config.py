@@ -1,4 +1,6 @@
 from celery import Celery
+from celery.signals import worker_shutdown
+from app.core import async_runtime
 from app.core.config import settings
 
 celery_app = Celery(
@@ -11,4 +13,20 @@ celery_app.conf.task_routes = {
     "workers.llm_tasks.*": {"queue": "llm_queue"},
 }
 
+# Lets LLM tasks jump the queue by priority (lower runs first), see
+# `app.services.llm_scheduler`. Prefetching one task per slot keeps queued
+# tasks in Redis, where a later high-priority task can still overtake them.
+celery_app.conf.broker_transport_options = {
+    "priority_steps": list(range(10)),
+    "sep": ":",
+    "queue_order_strategy": "priority",
+}
+celery_app.conf.worker_prefetch_multiplier = 1
+
 celery_app.autodiscover_tasks(["workers.ingestion_tasks", "workers.llm_tasks"])
+
+
+@worker_shutdown.connect
+def shutdown_async_runtime(**kwargs):
+    """Closes the pooled async clients of the tasks and stops their loop."""
+    async_runtime.shutdown()
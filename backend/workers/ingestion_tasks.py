@@ -1,13 +1,16 @@
+import asyncio
 import logging
 from tqdm import tqdm
-from typing import List, Dict, Any
-from app.core.database import SessionLocal
+from typing import List, Dict, Any, Optional, Tuple
+from app.core import async_runtime
+from app.core.database import AsyncSessionLocal
 from datetime import datetime
 from app.core.config import settings
 from app.crud import crud_movie, crud_processing_queue
 from app.models.processing_queue import TriggerSource, ProcessingStatus
 from app.models.movie import MovieVisibility
 from app.core.tmdb_client import tmdb_client
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 logging.basicConfig(level=logging.INFO)
@@ -15,6 +18,139 @@ logger = logging.getLogger(__name__)
 
 from .celery_config import celery_app
 
+# The async TMDb client lives on the shared event loop for the lifetime of
+# the worker, its pooled connections are closed when the worker stops.
+async_runtime.on_shutdown(tmdb_client.aclose)
+
+# Upper bound on TMDb lookups in flight for one task. The TMDb client's rate
+# limiter still decides how fast they actually go out.
+RESOLVE_CONCURRENCY = 32
+# Resolved rows are written back every time this many results have completed.
+WRITE_BATCH_SIZE = 100
+
+
+def _failed(movie: Dict[str, Any], reason: str) -> Dict[str, Any]:
+    return {
+        "id": movie["id"],
+        "status": ProcessingStatus.FAILED,
+        "failure_reason": reason,
+    }
+
+
+def _build_movie_row(
+    movie: Dict[str, Any],
+    movie_data: Optional[Dict[str, Any]],
+    genre_map: Dict[int, str],
+) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Turns a TMDb search result for a queued movie into the row to create (if
+    any) and the processing-queue update for it.
+    """
+    if not movie_data:
+        return None, _failed(movie, "NOT_FOUND")
+
+    genres = [
+        {"id": gid, "name": genre_map.get(gid, "Unknown")}
+        for gid in movie_data.get("genre_ids", [])
+    ]
+
+    release_date_str = movie_data.get("release_date", "")
+    if not release_date_str:
+        return None, _failed(movie, "NO_RELEASE_DATE")
+
+    release_date = datetime.fromisoformat(release_date_str).date()
+    release_year = release_date.year
+    if release_date >= datetime.now().date():
+        return None, _failed(movie, "FUTURE_RELEASE")
+
+    movie_row = {
+        "id": movie_data.get("id"),
+        "title": movie_data.get("title"),
+        "overview": movie_data.get("overview"),
+        "release_date": release_date,
+        "release_year": release_year,
+        "poster_path": movie_data.get("poster_path"),
+        "backdrop_path": movie_data.get("backdrop_path"),
+        "genres": genres,
+        "additional_keywords": [
+            kw.capitalize()
+            for kw in (movie["properties"] or {}).get("justification_keywords", [])
+        ],
+        "vote_count": movie_data.get("vote_count"),
+        "vote_average": movie_data.get("vote_average"),
+        "visibility": MovieVisibility.PRIVATE,
+    }
+    process_update = {
+        "id": movie["id"],
+        "source_movie_id": movie_data.get("id"),
+        "status": ProcessingStatus.COMPLETED,
+    }
+    return movie_row, process_update
+
+
+async def _resolve_movie(
+    movie: Dict[str, Any], genre_map: Dict[int, str], semaphore: asyncio.Semaphore
+) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    """Resolves a single queued movie against TMDb. Never raises."""
+    if movie["release_year"] > datetime.now().year:
+        return None, _failed(movie, "FUTURE_RELEASE")
+
+    try:
+        async with semaphore:
+            movie_data = await tmdb_client.search_movie(
+                query=movie["title"], release_year=movie["release_year"]
+            )
+        return _build_movie_row(movie, movie_data, genre_map)
+    except Exception as e:
+        logger.error(
+            f"Failed to resolve '{movie['title']}' ({movie['release_year']}): {e}"
+        )
+        return None, _failed(movie, "LOOKUP_ERROR")
+
+
+async def _write_results(
+    db: AsyncSession,
+    movies_to_create: List[Dict[str, Any]],
+    processes_to_update: List[Dict[str, Any]],
+):
+    await crud_movie.bulk_create_movies(db, movies_to_create)
+    await crud_processing_queue.bulk_patch_process(db, processes_to_update)
+    logger.info(
+        f"Wrote back {len(processes_to_update)} results, "
+        f"{len(movies_to_create)} new movies."
+    )
+
+
+async def _resolve_pending_movies(
+    db: AsyncSession, pending_movies: List[Dict[str, Any]]
+):
+    """
+    Fans the TMDb lookups out with bounded concurrency and writes results
+    back in batches as they complete, instead of once at the very end.
+    """
+    movies_to_create: List[Dict[str, Any]] = []
+    processes_to_update: List[Dict[str, Any]] = []
+
+    genre_map = await tmdb_client.get_genre_map()
+    semaphore = asyncio.Semaphore(RESOLVE_CONCURRENCY)
+    tasks = [_resolve_movie(movie, genre_map, semaphore) for movie in pending_movies]
+
+    for task in tqdm(
+        asyncio.as_completed(tasks), total=len(tasks), desc="Processing movies"
+    ):
+        movie_row, process_update = await task
+        if movie_row:
+            movies_to_create.append(movie_row)
+        processes_to_update.append(process_update)
+
+        if len(processes_to_update) >= WRITE_BATCH_SIZE:
+            # Lookups already in flight keep going while the batch is written.
+            await _write_results(db, movies_to_create, processes_to_update)
+            movies_to_create, processes_to_update = [], []
+
+    if processes_to_update:
+        await _write_results(db, movies_to_create, processes_to_update)
+
 
 @celery_app.task(
     name="tasks.ingest_recommended_movies",
@@ -22,22 +158,31 @@ from .celery_config import celery_app
     retry_kwargs={"max_retries": 2, "countdown": 60},
 )
 def ingest_recommended_movies():
-    movies_to_create: List[Dict[str, Any]] = []
-    processes_to_update: List[Dict[str, Any]] = []
+    async_runtime.run_sync(_ingest_recommended_movies())
+
 
-    with SessionLocal() as db:
+async def _ingest_recommended_movies():
+    async with AsyncSessionLocal() as db:
         try:
-            pending_movies = crud_processing_queue.get_movies_by_sources(
-                db, [TriggerSource.RECOMMENDATION]
-            )
-            crud_processing_queue.bulk_patch_process(
+            # Plain dicts, so the concurrent lookups never touch the session.
+            pending_movies = [
+                {
+                    "id": movie.id,
+                    "title": movie.title,
+                    "release_year": movie.release_year,
+                    "properties": movie.properties,
+                }
+                for movie in await crud_processing_queue.get_movies_by_sources(
+                    db, [TriggerSource.RECOMMENDATION]
+                )
+            ]
+            await crud_processing_queue.bulk_patch_process(
                 db,
                 [
-                    {"id": movie.id, "status": ProcessingStatus.PROCESSING}
+                    {"id": movie["id"], "status": ProcessingStatus.PROCESSING}
                     for movie in pending_movies
                 ],
             )
-            db.commit()
 
             if not pending_movies:
                 logger.warning(
@@ -45,96 +190,10 @@ def ingest_recommended_movies():
                 )
                 return
 
-            genre_map = tmdb_client.get_genre_map()
-            for movie in tqdm(pending_movies, desc="Processing movies"):
-                if movie.release_year > datetime.now().year:
-                    processes_to_update.append(
-                        {
-                            "id": movie.id,
-                            "status": ProcessingStatus.FAILED,
-                            "failure_reason": "FUTURE_RELEASE",
-                        }
-                    )
-                    continue
-                movie_data = tmdb_client.search_movie(
-                    query=movie.title, release_year=movie.release_year
-                )
-                if not movie_data:
-                    processes_to_update.append(
-                        {
-                            "id": movie.id,
-                            "status": ProcessingStatus.FAILED,
-                            "failure_reason": "NOT_FOUND",
-                        }
-                    )
-                    continue
-
-                genres = [
-                    {"id": gid, "name": genre_map.get(gid, "Unknown")}
-                    for gid in movie_data.get("genre_ids", [])
-                ]
-
-                release_date_str = movie_data.get("release_date", "")
-                if not release_date_str:
-                    processes_to_update.append(
-                        {
-                            "id": movie.id,
-                            "status": ProcessingStatus.FAILED,
-                            "failure_reason": "NO_RELEASE_DATE",
-                        }
-                    )
-                    continue
-
-                release_date = datetime.fromisoformat(release_date_str).date()
-                release_year = release_date.year
-                if release_date < datetime.now().date():
-                    movies_to_create.append(
-                        {
-                            "id": movie_data.get("id"),
-                            "title": movie_data.get("title"),
-                            "overview": movie_data.get("overview"),
-                            "release_date": release_date,
-                            "release_year": release_year,
-                            "poster_path": movie_data.get("poster_path"),
-                            "backdrop_path": movie_data.get("backdrop_path"),
-                            "genres": genres,
-                            "additional_keywords": [
-                                kw.capitalize()
-                                for kw in movie.properties.get(
-                                    "justification_keywords", []
-                                )
-                            ],
-                            "vote_count": movie_data.get("vote_count"),
-                            "vote_average": movie_data.get("vote_average"),
-                            "visibility": MovieVisibility.PRIVATE,
-                        }
-                    )
-
-                    processes_to_update.append(
-                        {
-                            "id": movie.id,
-                            "source_movie_id": movie_data.get("id"),
-                            "status": ProcessingStatus.COMPLETED,
-                        }
-                    )
-                else:
-                    processes_to_update.append(
-                        {
-                            "id": movie.id,
-                            "status": ProcessingStatus.FAILED,
-                            "failure_reason": "FUTURE_RELEASE",
-                        }
-                    )
-
-            logger.info(f"Connecting to DB to ingest {len(movies_to_create)} movies.")
-            crud_movie.bulk_create_movies(db, movies_to_create)
-            logger.info(f"Successfully ingested {len(movies_to_create)} movies.")
-
-            crud_processing_queue.bulk_patch_process(db, processes_to_update)
-
-            db.commit()
+            logger.info(f"Resolving {len(pending_movies)} movies against TMDb.")
+            await _resolve_pending_movies(db, pending_movies)
             logger.info("Database ingestion successful.")
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             logger.error(f"Database ingestion failed: {e}")
             raise
@@ -1,31 +1,37 @@
 import logging
-from celery import Celery
-from celery.signals import worker_shutdown
-from neo4j import Driver, GraphDatabase
-from typing import List, Dict, Any
-from app.core.database import SessionLocal
-from datetime import datetime
+import random
+import time
+import redis.asyncio as redis
+from neo4j import AsyncDriver, AsyncGraphDatabase
+from typing import Awaitable, List, Dict, Any, Optional, Callable, Tuple
+from app.core.database import AsyncSessionLocal
 from app.core.config import settings
 from app.crud import crud_vote, crud_movie, crud_cache, crud_recommendation
-from app.core.tmdb_client import tmdb_client
-from app.services import llm_client
-from app.core.redis import sync_get_redis_client
+from app.services import llm_client, llm_scheduler, recommendation_store
+from app.core import async_runtime
+from app.core.redis import redis_pool, sync_get_redis_client
 from app.utils import llm_parser
+from app import schemas
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 from .celery_config import celery_app
 
+# Task bodies are coroutines run on the worker's shared event loop (see
+# `app.core.async_runtime`), so every in-flight task multiplexes its
+# database, Redis, Neo4j and Gemini I/O on one loop. The Celery task
+# functions only do the bookkeeping that needs the task request.
 
-neo4j_driver: Driver = None
+neo4j_driver: AsyncDriver = None
 
 
-def get_neo4j_driver():
+async def get_neo4j_driver() -> AsyncDriver:
+    """The worker's async Neo4j driver, created on the shared event loop."""
     global neo4j_driver
-    if neo4j_driver is None or neo4j_driver._closed:
+    if neo4j_driver is None:
         try:
-            neo4j_driver = GraphDatabase.driver(
+            neo4j_driver = AsyncGraphDatabase.driver(
                 settings.NEO4J_URI,
                 auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD),
                 keep_alive=True,
@@ -38,14 +44,12 @@ def get_neo4j_driver():
     return neo4j_driver
 
 
-DRIVER = get_neo4j_driver()
-
-
-@worker_shutdown.connect
-def shutdown_neo4j_driver(**kwargs):
+@async_runtime.on_shutdown
+async def shutdown_neo4j_driver():
     global neo4j_driver
     if neo4j_driver:
-        neo4j_driver.close()
+        await neo4j_driver.close()
+        neo4j_driver = None
         logger.info("Neo4j driver for Celery worker shut down.")
 
 
@@ -62,88 +66,318 @@ def process_similarity_vote(self, movie_id_1: int, movie_id_2: int):
     """
     logger.info(f"Processing similarity vote between {movie_id_1} and {movie_id_2}")
     try:
-        global DRIVER
-        if not DRIVER or DRIVER._closed:
-            DRIVER = get_neo4j_driver()
-
-        try:
-            with SessionLocal() as db:
-                if rec_id := crud_recommendation.is_recommendation(
-                    db, movie_id_1, movie_id_2
-                ):
-                    crud_recommendation.increment_recommendation_vote(db, rec_id)
-        except Exception as e:
-            logger.error(
-                f"Failed to increment recommendation vote for {movie_id_1}, {movie_id_2}: {e}"
-            )
-            pass
-
-        success = crud_vote.process_similarity_vote_in_graph(
-            DRIVER, movie_id_1, movie_id_2
+        async_runtime.run_sync(_process_similarity_vote(movie_id_1, movie_id_2))
+    except Exception as e:
+        logger.error(
+            f"Task failed for vote between ({movie_id_1}, {movie_id_2}). Error: {e}"
         )
+        raise self.retry(exc=e)
 
-        if success:
-            logger.info("Successfully processed vote and updated effective_score.")
-        else:
-            logger.warning("Vote processing failed for an unknown reason.")
 
+async def _process_similarity_vote(movie_id_1: int, movie_id_2: int):
+    try:
+        async with AsyncSessionLocal() as db:
+            if recommendation := await crud_recommendation.is_recommendation(
+                db, movie_id_1, movie_id_2
+            ):
+                await crud_recommendation.increment_recommendation_vote(
+                    db, recommendation.id
+                )
     except Exception as e:
         logger.error(
-            f"Task failed for vote between ({movie_id_1}, {movie_id_2}). Error: {e}"
+            f"Failed to increment recommendation vote for {movie_id_1}, {movie_id_2}: {e}"
         )
-        raise self.retry(exc=e)
 
+    success = await crud_vote.process_similarity_vote_in_graph(
+        await get_neo4j_driver(), movie_id_1, movie_id_2
+    )
 
-@celery_app.task(
-    name="tasks.generate_and_cache_llm_rec",
-    autoretry_for=(Exception,),
-    retry_kwargs={"max_retries": 2, "countdown": 120},
-)
+    if success:
+        logger.info("Successfully processed vote and updated effective_score.")
+    else:
+        logger.warning("Vote processing failed for an unknown reason.")
+
+
+LLM_REC_MAX_RETRIES = 2
+# Retries back off exponentially with jitter, so an outage does not turn
+# into synchronized waves of retries.
+LLM_REC_RETRY_BASE_SECONDS = 30
+# Recommendations are enriched, stored and pushed to stream subscribers in
+# batches of this size as soon as the LLM has produced them.
+LLM_REC_STREAM_BATCH_SIZE = 5
+
+
+class LLMCallError(Exception):
+    """The Gemini call itself failed, as opposed to handling its output."""
+
+
+@celery_app.task(name="tasks.generate_and_cache_llm_rec", bind=True)
 def generate_and_cache_llm_rec(
-    source_movie_id: int, keywords: List[str], trigger_hash: str
+    self,
+    source_movie_id: int,
+    keywords: List[str],
+    trigger_hash: str,
+    lock_token: Optional[str] = None,
+    lane: str = llm_scheduler.INTERACTIVE,
+    enqueued_at: Optional[float] = None,
 ):
-    print("Generating LLM recommendations...")
-    with SessionLocal() as db:
-        print(
-            f"Generating LLM recommendations for movie ID {source_movie_id} with keywords {keywords}."
+    """
+    Generates, stores and caches the LLM recommendations for a trigger hash.
+    Calls go through the LLM scheduler: they wait for the per-minute token
+    budget and fail fast while the circuit breaker is open, leaving clients
+    with the vector results they already have. The in-flight lock taken by
+    the API is released once the result is cached, or once it is given up.
+    """
+    enqueued_at = enqueued_at or time.time()
+    with sync_get_redis_client() as redis_client:
+        if llm_scheduler.sync_is_circuit_open(redis_client):
+            logger.warning(f"LLM circuit is open, giving up on {trigger_hash}.")
+            async_runtime.run_sync(_give_up(trigger_hash, lock_token))
+            return
+        wait = llm_scheduler.sync_reserve_tokens(
+            redis_client, lane, settings.LLM_REC_ESTIMATED_TOKENS
+        )
+        if not wait and not self.request.retries:
+            llm_scheduler.sync_record_queue_wait(
+                redis_client, lane, time.time() - enqueued_at
+            )
+
+    if wait:
+        _defer(self, lane, enqueued_at, wait, trigger_hash, lock_token)
+        return
+
+    usage = {}
+    try:
+        async_runtime.run_sync(
+            _generate_and_cache_llm_rec(
+                source_movie_id,
+                keywords,
+                trigger_hash,
+                usage,
+                retrying=bool(self.request.retries),
+            )
         )
-        movie = crud_movie.sync_get_movie_by_id(db, source_movie_id)
+    except Exception as e:
+        circuit_open = isinstance(e, LLMCallError) and _record_llm_failure()
+        if circuit_open or self.request.retries >= LLM_REC_MAX_RETRIES:
+            async_runtime.run_sync(_give_up(trigger_hash, lock_token))
+            raise
+        countdown = LLM_REC_RETRY_BASE_SECONDS * 2**self.request.retries
+        raise self.retry(
+            exc=e,
+            countdown=countdown + random.uniform(0, LLM_REC_RETRY_BASE_SECONDS),
+            max_retries=LLM_REC_MAX_RETRIES,
+            priority=llm_scheduler.RETRY_PRIORITY,
+        )
+    finally:
+        _settle_tokens(usage)
+    _record_llm_success()
+    async_runtime.run_sync(_release_llm_rec_lock(trigger_hash, lock_token))
 
-    llm_raw_output = llm_client.generate_recommendations(movie, keywords)
-    parsed_recs = llm_parser.parse_llm_recommendations(llm_raw_output)
 
-    print(
-        f"Parsed {len(parsed_recs.get("movies", []))} recommendations from LLM output."
+def _defer(
+    task,
+    lane: str,
+    enqueued_at: float,
+    wait: float,
+    trigger_hash: str,
+    lock_token: Optional[str],
+):
+    """
+    Re-enqueues a task that found the token budget used up for when the
+    next window starts, or gives up once it has waited too long.
+    """
+    if time.time() + wait - enqueued_at > settings.LLM_REC_MAX_QUEUE_WAIT_SECONDS:
+        logger.warning(f"LLM token budget exhausted, giving up on {trigger_hash}.")
+        async_runtime.run_sync(_give_up(trigger_hash, lock_token))
+        return
+
+    logger.info(f"LLM token budget exhausted, deferring {trigger_hash} by {wait:.0f}s.")
+    task.apply_async(
+        args=task.request.args,
+        kwargs={**(task.request.kwargs or {}), "enqueued_at": enqueued_at},
+        # Jitter, so deferred tasks do not all hit the new window at once.
+        countdown=wait + random.uniform(0, 5),
+        # A deferred retry keeps its retry count, so it does not get a fresh
+        # retry budget and still cleans up the failed attempt's rows.
+        retries=task.request.retries,
+        priority=(
+            llm_scheduler.RETRY_PRIORITY
+            if task.request.retries
+            else llm_scheduler.LANE_PRIORITIES[lane]
+        ),
+        queue="llm_queue",
     )
 
-    with SessionLocal() as db:
-        enriched_recs = crud_movie.enrich_recommendations_with_db_data(db, parsed_recs)
+
+async def _give_up(trigger_hash: str, lock_token: Optional[str]):
+    await _publish_stream_event(trigger_hash, {"seq": 0, "type": "error"})
+    await _announce_failure(trigger_hash)
+    await _release_llm_rec_lock(trigger_hash, lock_token)
+
+
+def _record_llm_failure() -> bool:
+    try:
+        with sync_get_redis_client() as redis_client:
+            return llm_scheduler.sync_record_failure(redis_client)
+    except Exception as e:
+        logger.error(f"Failed to record LLM failure: {e}")
+        return False
+
+
+def _record_llm_success():
+    try:
+        with sync_get_redis_client() as redis_client:
+            llm_scheduler.sync_record_success(redis_client)
+    except Exception as e:
+        logger.error(f"Failed to record LLM success: {e}")
+
+
+def _settle_tokens(usage: Dict[str, int]):
+    if not usage.get("total_tokens"):
+        # Unknown usage: the estimate stays reserved.
+        return
+    try:
+        with sync_get_redis_client() as redis_client:
+            llm_scheduler.sync_settle_tokens(
+                redis_client, settings.LLM_REC_ESTIMATED_TOKENS, usage["total_tokens"]
+            )
+    except Exception as e:
+        logger.error(f"Failed to settle LLM token usage: {e}")
+
+
+async def _release_llm_rec_lock(trigger_hash: str, lock_token: Optional[str]):
+    if not lock_token:
+        return
+    try:
+        async with redis.Redis(connection_pool=redis_pool) as redis_client:
+            await crud_cache.release_lock(
+                redis_client, crud_cache.get_llm_rec_lock_key(trigger_hash), lock_token
+            )
+    except Exception as e:
+        # The lock still expires on its own.
+        logger.error(f"Failed to release LLM rec lock for {trigger_hash}: {e}")
+
+
+async def _publish_stream_event(trigger_hash: str, event: Dict[str, Any]):
+    try:
+        async with redis.Redis(connection_pool=redis_pool) as redis_client:
+            await crud_cache.publish_llm_rec_event(redis_client, trigger_hash, event)
+    except Exception as e:
+        # Subscribers fall back to the cached result.
+        logger.error(f"Failed to publish LLM rec stream event for {trigger_hash}: {e}")
+
+
+async def _announce_failure(trigger_hash: str):
+    try:
+        async with redis.Redis(connection_pool=redis_pool) as redis_client:
+            await crud_cache.announce_llm_rec_failure(redis_client, trigger_hash)
+    except Exception as e:
+        logger.error(f"Failed to announce LLM rec failure for {trigger_hash}: {e}")
+
+
+async def _reset_partial_generation(trigger_hash: str):
+    """Drops what a failed attempt already stored and streamed."""
+    async with AsyncSessionLocal() as db:
+        await crud_recommendation.delete_recommendations_by_trigger_hash(
+            db, trigger_hash
+        )
+    async with redis.Redis(connection_pool=redis_pool) as redis_client:
+        await crud_cache.reset_llm_rec_stream(redis_client, trigger_hash)
+    await _publish_stream_event(trigger_hash, {"seq": 0, "type": "reset"})
+
+
+async def _llm_chunks(movie, keywords: List[str], usage: Dict[str, int]):
+    """The Gemini response stream, with its own failures raised as LLMCallError."""
+    try:
+        async for chunk in llm_client.astream_recommendations(movie, keywords, usage):
+            yield chunk
+    except Exception as e:
+        raise LLMCallError(f"Gemini call failed: {e!r}") from e
+
+
+async def _stream_recommendations(
+    movie,
+    keywords: List[str],
+    on_batch: Callable[[List[Dict[str, Any]]], Awaitable[None]],
+    usage: Dict[str, int],
+) -> Tuple[str, int]:
+    """
+    Streams the LLM response and hands completed movie objects to
+    `on_batch` as they are parsed. Returns the raw output and the number of
+    movies parsed incrementally.
+    """
+    parser = llm_parser.IncrementalMovieParser()
+    chunks, pending, parsed_count = [], [], 0
+
+    async for chunk in _llm_chunks(movie, keywords, usage):
+        chunks.append(chunk)
+        completed = parser.feed(chunk)
+        parsed_count += len(completed)
+        pending.extend(completed)
+        while len(pending) >= LLM_REC_STREAM_BATCH_SIZE:
+            batch = pending[:LLM_REC_STREAM_BATCH_SIZE]
+            pending = pending[LLM_REC_STREAM_BATCH_SIZE:]
+            await on_batch(batch)
+
+    if pending:
+        await on_batch(pending)
+    return "".join(chunks), parsed_count
+
+
+async def _generate_and_cache_llm_rec(
+    source_movie_id: int,
+    keywords: List[str],
+    trigger_hash: str,
+    usage: Dict[str, int],
+    retrying: bool = False,
+):
+    if retrying:
+        await _reset_partial_generation(trigger_hash)
+
+    print("Generating LLM recommendations...")
+    async with AsyncSessionLocal() as db:
         print(
-            f"Enriched recommendations with database data: {len(enriched_recs)} found."
+            f"Generating LLM recommendations for movie ID {source_movie_id} with keywords {keywords}."
         )
-        recs_to_save = [
-            {
-                "source_movie_id": source_movie_id,
-                "trigger_keywords_hash": trigger_hash,
-                "recommended_movie_id": rec["id"],
-                "llm_justification": rec["justification"],
-                "llm_score": rec["ai_score"],
-            }
-            for rec in enriched_recs
-        ]
-
-        final_recs_with_ids = crud_recommendation.bulk_create_llm_recommendations(
-            db, recs_to_save
+        movie = await crud_movie.get_movie_by_id(db, source_movie_id)
+
+    final_cached_data = []
+    seq = 0
+
+    async def on_batch(parsed_movies: List[Dict[str, Any]]):
+        nonlocal seq
+        cached_data = await recommendation_store.store_recommendation_batch(
+            source_movie_id, trigger_hash, parsed_movies
         )
+        final_cached_data.extend(cached_data)
+        if cached_data:
+            seq += 1
+            results = [
+                schemas.recommendation.BaseRecResult(**rec).model_dump()
+                for rec in cached_data
+            ]
+            await _publish_stream_event(
+                trigger_hash, {"seq": seq, "type": "batch", "results": results}
+            )
+
+    llm_raw_output, parsed_count = await _stream_recommendations(
+        movie, keywords, on_batch, usage
+    )
+    if not parsed_count:
+        # The response did not have the expected shape for incremental
+        # parsing, fall back to parsing it as a whole.
+        parsed_recs = llm_parser.parse_llm_recommendations(llm_raw_output) or {}
+        if parsed_recs.get("movies"):
+            await on_batch(parsed_recs["movies"])
 
-        final_cached_data = []
-        rec_map = {rec["recommended_movie_id"]: rec for rec in final_recs_with_ids}
-        for enriched_rec in enriched_recs:
-            db_rec = rec_map.get(enriched_rec["id"])
-            if db_rec:
-                final_cached_data.append({**enriched_rec, "id": db_rec["id"]})
+    print(f"Parsed {len(final_cached_data)} recommendations from LLM output.")
 
-    with sync_get_redis_client() as redis_client:
-        crud_cache.cache_llm_recommendation(
-            redis_client, f"llm_rec:{trigger_hash}", final_cached_data
+    await recommendation_store.store_recommendation_set(
+        source_movie_id, trigger_hash, keywords, final_cached_data
+    )
+    async with redis.Redis(connection_pool=redis_pool) as redis_client:
+        await crud_cache.cache_and_announce_llm_recommendation(
+            redis_client, trigger_hash, final_cached_data, source_movie_id, keywords
         )
+    await _publish_stream_event(trigger_hash, {"seq": seq + 1, "type": "complete"})